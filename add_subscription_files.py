@@ -4,25 +4,16 @@ Script to add subscription files to the Xcode project
 This manually modifies project.pbxproj file
 """
 
-import re
-import uuid
-import shutil
 from pathlib import Path
 
-def generate_uuid():
-    """Generate a 24-character UUID in Xcode format"""
-    return ''.join(str(uuid.uuid4()).replace('-', '').upper()[:24])
+from pbxtools import ProjectEdit, backup_project, trace
 
 def add_files_to_pbxproj():
     project_file = Path("SmartLockBox.xcodeproj/project.pbxproj")
 
-    # Backup the project file
-    shutil.copy(project_file, f"{project_file}.backup")
-    print(f"✅ Backed up project file to {project_file}.backup")
-
-    # Read the project file
-    with open(project_file, 'r') as f:
-        content = f.read()
+    # Snapshot the project file into the shared backup store
+    snapshot = backup_project(project_file, script="add_subscription_files")
+    print(f"✅ Backed up project file as snapshot {snapshot.id}")
 
     # Files to add
     files = [
@@ -63,75 +54,23 @@ def add_files_to_pbxproj():
         },
     ]
 
-    # Generate UUIDs for each file
-    file_refs = []
-    build_file_refs = []
-
+    # Queue every file, then apply them with one parse and one write
+    edit = ProjectEdit.open(project_file)
     for file_info in files:
-        file_ref_id = generate_uuid()
-        build_file_id = generate_uuid()
-        file_refs.append((file_ref_id, file_info))
-        build_file_refs.append((build_file_id, file_ref_id, file_info))
-        print(f"📝 Generated UUIDs for {file_info['name']}")
-
-    # Find the PBXBuildFile section
-    pbx_buildfile_section_pattern = r'/\* Begin PBXBuildFile section \*/'
-    match = re.search(pbx_buildfile_section_pattern, content)
-
-    if match:
-        insert_pos = match.end()
-        build_file_entries = []
-
-        for build_file_id, file_ref_id, file_info in build_file_refs:
-            entry = f"\n\t\t{build_file_id} /* {file_info['name']} in Sources */ = {{isa = PBXBuildFile; fileRef = {file_ref_id} /* {file_info['name']} */; }};"
-            build_file_entries.append(entry)
-
-        content = content[:insert_pos] + ''.join(build_file_entries) + content[insert_pos:]
-        print("✅ Added PBXBuildFile entries")
-
-    # Find the PBXFileReference section
-    pbx_fileref_section_pattern = r'/\* Begin PBXFileReference section \*/'
-    match = re.search(pbx_fileref_section_pattern, content)
-
-    if match:
-        insert_pos = match.end()
-        file_ref_entries = []
-
-        for file_ref_id, file_info in file_refs:
-            entry = f"\n\t\t{file_ref_id} /* {file_info['name']} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = {file_info['name']}; sourceTree = \"<group>\"; }};"
-            file_ref_entries.append(entry)
-
-        content = content[:insert_pos] + ''.join(file_ref_entries) + content[insert_pos:]
-        print("✅ Added PBXFileReference entries")
-
-    # Find the PBXSourcesBuildPhase section and add to Sources
-    sources_buildphase_pattern = r'(/\* Sources \*/.*?buildPhase.*?files = \()(.*?)(\);)'
-    match = re.search(sources_buildphase_pattern, content, re.DOTALL)
-
-    if match:
-        files_section = match.group(2)
-        source_entries = []
-
-        for build_file_id, file_ref_id, file_info in build_file_refs:
-            entry = f"\n\t\t\t\t{build_file_id} /* {file_info['name']} in Sources */,"
-            source_entries.append(entry)
-
-        new_files_section = files_section + ''.join(source_entries)
-        content = content[:match.start(2)] + new_files_section + content[match.end(2):]
-        print("✅ Added to PBXSourcesBuildPhase")
-
-    # Write the modified content back
-    with open(project_file, 'w') as f:
-        f.write(content)
+        edit.add_file(file_info['path'], targets=["SmartLockBox"])
+        print(f"📝 Queued {file_info['name']}")
 
-    print(f"\n✅ Successfully modified {project_file}")
-    print(f"📦 Added {len(files)} files to the Xcode project")
-    print("\n⚠️  Note: You may need to add the files to the correct groups manually in Xcode")
+    summary = edit.commit()
+    if summary['synchronized']:
+        print(f"\n⏭️  {summary['synchronized']} files are in a synchronized folder; "
+              f"Xcode picks them up automatically ({summary['exceptions']} membership exception edits)")
+    print(f"\n✅ Added {summary['files']} file references and {summary['build_files']} build files")
 
 if __name__ == "__main__":
     try:
-        add_files_to_pbxproj()
+        with trace.span('add_subscription_files'):
+            add_files_to_pbxproj()
         print("\n✅ Done! The project file has been updated.")
     except Exception as e:
         print(f"\n❌ Error: {e}")
-        print("The project file backup is available at SmartLockBox.xcodeproj/project.pbxproj.backup")
+        print("Restore the backup with: python3 -m pbxtools backup restore latest")
@@ -3,8 +3,24 @@
 Generate 2000 Korean-English word pairs for creative unlock challenge
 """
 
-import json
-import random
+import argparse
+
+from wordbank import (
+    CALIBRATION,
+    DEFAULT_CUTOFFS,
+    LocaleJob,
+    WordTable,
+    bank_order,
+    build,
+    calibrate,
+    dedup,
+    iter_stable_words,
+    parse_cutoffs,
+    update_bank,
+    write_bank,
+    write_pair_table,
+    write_search_index,
+)
 
 # Categories of words
 words_data = {
@@ -557,88 +573,152 @@ words_data = {
     ]
 }
 
-def generate_words_json(target_count=2000):
-    """Generate words JSON with target count"""
+METADATA = {
+    "last_updated": "2025-11-03",
+    "version": "2.0"
+}
+
+RESOURCES = "SmartLockBox/Resources"
+
+# Pre-sampled unlock-challenge pairs written to Pairs.bin
+PAIR_COUNT = 10000
+
+# Fixed so regenerating keeps every unchanged word's ID and position
+SEED = "SmartLockBox"
+
 
-    # Combine and extend word lists
-    all_words = []
-    word_id = 1
-
-    # Add nouns with difficulties
-    nouns = words_data["nouns"]
-    for i, (korean, english) in enumerate(nouns):
-        if i < len(nouns) * 0.3:
-            difficulty = "easy"
-        elif i < len(nouns) * 0.7:
-            difficulty = "medium"
-        else:
-            difficulty = "hard"
-
-        all_words.append({
-            "id": word_id,
-            "korean": korean,
-            "english": english,
-            "category": "명사",
-            "difficulty": difficulty
-        })
-        word_id += 1
-
-    # Add adjectives with difficulties
-    adjectives = words_data["adjectives"]
-    for i, (korean, english) in enumerate(adjectives):
-        if i < len(adjectives) * 0.3:
-            difficulty = "easy"
-        elif i < len(adjectives) * 0.7:
-            difficulty = "medium"
-        else:
-            difficulty = "hard"
-
-        all_words.append({
-            "id": word_id,
-            "korean": korean,
-            "english": english,
-            "category": "형용사",
-            "difficulty": difficulty
-        })
-        word_id += 1
-
-    # Shuffle to mix categories
-    random.shuffle(all_words)
-
-    # Re-assign IDs after shuffle
-    for i, word in enumerate(all_words, 1):
-        word["id"] = i
-
-    # Trim or extend to target count
-    if len(all_words) > target_count:
-        all_words = all_words[:target_count]
+def clean_table(cutoffs=None, calibration=None):
+    """words_data normalized, de-duplicated and scored, plus the DedupReport"""
+    clean, report = dedup(words_data)
+    return WordTable(clean).score(cutoffs, calibration), report
 
+
+def generate_words_json(target_count=2000):
+    """Generate words JSON with target count"""
+    words = list(iter_stable_words(clean_table()[0], target_count, SEED))
     return {
-        "words": all_words,
-        "metadata": {
-            "total_count": len(all_words),
-            "last_updated": "2025-11-03",
-            "version": "2.0"
-        }
+        "words": words,
+        "metadata": {"total_count": len(words), **METADATA}
     }
 
-if __name__ == "__main__":
-    print("📝 Generating 2000 Korean-English word pairs...")
 
-    words_json = generate_words_json(2000)
+def write_words_file(output_path, target_count=2000, seed=SEED, binary_path=None, table=None, order=None):
+    """Stream the shuffled bank into output_path; returns words per category.
+
+    Records are generated and encoded one at a time; only the ID lists of
+    the "indexes" section grow with target_count. With binary_path, the same
+    records are also written as a Words.bin bank. Pass a bank_order() to
+    reuse one already computed for the other outputs.
+    """
+    if table is None:
+        table = clean_table()[0]
+    return write_bank(output_path, table, METADATA, target_count, seed, binary_path, order=order)
+
+
+def build_locales(locales, target_count=2000, seed=SEED, workers=None, cutoffs=None,
+                  pairs=PAIR_COUNT, trigrams=False, stable_ids=True):
+    """Write each locale's Words.json, Words.bin, Pairs.bin and Search.json in parallel"""
+    jobs = [LocaleJob(locale, [words_data], target_count, seed, cutoffs=cutoffs, pairs=pairs,
+                      search=True, trigrams=trigrams, stable_ids=stable_ids)
+            for locale in locales]
+    return build(jobs, RESOURCES, METADATA, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--locale', action='append', default=[],
+                        help='also build <locale>.lproj/Words.json (repeatable)')
+    parser.add_argument('--jobs', type=int, help='worker processes for --locale builds')
+    parser.add_argument('--seed', default=SEED, help='shuffle seed (changing it reorders the bank)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='rewrite only if entries changed and write a delta file')
+    parser.add_argument('--cutoffs', type=parse_cutoffs,
+                        help='split the bank at these easy/medium and medium/hard score quantiles '
+                             'instead of the frozen calibration (e.g. 0.3,0.7)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='list every word with several translations, not just how many')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='refit the frozen difficulty calibration on this bank (reclassifies words)')
+    parser.add_argument('--pairs', type=int, default=PAIR_COUNT,
+                        help=f'challenge pairs to pre-sample into Pairs.bin (default: {PAIR_COUNT}, 0 to skip)')
+    parser.add_argument('--delta', help='where --incremental writes the delta (default: .wordbank/)')
+    parser.add_argument('--trigrams', action='store_true',
+                        help='add trigram postings for substring queries to Search.json')
+    parser.add_argument('--sequential-ids', action='store_true',
+                        help='number words 1..n in a constant-memory shuffle instead of stable '
+                             'content-hash IDs (IDs change whenever the tables do)')
+    args = parser.parse_args(argv)
+    if args.sequential_ids and args.incremental:
+        parser.error('--incremental needs stable IDs; drop --sequential-ids')
 
-    output_path = "SmartLockBox/Resources/Words.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(words_json, f, ensure_ascii=False, indent=2)
+    print("📝 Generating 2000 Korean-English word pairs...")
 
-    print(f"✅ Generated {len(words_json['words'])} words")
-    print(f"📁 Saved to: {output_path}")
+    calibration = None
+    if args.calibrate:
+        calibration = calibrate(*WordTable(dedup(words_data)[0]).columns(), args.cutoffs or DEFAULT_CUTOFFS)
+        calibration.save(CALIBRATION)
+        print(f"🎚️  Refitted the difficulty calibration → {CALIBRATION}")
+
+    table, report = clean_table(None if calibration else args.cutoffs, calibration)
+    if report.duplicates:
+        print(f"🧹 Dropped {len(report.duplicates)} duplicate pairs")
+    if report.korean_conflicts or report.english_conflicts:
+        print(f"⚠️  {len(report.korean_conflicts)} Korean and {len(report.english_conflicts)} English words "
+              f"with several translations{'' if args.verbose else ' (--verbose lists them)'}")
+    if args.verbose:
+        for korean, english in report.korean_conflicts.items():
+            print(f"   {korean} → {', '.join(english)}")
+        for english, korean in report.english_conflicts.items():
+            print(f"   {english} → {', '.join(korean)}")
+
+    # One order feeds Words.json, Words.bin, Pairs.bin and Search.json
+    order = bank_order(table, 2000, args.seed, stable_ids=not args.sequential_ids)
+    output_path = f"{RESOURCES}/Words.json"
+    binary_path = f"{RESOURCES}/Words.bin"
+    if args.incremental:
+        counts, delta = update_bank(output_path, table, METADATA, 2000, args.seed, binary_path,
+                                    delta_path=args.delta, order=order)
+        if delta:
+            print(f"🔁 Delta: {len(delta.added)} added, {len(delta.changed)} changed, "
+                  f"{len(delta.removed)} removed")
+    else:
+        counts = write_words_file(output_path, 2000, args.seed, binary_path, table, order)
+
+    if counts is None:
+        print(f"✅ {output_path} is already up to date")
+    else:
+        print(f"✅ Generated {sum(counts.values())} words")
+        print(f"📁 Saved to: {output_path}")
+        print(f"📦 Binary bank: {binary_path}")
+
+        # Print statistics
+        noun_count = counts['명사']
+        adj_count = counts['형용사']
+
+        print(f"\n📊 Statistics:")
+        print(f"  명사 (Nouns): {noun_count}")
+        print(f"  형용사 (Adjectives): {adj_count}")
+        print(f"  Total: {noun_count + adj_count}")
+
+    if args.pairs:
+        pairs_path = f"{RESOURCES}/Pairs.bin"
+        written, shortfall = write_pair_table(pairs_path, table, args.pairs, 2000, args.seed, order=order,
+                                              glosses=report.glosses())
+        print(f"\n🎲 {written} challenge pairs → {pairs_path}")
+        if shortfall:
+            print(f"⚠️  {shortfall} pairs short: some category/difficulty strata are too small")
+
+    search_path = f"{RESOURCES}/Search.json"
+    write_search_index(search_path, table, 2000, args.seed, args.trigrams, order=order)
+    print(f"🔎 Search index → {search_path}")
+
+    if args.locale:
+        print(f"\n🌐 Building {len(args.locale)} locale banks...")
+        for result in build_locales(args.locale, seed=args.seed, workers=args.jobs,
+                                    cutoffs=args.cutoffs, pairs=args.pairs, trigrams=args.trigrams,
+                                    stable_ids=not args.sequential_ids):
+            print(f"  {result.locale}: {result.total} words → {result.output_path}")
 
-    # Print statistics
-    noun_count = sum(1 for w in words_json['words'] if w['category'] == '명사')
-    adj_count = sum(1 for w in words_json['words'] if w['category'] == '형용사')
 
-    print(f"\n📊 Statistics:")
-    print(f"  명사 (Nouns): {noun_count}")
-    print(f"  형용사 (Adjectives): {adj_count}")
-    print(f"  Total: {noun_count + adj_count}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Shared project.pbxproj tooling for the add_*.py scripts
+"""
+
+from .backup import BackupStore, backup_project
+from .edit import ProjectEdit
+from .extension import ExtensionSpec, add_extension
+from .ids import IDAllocator
+from .objects import PBXObject, build_file, build_phase, file_reference, file_type, group
+from .parser import PBXParseError
+from .project import PBXProject
+from .synced import SynchronizedFolders
+from .validate import ValidationError
+
+__all__ = [
+    'BackupStore',
+    'ExtensionSpec',
+    'IDAllocator',
+    'PBXObject',
+    'PBXParseError',
+    'PBXProject',
+    'ProjectEdit',
+    'SynchronizedFolders',
+    'ValidationError',
+    'add_extension',
+    'backup_project',
+    'build_file',
+    'build_phase',
+    'file_reference',
+    'file_type',
+    'group',
+]
@@ -0,0 +1,212 @@
+"""
+Command line entry point: python3 -m pbxtools <command> ...
+"""
+
+import argparse
+import sys
+import time
+
+from . import backup, bench, extension, validate
+from .edit import ProjectEdit
+from .parser import PBXParseError
+from .project import PBXProject
+from .sync import sync
+
+DEFAULT_PROJECT = 'SmartLockBox.xcodeproj/project.pbxproj'
+
+
+def _read_paths(args):
+    paths = list(args.paths)
+    if args.from_file:
+        with open(args.from_file, 'r', encoding='utf-8') as f:
+            paths.extend(line.strip() for line in f if line.strip())
+    return paths
+
+
+def cmd_add(args):
+    paths = _read_paths(args)
+    if not paths:
+        print("❌ No files given")
+        return 1
+    try:
+        edit = ProjectEdit.open(args.project, seed=args.seed)
+        edit.add_files(paths, targets=args.target)
+        summary = edit.commit()
+    except (KeyError, OSError, ValueError) as e:
+        print(f"❌ {e.args[0] if isinstance(e, KeyError) else e}")
+        return 1
+    print(f"✅ Added {summary['files']} files, {summary['groups']} groups, "
+          f"{summary['build_files']} build files to {args.project}")
+    if summary['synchronized']:
+        print(f"⏭️  {summary['synchronized']} files are in synchronized folders; "
+              f"{summary['exceptions']} membership exception edits")
+    return 0
+
+
+def cmd_sync(args):
+    result = sync(args.project, dry_run=args.dry_run, use_cache=not args.no_cache, seed=args.seed,
+                  remove=args.remove)
+    if result.up_to_date:
+        print("✅ Project already matches the source folders")
+        return 0
+    for folder in result.skipped:
+        print(f"⏭️  {folder}/ is a synchronized folder; Xcode picks up its files itself")
+    for warning in result.warnings:
+        print(f"⚠️  {warning}")
+    for path in result.added:
+        print(f"➕ {path}")
+    for path in result.removed:
+        print(f"➖ {path}")
+    for path in result.missing:
+        print(f"❓ {path} is referenced but not on disk (pass --remove to drop it)")
+    verb = "Would apply" if args.dry_run else "Applied"
+    print(f"✅ {verb} {len(result.added)} additions and {len(result.removed)} removals")
+    return 0
+
+
+def cmd_bench(args):
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = bench.run(sizes, targets=args.targets, add=args.add, lookups=args.lookups,
+                        repeat=args.repeat, log=lambda result: print(bench.format_result(result)))
+    bench.save(results, args.output)
+    print(f"✅ Wrote {len(results['results'])} results to {args.output}")
+    if args.compare:
+        for objects, stage, before, after in bench.compare(results, bench.load(args.compare)):
+            marker = '⚠️ ' if after > before * (1 + args.tolerance) else '  '
+            print(f"{marker}{objects:>7} objects  {stage:<16} {before * 1000:>10.1f} -> {after * 1000:.1f} ms "
+                  f"({after / before:.2f}x)")
+    return 0
+
+
+def cmd_extension(args):
+    try:
+        spec = extension.ExtensionSpec(args.name, args.kind, host=args.host, sources=args.source or None,
+                                       bundle_id=args.bundle_id)
+        project = PBXProject.load(args.project)
+        added = extension.add_extension(project, spec)
+        project.save()
+    except (KeyError, OSError, ValueError) as e:
+        print(f"❌ {e.args[0] if isinstance(e, KeyError) else e}")
+        return 1
+    print(f"✅ Added {args.kind} extension {args.name} ({len(added.objects)} objects), embedded in {args.host}")
+    for ref in added.files:
+        print(f"📄 {spec.folder}/{ref.get('path')}")
+    return 0
+
+
+def cmd_validate(args):
+    try:
+        project = PBXProject.load(args.project)
+    except (OSError, PBXParseError) as e:
+        print(f"❌ {e}")
+        return 1
+    issues = validate.validate(project)
+    for issue in issues:
+        print(f"❌ {issue}")
+    if issues:
+        print(f"⚠️  {len(issues)} structural problems in {args.project}")
+        return 1
+    print(f"✅ {args.project} is structurally sound ({len(project.objects)} objects)")
+    return 0
+
+
+def _describe(snapshot):
+    when = time.strftime('%Y-%m-%d %H:%M', time.localtime(snapshot.saved))
+    origin = snapshot.script or snapshot.label or '-'
+    return f"{snapshot.id}  {when}  {snapshot.size:>9} B  {origin}"
+
+
+def cmd_backup(args):
+    try:
+        store = backup.BackupStore.for_project(args.project)
+        if args.action == 'save':
+            snapshot = store.snapshot(args.project, script=args.script, label=args.label, keep=args.keep)
+            print(f"✅ Saved snapshot {_describe(snapshot)}")
+        elif args.action == 'list':
+            snapshots = store.history()
+            for snapshot in snapshots:
+                print(_describe(snapshot))
+            print(f"📦 {len(snapshots)} snapshots in {store.stored_bytes()} B of compressed chunks")
+        elif args.action == 'restore':
+            snapshot = store.restore(args.snapshot, args.to or args.project)
+            print(f"✅ Restored {_describe(snapshot)} to {args.to or args.project}")
+        elif args.action == 'prune':
+            snapshots, chunks = store.prune(args.keep, args.max_age_days)
+            print(f"🧹 Removed {snapshots} snapshots and {chunks} chunks")
+        elif args.action == 'import':
+            imported = backup.import_legacy(args.project, remove=args.remove)
+            for snapshot in imported:
+                print(f"📥 {_describe(snapshot)}")
+            print(f"✅ Imported {len(imported)} legacy backups")
+    except (KeyError, OSError, ValueError) as e:
+        print(f"❌ {e.args[0] if isinstance(e, KeyError) else e}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m pbxtools')
+    parser.add_argument('--project', default=DEFAULT_PROJECT, help='path to project.pbxproj')
+    parser.add_argument('--seed', help='derive new object IDs deterministically from this seed')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='add files to groups and targets in one write')
+    add.add_argument('paths', nargs='*', help='file paths relative to the project directory')
+    add.add_argument('--target', action='append', default=[], help='target to build the files in (repeatable)')
+    add.add_argument('--from-file', help='read additional paths, one per line')
+    add.set_defaults(func=cmd_add)
+
+    sync_cmd = commands.add_parser('sync', help='add (with --remove, also drop) file references to match the source folders')
+    sync_cmd.add_argument('--dry-run', action='store_true', help='only report the changes')
+    sync_cmd.add_argument('--remove', action='store_true',
+                          help='also remove references to files that are no longer on disk')
+    sync_cmd.add_argument('--no-cache', action='store_true', help='ignore and do not update the walk cache')
+    sync_cmd.set_defaults(func=cmd_sync)
+
+    extension_cmd = commands.add_parser('extension', help='add an app extension target from a template')
+    extension_cmd.add_argument('name', help='target name, e.g. ShieldConfigurationExtension')
+    extension_cmd.add_argument('--kind', required=True, choices=sorted(extension.KINDS))
+    extension_cmd.add_argument('--host', default='SmartLockBox', help='app target that embeds the extension')
+    extension_cmd.add_argument('--source', action='append', help="source file (repeatable); default: the kind's template")
+    extension_cmd.add_argument('--bundle-id', help="default: the host's bundle ID plus the name")
+    extension_cmd.set_defaults(func=cmd_extension)
+
+    validate_cmd = commands.add_parser('validate', help='check references, phases and groups')
+    validate_cmd.set_defaults(func=cmd_validate)
+
+    backup_cmd = commands.add_parser('backup', help='save, list, restore and prune project snapshots')
+    actions = backup_cmd.add_subparsers(dest='action', required=True)
+    save = actions.add_parser('save', help='snapshot the project file')
+    save.add_argument('--script', help='name of the script taking the snapshot')
+    save.add_argument('--label', help='free-form note stored with the snapshot')
+    save.add_argument('--keep', type=int, default=backup.DEFAULT_KEEP, help='snapshots to retain afterwards')
+    actions.add_parser('list', help='show snapshots, newest first')
+    restore = actions.add_parser('restore', help='write a snapshot back')
+    restore.add_argument('snapshot', help='snapshot id (any unique prefix)')
+    restore.add_argument('--to', help='restore to this path instead of the project file')
+    prune = actions.add_parser('prune', help='drop least recently used snapshots')
+    prune.add_argument('--keep', type=int, default=backup.DEFAULT_KEEP, help='snapshots to retain')
+    prune.add_argument('--max-age-days', type=float, help='also drop snapshots unused for this long')
+    legacy = actions.add_parser('import', help='move project.pbxproj.backup* copies into the store')
+    legacy.add_argument('--remove', action='store_true', help='delete the copies once stored')
+    backup_cmd.set_defaults(func=cmd_backup)
+
+    bench_cmd = commands.add_parser('bench', help='time parse/lookup/add/serialize on synthetic projects')
+    bench_cmd.add_argument('--sizes', default=','.join(map(str, bench.DEFAULT_SIZES)),
+                           help='comma-separated object counts')
+    bench_cmd.add_argument('--targets', type=int, default=bench.DEFAULT_TARGETS, help='targets per project (1-4)')
+    bench_cmd.add_argument('--add', type=int, default=bench.DEFAULT_ADD, help='files added by the add_files stage')
+    bench_cmd.add_argument('--lookups', type=int, default=bench.DEFAULT_LOOKUPS, help='lookups in the lookup stage')
+    bench_cmd.add_argument('--repeat', type=int, default=3, help='timed runs per stage')
+    bench_cmd.add_argument('--output', default='bench_pbxtools.json', help='results file')
+    bench_cmd.add_argument('--compare', help='earlier results file to compare against')
+    bench_cmd.add_argument('--tolerance', type=float, default=0.1,
+                           help='slowdown flagged by --compare (0.1 = 10%%)')
+    bench_cmd.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
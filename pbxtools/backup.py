@@ -0,0 +1,313 @@
+"""
+Content-addressed, chunk-deduplicated snapshots of project.pbxproj
+
+Snapshots live in <name>.xcodeproj/.pbxtools/backups/:
+
+    chunks/<2 hex>/<40 hex>    zlib-compressed chunk, named by its blake2b hash
+    index.json                 every snapshot: digest, script, label, times
+                               and the ordered list of its chunk hashes
+
+A snapshot's `saved` time is the last time its bytes were snapshotted, so
+after reverting to an older version and snapshotting it, that version is
+the latest again even though it was first created earlier.
+
+Files are cut into chunks at content-defined line boundaries, so an edit
+that inserts a few objects changes only the chunks around the insertion and
+every other chunk is shared with earlier snapshots. Restoring reads and
+inflates exactly the snapshot's chunks.
+
+Pruning keeps the most recently used snapshots (restoring counts as a use)
+and optionally drops anything older than a cut-off, then deletes chunks no
+remaining snapshot refers to.
+"""
+
+import hashlib
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+
+from . import trace
+
+INDEX_VERSION = 1
+DEFAULT_KEEP = 20
+
+# A chunk ends after a line whose CRC has these low bits clear (about one
+# line in 64), but never below MIN_CHUNK bytes and always by MAX_CHUNK.
+_BOUNDARY_MASK = 63
+MIN_CHUNK = 1024
+MAX_CHUNK = 64 * 1024
+_COMPRESSION = 6
+
+
+def store_dir(project_path):
+    """<name>.xcodeproj/.pbxtools/backups for a project.pbxproj path"""
+    return Path(project_path).parent / '.pbxtools' / 'backups'
+
+
+def chunk_hash(data):
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def split_chunks(data):
+    """Cut bytes into content-defined chunks on line boundaries"""
+    chunks = []
+    start = 0
+    pos = 0
+    size = len(data)
+    while pos < size:
+        end = data.find(b'\n', pos)
+        end = size if end < 0 else end + 1
+        length = end - start
+        if length >= MAX_CHUNK or (length >= MIN_CHUNK and not zlib.crc32(data[pos:end]) & _BOUNDARY_MASK):
+            chunks.append(data[start:end])
+            start = end
+        pos = end
+    if start < size:
+        chunks.append(data[start:])
+    return chunks
+
+
+class Snapshot:
+    """One saved version of a project file"""
+
+    def __init__(self, digest, size, chunks, script=None, label=None, source=None,
+                 created=None, last_used=None, saved=None):
+        self.digest = digest
+        self.size = size
+        self.chunks = chunks
+        self.script = script
+        self.label = label
+        self.source = source
+        self.created = created if created is not None else time.time()
+        self.last_used = last_used if last_used is not None else self.created
+        self.saved = saved if saved is not None else self.created
+
+    @property
+    def id(self):
+        """Short form of the content digest, as shown to users"""
+        return self.digest[:12]
+
+    def to_dict(self):
+        return {
+            'digest': self.digest,
+            'size': self.size,
+            'chunks': self.chunks,
+            'script': self.script,
+            'label': self.label,
+            'source': self.source,
+            'created': self.created,
+            'last_used': self.last_used,
+            'saved': self.saved,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['digest'], data['size'], data['chunks'], data.get('script'), data.get('label'),
+                   data.get('source'), data.get('created'), data.get('last_used'), data.get('saved'))
+
+
+class BackupStore:
+    """Snapshots of one project, sharing compressed chunks between them"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.chunk_dir = self.root / 'chunks'
+        self.index_path = self.root / 'index.json'
+        self.snapshots = self._read_index()
+
+    @classmethod
+    def for_project(cls, project_path):
+        return cls(store_dir(project_path))
+
+    # Index
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            raise ValueError(f"{self.index_path}: unreadable backup index ({e})") from None
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"{self.index_path}: unsupported backup index version {data.get('version')}")
+        return [Snapshot.from_dict(entry) for entry in data['snapshots']]
+
+    def _write_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION,
+                       'snapshots': [snapshot.to_dict() for snapshot in self.snapshots]}, f, indent=1)
+            f.write('\n')
+        os.replace(tmp, self.index_path)
+
+    def find(self, snapshot_id):
+        """Snapshot whose digest starts with snapshot_id, or the newest for 'latest'.
+
+        Raises KeyError when there is no match or the prefix is ambiguous.
+        """
+        if snapshot_id == 'latest':
+            latest = self.latest()
+            if latest is None:
+                raise KeyError("No backup snapshots yet")
+            return latest
+        matches = [s for s in self.snapshots if s.digest.startswith(snapshot_id)]
+        if not matches:
+            raise KeyError(f"No backup snapshot {snapshot_id}")
+        if len(matches) > 1:
+            raise KeyError(f"Backup snapshot id {snapshot_id} is ambiguous")
+        return matches[0]
+
+    def latest(self):
+        """Most recently saved snapshot, or None"""
+        history = self.history()
+        return history[0] if history else None
+
+    def history(self):
+        """Snapshots, most recently saved first; ties go to the later snapshot() call"""
+        order = sorted(enumerate(self.snapshots), key=lambda entry: (entry[1].saved, entry[0]), reverse=True)
+        return [snapshot for _, snapshot in order]
+
+    # Chunks
+
+    def _chunk_path(self, digest):
+        return self.chunk_dir / digest[:2] / digest
+
+    def _put_chunk(self, data):
+        digest = chunk_hash(data)
+        path = self._chunk_path(digest)
+        if path.exists():
+            trace.count('backup_chunks_shared')
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        packed = zlib.compress(data, _COMPRESSION)
+        with open(tmp, 'wb') as f:
+            f.write(packed)
+        os.replace(tmp, path)
+        trace.count('backup_chunks_written')
+        trace.count('backup_bytes_stored', len(packed))
+        return digest
+
+    def _get_chunk(self, digest):
+        with open(self._chunk_path(digest), 'rb') as f:
+            packed = f.read()
+        try:
+            return zlib.decompress(packed)
+        except zlib.error:
+            raise ValueError(f"Backup chunk {digest} is corrupt") from None
+
+    # Operations
+
+    def snapshot(self, path, script=None, label=None, keep=DEFAULT_KEEP, created=None):
+        """Save the current contents of `path`; returns its Snapshot.
+
+        Saving bytes identical to an existing snapshot stores nothing new but
+        makes it the latest: its saved and last-used times are refreshed, as
+        are its script and label. Afterwards the store is
+        pruned to the `keep` most recently used snapshots (None keeps all).
+        """
+        with trace.span('backup.snapshot', path=str(path)):
+            with open(path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+            now = time.time() if created is None else created
+            for snapshot in self.snapshots:
+                if snapshot.digest == digest:
+                    snapshot.saved = snapshot.last_used = now
+                    snapshot.script = script or snapshot.script
+                    snapshot.label = label or snapshot.label
+                    self.snapshots.remove(snapshot)
+                    self.snapshots.append(snapshot)
+                    break
+            else:
+                chunks = [self._put_chunk(chunk) for chunk in split_chunks(data)]
+                snapshot = Snapshot(digest, len(data), chunks, script, label, str(path), now, now)
+                self.snapshots.append(snapshot)
+            if keep is not None:
+                self._drop(self._over_limit(keep))
+            self._write_index()
+        return snapshot
+
+    def restore(self, snapshot_id, dest):
+        """Write a snapshot back to `dest` (atomically) and mark it used"""
+        snapshot = self.find(snapshot_id)
+        with trace.span('backup.restore', snapshot=snapshot.id):
+            data = b''.join(self._get_chunk(digest) for digest in snapshot.chunks)
+            if hashlib.blake2b(data, digest_size=20).hexdigest() != snapshot.digest:
+                raise ValueError(f"Backup snapshot {snapshot.id} is corrupt")
+            dest = Path(dest)
+            tmp = dest.with_name(dest.name + '.restore.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, dest)
+            snapshot.last_used = time.time()
+            self._write_index()
+        return snapshot
+
+    def prune(self, keep=DEFAULT_KEEP, max_age_days=None):
+        """Drop all but the `keep` most recently used snapshots and those older
+        than max_age_days; returns (snapshots removed, chunks removed)"""
+        doomed = self._over_limit(keep)
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            doomed.update(s.digest for s in self.snapshots if s.last_used < cutoff)
+        removed_chunks = self._drop(doomed)
+        self._write_index()
+        return len(doomed), removed_chunks
+
+    def _over_limit(self, keep):
+        by_use = sorted(self.snapshots, key=lambda s: s.last_used, reverse=True)
+        return {s.digest for s in by_use[keep:]} if keep is not None else set()
+
+    def _drop(self, digests):
+        """Forget snapshots and delete the chunks only they referenced"""
+        if not digests:
+            return 0
+        dropped = [s for s in self.snapshots if s.digest in digests]
+        self.snapshots = [s for s in self.snapshots if s.digest not in digests]
+        live = {chunk for s in self.snapshots for chunk in s.chunks}
+        removed = 0
+        for chunk in {chunk for s in dropped for chunk in s.chunks} - live:
+            try:
+                os.remove(self._chunk_path(chunk))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def stored_bytes(self):
+        """Compressed size of every chunk on disk"""
+        if not self.chunk_dir.exists():
+            return 0
+        return sum(path.stat().st_size for path in self.chunk_dir.glob('*/*'))
+
+
+def backup_project(project_path, script=None, label=None, keep=DEFAULT_KEEP):
+    """Snapshot a project.pbxproj into its backup store; returns the Snapshot"""
+    return BackupStore.for_project(project_path).snapshot(project_path, script, label, keep)
+
+
+def legacy_copies(project_path):
+    """The project.pbxproj.backup* full copies the scripts used to leave behind"""
+    project_path = Path(project_path)
+    return sorted(project_path.parent.glob(f'{project_path.name}.backup*'))
+
+
+def import_legacy(project_path, remove=False):
+    """Move legacy .backup* copies into the store, labelled by their suffix.
+
+    Each keeps its file modification time as its creation time. With
+    remove=True the copies are deleted once stored. Returns the Snapshots.
+    """
+    store = BackupStore.for_project(project_path)
+    imported = []
+    for path in legacy_copies(project_path):
+        label = path.name[len(Path(project_path).name) + 1:]
+        imported.append(store.snapshot(path, label=label, keep=None, created=path.stat().st_mtime))
+        if remove:
+            path.unlink()
+    return imported
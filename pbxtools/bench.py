@@ -0,0 +1,410 @@
+"""
+Benchmarks for parsing, looking up, editing and writing large synthetic projects
+
+Projects are generated offline with the same layout as SmartLockBox.xcodeproj:
+an app target, unit and UI test targets and app extensions, each with its own
+Sources/Frameworks/Resources phases, Debug/Release configurations, product
+reference and a nested group tree of Swift sources and resources.
+
+Every stage is timed with time.perf_counter over `repeat` runs; one more run
+under tracemalloc records the peak of Python allocations. Setup work (writing
+the file, parsing the project an edit starts from) is outside the timed part.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from . import cache, validate
+from .edit import ProjectEdit
+from .ids import IDAllocator
+from .objects import PBXObject, build_file, file_reference, group
+from .project import PBXProject
+from .writer import Writer
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_TARGETS = 4
+DEFAULT_ADD = 100
+DEFAULT_LOOKUPS = 10000
+
+# Names and product types of the generated targets, in the real project's order
+_TARGETS = (
+    ('SmartLockBox', 'com.apple.product-type.application', 'app', 'wrapper.application'),
+    ('SmartLockBoxTests', 'com.apple.product-type.bundle.unit-test', 'xctest', 'wrapper.cfbundle'),
+    ('SmartLockBoxUITests', 'com.apple.product-type.bundle.ui-testing', 'xctest', 'wrapper.cfbundle'),
+    ('DeviceActivityMonitorExtension', 'com.apple.product-type.app-extension', 'appex',
+     'wrapper.app-extension'),
+)
+_FOLDERS = ('Views', 'ViewModels', 'Models', 'Services', 'Utilities', 'Resources')
+_FILES_PER_GROUP = 25
+_RESOURCE_EVERY = 10
+
+# Per target: target, 3 phases, configuration list, 2 configurations, product
+_PER_TARGET = 8
+# Root object, its configuration list and configurations, main and Products groups
+_FIXED = 6
+
+
+def _settings(name, kind):
+    settings = {
+        'CODE_SIGN_STYLE': 'Automatic',
+        'CURRENT_PROJECT_VERSION': '1',
+        'DEVELOPMENT_TEAM': 'JVUXYR66CL',
+        'GENERATE_INFOPLIST_FILE': 'YES',
+        'IPHONEOS_DEPLOYMENT_TARGET': '18.2',
+        'MARKETING_VERSION': '1.0',
+        'PRODUCT_BUNDLE_IDENTIFIER': f'com.devjihwan.cardnewsapp.{name}',
+        'PRODUCT_NAME': '$(TARGET_NAME)',
+        'SWIFT_EMIT_LOC_STRINGS': 'YES',
+        'SWIFT_VERSION': '5.0',
+        'TARGETED_DEVICE_FAMILY': '1,2',
+    }
+    if kind == 'Debug':
+        settings['SWIFT_ACTIVE_COMPILATION_CONDITIONS'] = 'DEBUG $(inherited)'
+    else:
+        settings['SWIFT_COMPILATION_MODE'] = 'wholemodule'
+    return settings
+
+
+def _configuration_list(ids, owner, comment, build_settings):
+    configurations = [
+        PBXObject(ids.new('XCBuildConfiguration', owner, kind), {
+            'isa': 'XCBuildConfiguration',
+            'buildSettings': build_settings(kind),
+            'name': kind,
+        }, kind)
+        for kind in ('Debug', 'Release')
+    ]
+    config_list = PBXObject(ids.new('XCConfigurationList', owner), {
+        'isa': 'XCConfigurationList',
+        'buildConfigurations': [c.id for c in configurations],
+        'defaultConfigurationIsVisible': '0',
+        'defaultConfigurationName': 'Release',
+    }, f'Build configuration list for {comment}')
+    return config_list, configurations
+
+
+def _phase(object_id, isa, name):
+    return PBXObject(object_id, {
+        'isa': isa,
+        'buildActionMask': '2147483647',
+        'files': [],
+        'runOnlyForDeploymentPostprocessing': '0',
+    }, name)
+
+
+def synthetic_project(object_count, targets=DEFAULT_TARGETS, seed='bench'):
+    """project.pbxproj text with about `object_count` objects over `targets` targets.
+
+    The same arguments always produce the same file. Most objects are file
+    references with one build file each, filed in groups of 25 under
+    <target>/<folder>/GroupNNNN.
+    """
+    if not 1 <= targets <= len(_TARGETS):
+        raise ValueError(f"targets must be between 1 and {len(_TARGETS)}")
+    objects = {}
+    ids = IDAllocator(objects, seed)
+
+    def add(obj):
+        objects[obj.id] = obj
+        return obj
+
+    products = add(PBXObject(ids.new('PBXGroup', 'Products'), {
+        'isa': 'PBXGroup',
+        'children': [],
+        'name': 'Products',
+        'sourceTree': '<group>',
+    }, 'Products'))
+    main_group = add(PBXObject(ids.new('PBXGroup', ''), {
+        'isa': 'PBXGroup',
+        'children': [],
+        'sourceTree': '<group>',
+    }))
+
+    root_id = ids.new('PBXProject')
+    root_list, root_configs = _configuration_list(
+        ids, root_id, 'PBXProject "SmartLockBox"', lambda kind: {
+            'ALWAYS_SEARCH_USER_PATHS': 'NO',
+            'CLANG_ENABLE_MODULES': 'YES',
+            'ENABLE_TESTABILITY': 'YES' if kind == 'Debug' else 'NO',
+            'IPHONEOS_DEPLOYMENT_TARGET': '18.2',
+            'SDKROOT': 'iphoneos',
+        })
+    for obj in (root_list, *root_configs):
+        add(obj)
+
+    budget = max(object_count - _FIXED - _PER_TARGET * targets, 0)
+    # Each file adds a reference and a build file; each group of files adds one group
+    file_count = budget * _FILES_PER_GROUP // (2 * _FILES_PER_GROUP + 1)
+
+    target_ids = []
+    attributes = {}
+    for t in range(targets):
+        name, product_type, extension, product_file_type = _TARGETS[t]
+        target_id = ids.new('PBXNativeTarget', name)
+        phases = [
+            add(_phase(ids.new(isa, name), isa, title))
+            for isa, title in (('PBXSourcesBuildPhase', 'Sources'),
+                               ('PBXFrameworksBuildPhase', 'Frameworks'),
+                               ('PBXResourcesBuildPhase', 'Resources'))
+        ]
+        config_list, configs = _configuration_list(
+            ids, target_id, f'PBXNativeTarget "{name}"', lambda kind, name=name: _settings(name, kind))
+        for obj in (config_list, *configs):
+            add(obj)
+        product = add(PBXObject(ids.new('PBXFileReference', name, 'product'), {
+            'isa': 'PBXFileReference',
+            'explicitFileType': product_file_type,
+            'includeInIndex': '0',
+            'path': f'{name}.{extension}',
+            'sourceTree': 'BUILT_PRODUCTS_DIR',
+        }, f'{name}.{extension}'))
+        products['children'].append(product.id)
+        add(PBXObject(target_id, {
+            'isa': 'PBXNativeTarget',
+            'buildConfigurationList': config_list.id,
+            'buildPhases': [phase.id for phase in phases],
+            'buildRules': [],
+            'dependencies': [],
+            'name': name,
+            'productName': name,
+            'productReference': product.id,
+            'productType': product_type,
+        }, name))
+        target_ids.append(target_id)
+        attributes[target_id] = {'CreatedOnToolsVersion': '16.2'}
+
+        target_group = add(group(ids.new('PBXGroup', name), name))
+        main_group['children'].append(target_group.id)
+        share = file_count // targets + (t < file_count % targets)
+        folders = {}
+        current = None
+        for i in range(share):
+            if i % _FILES_PER_GROUP == 0:
+                folder = _FOLDERS[(i // _FILES_PER_GROUP) % len(_FOLDERS)]
+                if folder not in folders:
+                    folders[folder] = add(group(ids.new('PBXGroup', name, folder), folder))
+                    target_group['children'].append(folders[folder].id)
+                component = f'Group{i // _FILES_PER_GROUP:04d}'
+                current = add(group(ids.new('PBXGroup', name, folder, component), component))
+                folders[folder]['children'].append(current.id)
+            if i % _RESOURCE_EVERY == _RESOURCE_EVERY - 1:
+                filename, phase = f'Asset{i:06d}.json', phases[2]
+            else:
+                filename, phase = f'File{i:06d}.swift', phases[0]
+            ref = add(file_reference(ids.new('PBXFileReference', name, i), filename))
+            current['children'].append(ref.id)
+            build = add(build_file(ids.new('PBXBuildFile', name, i), ref, phase.comment))
+            phase['files'].append(build.id)
+
+    main_group['children'].append(products.id)
+    add(PBXObject(root_id, {
+        'isa': 'PBXProject',
+        'attributes': {
+            'BuildIndependentTargetsInParallel': '1',
+            'LastSwiftUpdateCheck': '1620',
+            'LastUpgradeCheck': '1620',
+            'TargetAttributes': attributes,
+        },
+        'buildConfigurationList': root_list.id,
+        'developmentRegion': 'en',
+        'hasScannedForEncodings': '0',
+        'knownRegions': ['en', 'Base', 'ko'],
+        'mainGroup': main_group.id,
+        'preferredProjectObjectVersion': '77',
+        'productRefGroup': products.id,
+        'projectDirPath': '',
+        'projectRoot': '',
+        'targets': target_ids,
+    }, 'Project object'))
+    return Writer(objects).document({
+        'archiveVersion': '1',
+        'classes': {},
+        'objectVersion': '77',
+        'rootObject': root_id,
+    })
+
+
+def measure(run, setup=None, repeat=3):
+    """{'runs', 'best', 'mean', 'peak_bytes'} for run(setup()).
+
+    Only run() is timed; setup() is called fresh before every run.
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+
+    arg = setup() if setup is not None else None
+    tracemalloc.start()
+    try:
+        run(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'runs': repeat,
+        'best': min(times),
+        'mean': sum(times) / len(times),
+        'peak_bytes': peak,
+    }
+
+
+def _lookups(project, count):
+    """(target names, group paths) cycled through by the lookup stage"""
+    index = project.index
+    names = list(index.targets)
+    paths = [path for path in index.groups if path.count('/') == 2] or list(index.groups)
+    return [(names[i % len(names)], paths[i % len(paths)]) for i in range(count)]
+
+
+def bench_size(object_count, workdir, targets=DEFAULT_TARGETS, add=DEFAULT_ADD,
+               lookups=DEFAULT_LOOKUPS, repeat=3, log=None):
+    """Results of every stage for one synthetic project size"""
+    text = synthetic_project(object_count, targets)
+    project = PBXProject.parse(text)
+    path = Path(workdir) / f'Bench{object_count}.xcodeproj' / 'project.pbxproj'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    info = {'objects': len(project.objects), 'targets': targets, 'bytes': len(text.encode('utf-8'))}
+    queries = _lookups(project, lookups)
+    del project
+
+    def fresh_file():
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        cache.discard(path)
+        return path
+
+    def warm_file():
+        fresh_file()
+        PBXProject.load(path, use_cache=True)
+        return path
+
+    def loaded():
+        return PBXProject.load(fresh_file(), use_cache=False)
+
+    def lookup(project):
+        project.reindex()
+        for name, group_path in queries:
+            target = project.target(name)
+            project.build_phase(target)
+            project.group(group_path)
+
+    def queue_files(project):
+        edit = ProjectEdit(path, seed='bench-add', project=project)
+        names = [name for name, *_ in _TARGETS[:targets]]
+        for i in range(add):
+            name = names[i % len(names)]
+            edit.add_file(f'{name}/Added/Bench{i:05d}.swift', targets=[name])
+        return edit
+
+    def add_files(project):
+        queue_files(project).commit()
+
+    def edited():
+        project = loaded()
+        queue_files(project).apply()
+        return project
+
+    def validate_changes(project):
+        validate.validate_changes(project, project._dirty | project._added, project._removed)
+
+    stages = (
+        ('parse', lambda _: PBXProject.parse(text), None),
+        ('load', lambda p: PBXProject.load(p, use_cache=False), fresh_file),
+        ('load_cold_cache', lambda p: PBXProject.load(p, use_cache=True), fresh_file),
+        ('load_warm_cache', lambda p: PBXProject.load(p, use_cache=True), warm_file),
+        ('lookup', lookup, loaded),
+        ('add_files', add_files, loaded),
+        ('validate', validate.validate, loaded),
+        ('validate_changes', validate_changes, edited),
+        ('serialize', lambda p: p.serialize(), loaded),
+    )
+    results = []
+    for stage, run, setup in stages:
+        result = {**info, 'stage': stage, **measure(run, setup, repeat)}
+        if stage == 'lookup':
+            result['operations'] = lookups
+        elif stage in ('add_files', 'validate_changes'):
+            result['operations'] = add
+        results.append(result)
+        if log is not None:
+            log(result)
+    return results
+
+
+def environment():
+    """Interpreter, platform and revision the numbers were taken on"""
+    info = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                  text=True, timeout=10)
+        if revision.returncode == 0:
+            info['revision'] = revision.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return info
+
+
+def run(sizes=DEFAULT_SIZES, targets=DEFAULT_TARGETS, add=DEFAULT_ADD, lookups=DEFAULT_LOOKUPS,
+        repeat=3, log=None):
+    """Benchmark every size in a scratch directory; returns the results document"""
+    workdir = tempfile.mkdtemp(prefix='pbxtools-bench-')
+    try:
+        results = []
+        for size in sizes:
+            results.extend(bench_size(size, workdir, targets, add, lookups, repeat, log))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'benchmark': 'pbxtools',
+        'environment': environment(),
+        'config': {'sizes': list(sizes), 'targets': targets, 'add': add, 'lookups': lookups,
+                   'repeat': repeat},
+        'results': results,
+    }
+
+
+def compare(results, baseline):
+    """(size, stage, baseline best, current best) for stages present in both documents"""
+    previous = {(r['objects'], r['stage']): r for r in baseline.get('results', [])}
+    rows = []
+    for result in results['results']:
+        before = previous.get((result['objects'], result['stage']))
+        if before is not None:
+            rows.append((result['objects'], result['stage'], before['best'], result['best']))
+    return rows
+
+
+def save(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def format_result(result):
+    line = (f"{result['objects']:>7} objects  {result['stage']:<16} "
+            f"{result['best'] * 1000:>10.1f} ms  peak {result['peak_bytes'] / 1e6:>8.1f} MB")
+    if 'operations' in result:
+        line += f"  ({result['best'] / result['operations'] * 1e6:.1f} µs/op)"
+    return line
@@ -0,0 +1,88 @@
+"""
+On-disk cache of parsed projects, keyed by the pbxproj's stat and content hash
+
+The cache sits inside the .xcodeproj, so it arrives with whatever checkout
+the project came from; it is plain JSON, never anything that runs code
+when loaded. The first line holds the key, the second the parsed form, so
+a stale entry is rejected without decoding the rest.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from . import trace
+
+CACHE_VERSION = 2
+
+# Set PBXTOOLS_CACHE=0 to always parse from scratch
+ENV_VAR = 'PBXTOOLS_CACHE'
+
+
+def enabled():
+    return os.environ.get(ENV_VAR, '1') not in ('0', 'false', 'no', '')
+
+
+def cache_file(path):
+    """<name>.xcodeproj/.pbxtools/project.pbxproj.json"""
+    path = Path(path)
+    return path.parent / '.pbxtools' / f'{path.name}.json'
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def _stat_key(st):
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def load(path, data, st):
+    """Cached (header, entries, sections) for the file's current bytes, or None.
+
+    A matching size/mtime/inode skips hashing; otherwise the content hash
+    decides, so a file that was merely touched still hits the cache.
+    """
+    with trace.span('cache.load'):
+        try:
+            with open(cache_file(path), 'r', encoding='utf-8') as f:
+                meta = json.loads(f.readline())
+                if meta.get('version') != CACHE_VERSION or meta.get('size') != st.st_size:
+                    return None
+                if meta.get('stat') != _stat_key(st) and meta.get('digest') != digest(data):
+                    return None
+                header, entries, sections = json.loads(f.readline())
+                return header, entries, sections
+        except (OSError, AttributeError, TypeError, ValueError):
+            return None
+
+
+def store(path, data, st, header, entries, sections):
+    """Write the parsed form next to the project, replacing any older entry"""
+    with trace.span('cache.store', objects=len(entries)):
+        target = cache_file(path)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                meta = {
+                    'version': CACHE_VERSION,
+                    'size': st.st_size,
+                    'stat': _stat_key(st),
+                    'digest': digest(data),
+                }
+                f.write(json.dumps(meta))
+                f.write('\n')
+                f.write(json.dumps((header, entries, sections), ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+            os.replace(tmp, target)
+        except OSError:
+            pass
+
+
+def discard(path):
+    try:
+        os.remove(cache_file(path))
+    except OSError:
+        pass
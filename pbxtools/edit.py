@@ -0,0 +1,310 @@
+"""
+Transactional editing: queue many changes, parse once, write once
+"""
+
+from pathlib import PurePosixPath
+
+from . import trace
+from .ids import IDAllocator
+from .index import PHASE_ISAS
+from .objects import build_file, file_reference, file_type
+from .project import PBXProject
+from .synced import SynchronizedFolders
+
+SOURCES = 'PBXSourcesBuildPhase'
+RESOURCES = 'PBXResourcesBuildPhase'
+HEADERS = 'PBXHeadersBuildPhase'
+
+# Targets whose headers are published through a Headers phase
+_FRAMEWORK_TYPES = frozenset(('com.apple.product-type.framework', 'com.apple.product-type.framework.static'))
+
+# Stands in for the file reference of a file Xcode synchronizes by itself
+_SYNCHRONIZED = object()
+
+# Files that belong to a target through build settings, not build phases
+_SETTINGS_ONLY = frozenset(('Info.plist',))
+_SETTINGS_ONLY_SUFFIXES = frozenset(('.entitlements', '.xcconfig'))
+
+
+def phase_for(path, product_type=None):
+    """Build phase isa a file is compiled or copied by in a target of `product_type`, or None.
+
+    Headers are never compiled on their own; only frameworks take them, in
+    their Headers phase.
+    """
+    path = PurePosixPath(path)
+    if path.name in _SETTINGS_ONLY or path.suffix in _SETTINGS_ONLY_SUFFIXES:
+        return None
+    kind = file_type(path.name)
+    if kind.endswith('.h'):
+        return HEADERS if product_type in _FRAMEWORK_TYPES else None
+    if kind.startswith('sourcecode') or path.suffix == '.xcdatamodeld':
+        return SOURCES
+    return RESOURCES
+
+
+class ProjectEdit:
+    """A batch of project changes applied with a single parse and write.
+
+    Operations are only recorded until commit(), so thousands of additions
+    across several targets cost one read and one serialize:
+
+        with ProjectEdit.open("SmartLockBox.xcodeproj/project.pbxproj") as edit:
+            edit.add_file("SmartLockBox/Views/Foo.swift", targets=["SmartLockBox"])
+
+    Files below a folder Xcode synchronizes by itself get no file reference
+    or build file: adding one is a no-op, or an edit of the folder's
+    membership exceptions when a target would not otherwise build it.
+
+    With a `seed`, new object IDs are derived from the seed, the file path
+    and the target, so the same edit always produces the same file. Passing
+    an already loaded `project` skips the parse on commit.
+    """
+
+    def __init__(self, path, seed=None, project=None):
+        self.path = path
+        self.seed = seed
+        self.project = project
+        self._ops = []
+
+    @classmethod
+    def open(cls, path, seed=None, project=None):
+        return cls(path, seed, project)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+    def __len__(self):
+        return len(self._ops)
+
+    # Queued operations
+
+    def add_group(self, path):
+        """Ensure a group chain exists for a folder path relative to the project"""
+        self._ops.append(('group', str(PurePosixPath(path)), None))
+        return self
+
+    def add_file(self, path, targets=(), group=None):
+        """Add a file reference and, for each target, a build file in the phase phase_for() picks.
+
+        `group` defaults to the file's folder; intermediate groups are created.
+        A file listed under a group other than its folder's is referenced
+        relative to the project (SOURCE_ROOT) so it still resolves to `path`.
+        The file reference is shared, so adding to several targets costs one
+        reference plus one build file per target.
+        """
+        path = PurePosixPath(path)
+        folder = str(PurePosixPath(group)) if group is not None else str(path.parent)
+        self._ops.append(('file', str(path), folder))
+        for target in targets:
+            # The phase depends on the target's product type; see _EditState.check
+            self._ops.append(('phase', str(path), (target, None)))
+        return self
+
+    def add_files(self, paths, targets=(), group=None):
+        """add_file() for each path, all sharing the same target set"""
+        targets = tuple(targets)
+        for path in paths:
+            self.add_file(path, targets, group)
+        return self
+
+    def add_to_phase(self, path, target, phase=SOURCES):
+        """Place an existing or queued file in a target's build phase"""
+        self._ops.append(('phase', str(PurePosixPath(path)), (target, phase)))
+        return self
+
+    def remove_file(self, path):
+        """Remove a file reference, its build files and its entry in the parent group"""
+        self._ops.append(('remove', str(PurePosixPath(path)), None))
+        return self
+
+    # Commit
+
+    def commit(self):
+        """Apply every queued operation to one parsed project and write it once"""
+        with trace.span('commit', operations=len(self._ops)) as span:
+            summary = self.apply()
+            self.project.save()
+            span.set(**summary)
+        return summary
+
+    def apply(self):
+        """Apply the queued operations to the project without saving it"""
+        if self.project is None:
+            self.project = PBXProject.load(self.path)
+        project = self.project
+        if self.seed is not None:
+            project.ids = IDAllocator(project.objects, self.seed)
+        state = _EditState(project)
+        ops = state.check(self._ops)
+        with trace.span('apply'):
+            for kind, path, arg in ops:
+                if kind == 'group':
+                    state.group_at(path)
+                elif kind == 'file':
+                    state.file_at(path, arg)
+                elif kind == 'remove':
+                    state.remove_file(path)
+                else:
+                    state.add_to_phase(path, *arg)
+        self._ops.clear()
+        return state.summary
+
+
+class _EditState:
+    """Per-commit caches on top of the project's target/group index"""
+
+    def __init__(self, project):
+        self.project = project
+        self.files = {}
+        self.targets = {}
+        self.phases = {}
+        self.phase_members = {}
+        self.build_files_of = None
+        self.synced = SynchronizedFolders(project)
+        self.summary = {'groups': 0, 'files': 0, 'build_files': 0, 'removed': 0,
+                        'synchronized': 0, 'exceptions': 0}
+
+    def group_at(self, path):
+        path = '' if path in ('', '.') else str(PurePosixPath(path))
+        if self._synchronized_folder(path):
+            return None
+        found, created = self.project.ensure_group(path)
+        self.summary['groups'] += created
+        return found
+
+    def file_at(self, path, folder=None):
+        cached = self.files.get(path)
+        if cached is not None:
+            return cached
+        posix = PurePosixPath(path)
+        folder = folder if folder is not None else str(posix.parent)
+        if self.synced.locate(path) is not None:
+            self.files[path] = _SYNCHRONIZED
+            self.summary['synchronized'] += 1
+            return _SYNCHRONIZED
+        index = self.project.index
+        existing = index.file(path)
+        if existing is not None:
+            self.files[path] = existing
+            return existing
+        parent = self.group_at(folder)
+        ref_id = self.project.ids.new('PBXFileReference', path)
+        if PurePosixPath(folder) == posix.parent:
+            ref = self.project.add(file_reference(ref_id, posix.name))
+        else:
+            ref = self.project.add(file_reference(ref_id, path, source_tree='SOURCE_ROOT'))
+        parent['children'].append(ref.id)
+        self.project.touch(parent)
+        index.register_file(path, ref, parent)
+        self.files[path] = ref
+        self.summary['files'] += 1
+        return ref
+
+    def check(self, ops):
+        """Look up every target, phase and group the ops need, failing before anything has been changed.
+
+        Returns the ops with each add_file() placement resolved to the phase
+        its target takes the file in; placements with no phase are dropped.
+        Files below a synchronized folder need their target but no phase.
+        """
+        targets = {arg[0] for kind, _, arg in ops if kind == 'phase'}
+        missing = sorted(name for name in targets if self.target(name, required=False) is None)
+        if missing:
+            raise KeyError(f"No target named {', '.join(missing)}")
+        resolved = []
+        for kind, path, arg in ops:
+            if kind == 'phase':
+                target, isa = arg
+                if isa is None:
+                    isa = phase_for(path, self.target(target).get('productType'))
+                    if isa is None:
+                        continue
+                if self.synced.locate(path) is None:
+                    self.phase(target, isa)
+                arg = (target, isa)
+            elif kind == 'file' and self.synced.locate(path) is None and self._synchronized_folder(arg):
+                raise ValueError(f"Cannot list {path} under {arg}: Xcode synchronizes that folder by itself")
+            resolved.append((kind, path, arg))
+        return resolved
+
+    def _synchronized_folder(self, folder):
+        folder = str(PurePosixPath(folder))
+        return folder in self.synced.roots or self.synced.locate(folder) is not None
+
+    def target(self, name, required=True):
+        found = self.targets.get(name)
+        if found is None:
+            found = self.targets[name] = self.project.target(name)
+            if found is None and required:
+                raise KeyError(f"No target named {name}")
+        return found
+
+    def phase(self, target_name, isa):
+        key = (target_name, isa)
+        if key not in self.phases:
+            target = self.target(target_name)
+            phase = self.project.build_phase(target, isa)
+            if phase is None:
+                raise KeyError(f"Target {target_name} has no {isa}")
+            self.phases[key] = phase
+            self.phase_members[phase.id] = {
+                self.project[b].get('fileRef') for b in phase['files'] if b in self.project
+            }
+        return self.phases[key]
+
+    def add_to_phase(self, path, target_name, isa):
+        ref = self.file_at(path)
+        if ref is _SYNCHRONIZED:
+            if self.synced.set_member(path, self.target(target_name)):
+                self.summary['exceptions'] += 1
+            return
+        phase = self.phase(target_name, isa)
+        members = self.phase_members[phase.id]
+        if ref.id in members:
+            return
+        build_id = self.project.ids.new('PBXBuildFile', path, target_name, isa)
+        build = self.project.add(build_file(build_id, ref, phase.comment))
+        phase['files'].append(build.id)
+        self.project.touch(phase)
+        members.add(ref.id)
+        self.summary['build_files'] += 1
+
+    def remove_file(self, path):
+        if self.synced.locate(path) is not None:
+            self.summary['exceptions'] += self.synced.forget(path)
+            self.files.pop(path, None)
+            return
+        index = self.project.index
+        ref = index.file(path)
+        if ref is None:
+            return
+        parent = index.parents.get(ref.id)
+
+        if self.build_files_of is None:
+            self.build_files_of = {}
+            for build in self.project.objects_of('PBXBuildFile'):
+                self.build_files_of.setdefault(build.get('fileRef'), []).append(build.id)
+        doomed = set(self.build_files_of.pop(ref.id, ()))
+        if doomed:
+            for isa in PHASE_ISAS:
+                for phase in self.project.objects_of(isa):
+                    if not doomed.isdisjoint(phase.get('files', ())):
+                        phase['files'] = [b for b in phase['files'] if b not in doomed]
+                        self.project.touch(phase)
+                        self.phase_members.get(phase.id, set()).discard(ref.id)
+            for build_id in doomed:
+                self.project.remove(build_id)
+
+        if parent is not None:
+            parent['children'].remove(ref.id)
+            self.project.touch(parent)
+        index.forget_file(path, ref)
+        self.files.pop(path, None)
+        self.project.remove(ref.id)
+        self.summary['removed'] += 1
@@ -0,0 +1,364 @@
+"""
+App extension targets from a declarative spec
+
+An ExtensionSpec names an extension, its kind and the app that hosts it.
+KINDS says what each kind needs: product type, how the host embeds it,
+template source files, SDK frameworks and extra build settings.
+
+expand() turns a spec into every object the extension needs, in memory:
+file references and their group, build files, the Sources, Frameworks and
+Resources phases, Debug and Release configurations and their list, the
+product, the native target, and the container proxy and target dependency
+through which the host builds it. It also records the appends to existing
+objects (host phases and dependencies, project targets, main and Products
+groups). apply() inserts all of it, so an extension costs one call and one
+save():
+
+    add_extension(project, ExtensionSpec('SmartLockBoxWidget', 'widget'))
+    project.save()
+"""
+
+from .objects import PBXObject, build_file, build_phase, file_reference, group
+
+APP_EXTENSION = 'com.apple.product-type.app-extension'
+EXTENSIONKIT_EXTENSION = 'com.apple.product-type.extensionkit-extension'
+
+# Copy-files phase on the host for each product type: name, dstPath, dstSubfolderSpec
+EMBED_PHASES = {
+    APP_EXTENSION: ('Embed Foundation Extensions', '', '13'),
+    EXTENSIONKIT_EXTENSION: ('Embed ExtensionKit Extensions', '$(EXTENSIONS_FOLDER_PATH)', '16'),
+}
+PRODUCT_FILE_TYPES = {
+    APP_EXTENSION: 'wrapper.app-extension',
+    EXTENSIONKIT_EXTENSION: 'wrapper.extensionkit-extension',
+}
+
+# Settings taken from the host's configuration of the same name when it has them
+INHERITED_SETTINGS = {
+    'CURRENT_PROJECT_VERSION': '1',
+    'IPHONEOS_DEPLOYMENT_TARGET': None,
+    'MARKETING_VERSION': '1.0',
+    'SWIFT_VERSION': '5.0',
+    'TARGETED_DEVICE_FAMILY': '1,2',
+}
+CONFIGURATIONS = ('Debug', 'Release')
+
+
+class ExtensionKind:
+    """What every extension of one kind is made of; `{name}` in file names is the target name"""
+
+    def __init__(self, product_type, sources, resources=(), frameworks=(), settings=None):
+        self.product_type = product_type
+        self.sources = tuple(sources)
+        self.resources = tuple(resources)
+        self.frameworks = tuple(frameworks)
+        self.settings = settings or {}
+
+
+KINDS = {
+    'device-activity-monitor': ExtensionKind(APP_EXTENSION, ['DeviceActivityMonitorExtension.swift']),
+    'device-activity-report': ExtensionKind(
+        EXTENSIONKIT_EXTENSION, ['{name}.swift', 'TotalActivityReport.swift', 'TotalActivityView.swift']),
+    'shield-configuration': ExtensionKind(APP_EXTENSION, ['ShieldConfigurationExtension.swift']),
+    'shield-action': ExtensionKind(APP_EXTENSION, ['ShieldActionExtension.swift']),
+    'widget': ExtensionKind(
+        APP_EXTENSION, ['{name}Bundle.swift', '{name}.swift'], resources=['Assets.xcassets'],
+        frameworks=['WidgetKit', 'SwiftUI'], settings={
+            'ASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME': 'AccentColor',
+            'ASSETCATALOG_COMPILER_WIDGET_BACKGROUND_COLOR_NAME': 'WidgetBackground',
+        }),
+}
+
+
+class ExtensionSpec:
+    """One extension target to add.
+
+    `sources` and `resources` replace the kind's template files; `folder`
+    (default: the name) is the group below the main group holding them,
+    with Info.plist and, if `entitlements`, <name>.entitlements. The bundle
+    ID defaults to the host's plus the name; `settings` are applied last.
+    """
+
+    def __init__(self, name, kind, host='SmartLockBox', sources=None, resources=None, frameworks=None,
+                 folder=None, entitlements=True, bundle_id=None, settings=None):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown extension kind {kind!r}; expected one of {', '.join(sorted(KINDS))}")
+        template = KINDS[kind]
+        self.name = name
+        self.kind = kind
+        self.host = host
+        self.product_type = template.product_type
+        self.sources = [s.format(name=name) for s in (template.sources if sources is None else sources)]
+        self.resources = [r.format(name=name) for r in (template.resources if resources is None else resources)]
+        self.frameworks = list(template.frameworks if frameworks is None else frameworks)
+        self.folder = folder or name
+        self.entitlements = entitlements
+        self.bundle_id = bundle_id
+        self.settings = {**template.settings, **(settings or {})}
+
+    @property
+    def product_name(self):
+        return f'{self.name}.appex'
+
+
+class Expansion:
+    """Everything expand() built for one extension, not yet in the project"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.objects = []
+        self.appends = []
+        self.target = None
+        self.product = None
+        self.files = []
+
+    def new(self, obj):
+        self.objects.append(obj)
+        return obj
+
+    def append(self, obj, key, *object_ids):
+        self.appends.append((obj, key, object_ids))
+
+    def apply(self, project):
+        """Insert the new objects and extend the existing ones; returns the new target"""
+        for obj in self.objects:
+            project.add(obj)
+        for obj, key, object_ids in self.appends:
+            obj.fields.setdefault(key, []).extend(object_ids)
+            project.touch(obj)
+        project.reindex()
+        return self.target
+
+
+def host_settings(project, host, name):
+    """Build settings of the host's `name` configuration over the project-level ones"""
+    settings = {}
+    for owner in (project.root, host):
+        config_list = project.get(owner.get('buildConfigurationList'))
+        for config_id in config_list.get('buildConfigurations', ()) if config_list is not None else ():
+            config = project.get(config_id)
+            if config is not None and config.get('name') == name:
+                settings.update(config.get('buildSettings', {}))
+    return settings
+
+
+def build_settings(spec, inherited):
+    """Settings for one configuration of the extension"""
+    settings = {
+        'CODE_SIGN_STYLE': 'Automatic',
+        'GENERATE_INFOPLIST_FILE': 'NO',
+        'INFOPLIST_FILE': f'{spec.folder}/Info.plist',
+        'INFOPLIST_KEY_CFBundleDisplayName': spec.name,
+        'INFOPLIST_KEY_NSHumanReadableCopyright': '',
+        'LD_RUNPATH_SEARCH_PATHS': [
+            '$(inherited)',
+            '@executable_path/Frameworks',
+            '@executable_path/../../Frameworks',
+        ],
+        'PRODUCT_BUNDLE_IDENTIFIER': spec.bundle_id or f"{inherited.get('PRODUCT_BUNDLE_IDENTIFIER')}.{spec.name}",
+        'PRODUCT_NAME': '$(TARGET_NAME)',
+        'SKIP_INSTALL': 'YES',
+        'SWIFT_EMIT_LOC_STRINGS': 'YES',
+    }
+    for key, default in INHERITED_SETTINGS.items():
+        value = inherited.get(key, default)
+        if value is not None:
+            settings[key] = value
+    if inherited.get('DEVELOPMENT_TEAM'):
+        settings['DEVELOPMENT_TEAM'] = inherited['DEVELOPMENT_TEAM']
+    if spec.entitlements:
+        settings['CODE_SIGN_ENTITLEMENTS'] = f'{spec.folder}/{spec.name}.entitlements'
+    settings.update(spec.settings)
+    return settings
+
+
+def _embed_phase(project, host, product_type):
+    """The host's existing copy-files phase for this product type, or None"""
+    _, dst_path, subfolder = EMBED_PHASES[product_type]
+    for phase_id in host.get('buildPhases', ()):
+        phase = project.get(phase_id)
+        if (phase is not None and phase.isa == 'PBXCopyFilesBuildPhase'
+                and phase.get('dstSubfolderSpec') == subfolder and phase.get('dstPath', '') == dst_path):
+            return phase
+    return None
+
+
+def _frameworks_group(project):
+    """The main group's (usually name-only) Frameworks group, or None"""
+    for child_id in project.main_group.get('children', ()):
+        child = project.get(child_id)
+        if child is not None and child.isa == 'PBXGroup' and 'Frameworks' in (child.get('name'), child.get('path')):
+            return child
+    return None
+
+
+def _framework(project, expansion, name):
+    """SDK framework reference, reusing one the project already has"""
+    path = f'System/Library/Frameworks/{name}.framework'
+    for ref in project.objects_of('PBXFileReference'):
+        if ref.get('path') == path and ref.get('sourceTree') == 'SDKROOT':
+            return ref
+    for ref in expansion.objects:
+        if ref.get('path') == path:
+            return ref
+    return expansion.new(PBXObject(project.ids.new('PBXFileReference', path), {
+        'isa': 'PBXFileReference',
+        'lastKnownFileType': 'wrapper.framework',
+        'name': f'{name}.framework',
+        'path': path,
+        'sourceTree': 'SDKROOT',
+    }, f'{name}.framework'))
+
+
+def expand(project, spec):
+    """Build every object for `spec` without changing the project.
+
+    A group and file references already present for the extension's folder
+    (after `sync`, say) are reused rather than duplicated. Raises KeyError
+    for a missing host and ValueError if a target with the extension's name
+    already exists or its folder is one Xcode synchronizes by itself.
+    """
+    host = project.target(spec.host)
+    if host is None:
+        raise KeyError(f"No target named {spec.host}")
+    if project.target(spec.name) is not None:
+        raise ValueError(f"Target {spec.name} already exists")
+    if spec.folder in project.index.synchronized:
+        raise ValueError(f"{spec.folder}/ is a synchronized folder; add {spec.name} to it in Xcode instead")
+
+    ids = project.ids
+    name = spec.name
+    expansion = Expansion(spec)
+
+    # Files, their group and build files
+    new_refs = []
+
+    def ref(filename):
+        obj = project.index.file(f'{spec.folder}/{filename}')
+        if obj is None:
+            obj = expansion.new(file_reference(ids.new('PBXFileReference', spec.folder, filename), filename))
+            new_refs.append(obj)
+        expansion.files.append(obj)
+        return obj
+
+    sources = [ref(filename) for filename in spec.sources]
+    resources = [ref(filename) for filename in spec.resources]
+    ref('Info.plist')
+    if spec.entitlements:
+        ref(f'{name}.entitlements')
+    folder = project.group(spec.folder)
+    if folder is None:
+        folder = expansion.new(group(ids.new('PBXGroup', spec.folder), spec.folder, new_refs))
+        expansion.append(project.main_group, 'children', folder.id)
+    elif new_refs:
+        expansion.append(folder, 'children', *(r.id for r in new_refs))
+
+    def builds(refs, phase_name):
+        return [expansion.new(build_file(ids.new('PBXBuildFile', name, phase_name, r.get('path') or r.get('name')),
+                                 r, phase_name)) for r in refs]
+
+    frameworks = [_framework(project, expansion, framework) for framework in spec.frameworks]
+    new_frameworks = [r for r in frameworks if r in expansion.objects]
+    if new_frameworks:
+        frameworks_group = _frameworks_group(project)
+        if frameworks_group is None:
+            frameworks_group = expansion.new(PBXObject(ids.new('PBXGroup', 'Frameworks'), {
+                'isa': 'PBXGroup',
+                'children': [],
+                'name': 'Frameworks',
+                'sourceTree': '<group>',
+            }, 'Frameworks'))
+            expansion.append(project.main_group, 'children', frameworks_group.id)
+        expansion.append(frameworks_group, 'children', *(r.id for r in new_frameworks))
+
+    # Phases
+    phases = [
+        expansion.new(build_phase(ids.new('PBXSourcesBuildPhase', name), 'PBXSourcesBuildPhase', 'Sources',
+                          builds(sources, 'Sources'))),
+        expansion.new(build_phase(ids.new('PBXFrameworksBuildPhase', name), 'PBXFrameworksBuildPhase', 'Frameworks',
+                          builds(frameworks, 'Frameworks'))),
+        expansion.new(build_phase(ids.new('PBXResourcesBuildPhase', name), 'PBXResourcesBuildPhase', 'Resources',
+                          builds(resources, 'Resources'))),
+    ]
+
+    # Configurations
+    configs = [
+        expansion.new(PBXObject(ids.new('XCBuildConfiguration', name, config_name), {
+            'isa': 'XCBuildConfiguration',
+            'buildSettings': build_settings(spec, host_settings(project, host, config_name)),
+            'name': config_name,
+        }, config_name))
+        for config_name in CONFIGURATIONS
+    ]
+    config_list = expansion.new(PBXObject(ids.new('XCConfigurationList', name), {
+        'isa': 'XCConfigurationList',
+        'buildConfigurations': [config.id for config in configs],
+        'defaultConfigurationIsVisible': '0',
+        'defaultConfigurationName': 'Release',
+    }, f'Build configuration list for PBXNativeTarget "{name}"'))
+
+    # Product and target
+    expansion.product = expansion.new(PBXObject(ids.new('PBXFileReference', spec.product_name), {
+        'isa': 'PBXFileReference',
+        'explicitFileType': PRODUCT_FILE_TYPES[spec.product_type],
+        'includeInIndex': '0',
+        'path': spec.product_name,
+        'sourceTree': 'BUILT_PRODUCTS_DIR',
+    }, spec.product_name))
+    products = project.get(project.root.get('productRefGroup'))
+    if products is not None:
+        expansion.append(products, 'children', expansion.product.id)
+    expansion.target = expansion.new(PBXObject(ids.new('PBXNativeTarget', name), {
+        'isa': 'PBXNativeTarget',
+        'buildConfigurationList': config_list.id,
+        'buildPhases': [phase.id for phase in phases],
+        'buildRules': [],
+        'dependencies': [],
+        'name': name,
+        'productName': name,
+        'productReference': expansion.product.id,
+        'productType': spec.product_type,
+    }, name))
+    expansion.append(project.root, 'targets', expansion.target.id)
+
+    # Host: depend on the extension and embed its product
+    proxy = expansion.new(PBXObject(ids.new('PBXContainerItemProxy', spec.host, name), {
+        'isa': 'PBXContainerItemProxy',
+        'containerPortal': project.root.id,
+        'proxyType': '1',
+        'remoteGlobalIDString': expansion.target.id,
+        'remoteInfo': name,
+    }, 'PBXContainerItemProxy'))
+    dependency = expansion.new(PBXObject(ids.new('PBXTargetDependency', spec.host, name), {
+        'isa': 'PBXTargetDependency',
+        'target': expansion.target.id,
+        'targetProxy': proxy.id,
+    }, 'PBXTargetDependency'))
+    expansion.append(host, 'dependencies', dependency.id)
+
+    phase_name, dst_path, subfolder = EMBED_PHASES[spec.product_type]
+    embed = build_file(ids.new('PBXBuildFile', spec.host, phase_name, spec.product_name), expansion.product, phase_name)
+    embed['settings'] = {'ATTRIBUTES': ['RemoveHeadersOnCopy']}
+    expansion.new(embed)
+    embed_phase = _embed_phase(project, host, spec.product_type)
+    if embed_phase is None:
+        embed_phase = expansion.new(build_phase(ids.new('PBXCopyFilesBuildPhase', spec.host, phase_name),
+                                        'PBXCopyFilesBuildPhase', phase_name, [embed]))
+        embed_phase['dstPath'] = dst_path
+        embed_phase['dstSubfolderSpec'] = subfolder
+        embed_phase['name'] = phase_name
+        expansion.append(host, 'buildPhases', embed_phase.id)
+    else:
+        expansion.append(embed_phase, 'files', embed.id)
+    return expansion
+
+
+def add_extension(project, spec):
+    """Expand `spec` and insert it into a loaded project; returns the Expansion.
+
+    Nothing is written: call project.save() once afterwards.
+    """
+    expansion = expand(project, spec)
+    expansion.apply(project)
+    return expansion
+
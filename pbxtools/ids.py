@@ -0,0 +1,74 @@
+"""
+Collision-checked allocation of 24-hex-digit Xcode object IDs
+"""
+
+import hashlib
+import os
+
+ID_LENGTH = 24
+_ID_BYTES = ID_LENGTH // 2
+_RANDOM_BATCH = 512
+
+
+class IDAllocator:
+    """Hands out object IDs that never collide with the project or each other.
+
+    `taken` is any container supporting `in` -- normally the project's
+    objects dictionary, which already acts as the hash index of every ID in
+    the file. Issued IDs are remembered until they are added to it.
+
+    Without a seed, IDs come from os.urandom, fetched in batches rather than
+    once per call. With a seed, new(*key) is a pure function of the seed and
+    the key (e.g. object kind, path and target), so regenerating the same
+    edit produces the same IDs and the same file.
+    """
+
+    def __init__(self, taken=(), seed=None):
+        self.taken = taken
+        self.seed = seed
+        self.issued = set()
+        self._pool = []
+        self._counter = 0
+
+    def _free(self, object_id):
+        return object_id not in self.taken and object_id not in self.issued
+
+    def _random(self):
+        if not self._pool:
+            raw = os.urandom(_ID_BYTES * _RANDOM_BATCH).hex().upper()
+            self._pool = [raw[i:i + ID_LENGTH] for i in range(0, len(raw), ID_LENGTH)]
+        return self._pool.pop()
+
+    def _hashed(self, key, attempt):
+        digest = hashlib.blake2b(digest_size=_ID_BYTES, person=b'pbxtools')
+        digest.update(str(self.seed).encode('utf-8'))
+        for part in key:
+            digest.update(b'\0')
+            digest.update(str(part).encode('utf-8'))
+        if attempt:
+            digest.update(b'\1' + str(attempt).encode('ascii'))
+        return digest.hexdigest().upper()
+
+    def new(self, *key):
+        """Allocate one ID; `key` identifies the object in seeded mode"""
+        if self.seed is None:
+            object_id = self._random()
+            while not self._free(object_id):
+                object_id = self._random()
+        else:
+            if not key:
+                self._counter += 1
+                key = ('#', self._counter)
+            attempt = 0
+            object_id = self._hashed(key, attempt)
+            while not self._free(object_id):
+                attempt += 1
+                object_id = self._hashed(key, attempt)
+        self.issued.add(object_id)
+        return object_id
+
+    def bulk(self, count, *key):
+        """Allocate `count` IDs at once; seeded IDs are keyed by key + index"""
+        if self.seed is None:
+            return [self.new() for _ in range(count)]
+        return [self.new(*key, i) for i in range(count)]
@@ -0,0 +1,188 @@
+"""
+Precomputed lookup tables for targets, build phases and groups
+"""
+
+import posixpath
+
+TARGET_ISAS = frozenset(('PBXNativeTarget', 'PBXAggregateTarget', 'PBXLegacyTarget'))
+GROUP_ISAS = frozenset(('PBXGroup', 'PBXVariantGroup'))
+SYNCHRONIZED_GROUP_ISA = 'PBXFileSystemSynchronizedRootGroup'
+PHASE_ISAS = frozenset((
+    'PBXSourcesBuildPhase',
+    'PBXFrameworksBuildPhase',
+    'PBXResourcesBuildPhase',
+    'PBXCopyFilesBuildPhase',
+    'PBXHeadersBuildPhase',
+    'PBXShellScriptBuildPhase',
+))
+
+# Adding or removing these invalidates the index
+STRUCTURAL_ISAS = TARGET_ISAS | GROUP_ISAS | PHASE_ISAS | frozenset(('PBXProject', SYNCHRONIZED_GROUP_ISA))
+
+
+def group_component(group):
+    """The folder a group adds to its parent's; name-only (virtual) groups add none"""
+    return group.get('path') or ''
+
+
+def file_component(ref):
+    """The path a file reference adds to its group's folder"""
+    return ref.get('path') or ref.get('name') or ''
+
+
+def join(parent_path, component):
+    if not component:
+        return parent_path
+    return f'{parent_path}/{component}' if parent_path else component
+
+
+def resolve(parent_path, obj, component):
+    """Project-relative path of a group or file inside a group whose folder is parent_path.
+
+    None when it lives outside the source tree (SDKROOT, BUILT_PRODUCTS_DIR,
+    an absolute path) or inside a group that does.
+    """
+    tree = obj.get('sourceTree', '<group>')
+    if tree == '<group>':
+        path = None if parent_path is None else join(parent_path, component)
+    elif tree == 'SOURCE_ROOT':
+        path = component
+    else:
+        return None
+    if path and ('..' in path or path.startswith('./') or '/./' in path):
+        path = posixpath.normpath(path)
+        if path == '.':
+            path = ''
+        elif path.startswith('../'):
+            return None
+    return path
+
+
+class ProjectIndex:
+    """Target name -> target, target -> phases by isa, folder -> group, path -> file.
+
+    Groups and files are keyed by the folder they resolve to, relative to
+    the project: only a group's `path` contributes, name-only groups share
+    their parent's folder, and `sourceTree` is honored. Groups and files
+    outside the source tree are not keyed at all. Where several groups
+    resolve to one folder, the first one found is the one looked up;
+    several file references resolving to one path are also listed in
+    `duplicate_files`.
+
+    Synchronized root groups are not groups the scripts can add children
+    to; they are kept apart in `synchronized`, keyed by folder path.
+
+    Built in one pass over the targets and the group tree, after which every
+    lookup the scripts need is a dictionary hit; the file table is filled in
+    on first use, since only edits and sync look files up.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.targets = {}
+        self.phases = {}
+        self.groups = {}
+        self.group_paths = {}
+        self.parents = {}
+        self.synchronized = {}
+        self.duplicate_files = {}
+        self._files = None
+
+        objects = project.objects
+        for target_id in project.root.get('targets', []):
+            target = objects.get(target_id)
+            if target is None:
+                continue
+            self.targets.setdefault(target.get('name'), target)
+            by_isa = self.phases[target.id] = {}
+            for phase_id in target.get('buildPhases', []):
+                phase = objects.get(phase_id)
+                if phase is not None:
+                    by_isa.setdefault(phase.isa, phase)
+
+        main_group = project.main_group
+        self.groups[''] = main_group
+        self.group_paths[main_group.id] = ''
+        pending = [main_group]
+        while pending:
+            group = pending.pop()
+            group_path = self.group_paths[group.id]
+            for child_id in group.get('children', []):
+                child = objects.get(child_id)
+                if child is None:
+                    continue
+                self.parents[child_id] = group
+                if child.isa in GROUP_ISAS and child_id not in self.group_paths:
+                    self.register_group(resolve(group_path, child, group_component(child)), child, group)
+                    pending.append(child)
+                elif child.isa == SYNCHRONIZED_GROUP_ISA:
+                    path = resolve(group_path, child, group_component(child))
+                    if path is not None:
+                        self.synchronized.setdefault(path, child)
+
+    @property
+    def files(self):
+        """Resolved path -> file reference, built on first use"""
+        if self._files is None:
+            self._files = {}
+            self.duplicate_files = {}
+            objects = self.project.objects
+            for group_id, group_path in self.group_paths.items():
+                for child_id in objects[group_id].get('children', ()):
+                    child = objects.get(child_id)
+                    if child is None or child.fields.get('isa') != 'PBXFileReference':
+                        continue
+                    fields = child.fields
+                    component = fields.get('path') or fields.get('name') or ''
+                    if (component and group_path is not None and fields.get('sourceTree') == '<group>'
+                            and component[:1] != '.' and '/.' not in component):
+                        path = f'{group_path}/{component}' if group_path else component
+                    else:
+                        path = resolve(group_path, child, component)
+                        if path is None:
+                            continue
+                    if self._files.setdefault(path, child) is not child:
+                        self.duplicate_files.setdefault(path, [self._files[path].id]).append(child_id)
+        return self._files
+
+    def register_group(self, path, group, parent):
+        """Record a group created after the index was built; path None if outside the source tree"""
+        if path is not None:
+            self.groups.setdefault(path, group)
+        self.group_paths[group.id] = path
+        self.parents[group.id] = parent
+
+    def register_file(self, path, ref, parent):
+        """Record a file reference created after the index was built"""
+        other = self.files.setdefault(path, ref)
+        if other is not ref:
+            self.duplicate_files.setdefault(path, [other.id]).append(ref.id)
+        self.parents[ref.id] = parent
+
+    def forget_file(self, path, ref):
+        """Drop a removed file reference"""
+        files = self.files
+        shared = self.duplicate_files.get(path)
+        if shared is not None:
+            shared.remove(ref.id)
+            if files.get(path) is ref:
+                files[path] = self.project.objects[shared[0]]
+            if len(shared) < 2:
+                del self.duplicate_files[path]
+        elif files.get(path) is ref:
+            del files[path]
+        self.parents.pop(ref.id, None)
+
+    def target(self, name):
+        return self.targets.get(name)
+
+    def phase(self, target, isa):
+        return self.phases.get(target.id, {}).get(isa)
+
+    def group(self, path):
+        """Group whose folder is `path`, relative to the project"""
+        return self.groups.get(path.strip('/'))
+
+    def file(self, path):
+        """File reference resolving to `path`, relative to the project"""
+        return self.files.get(path.strip('/'))
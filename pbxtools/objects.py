@@ -0,0 +1,95 @@
+"""
+PBX object model and factories for the objects the scripts create
+"""
+
+from pathlib import PurePosixPath
+
+FILE_TYPES = {
+    '.swift': 'sourcecode.swift',
+    '.h': 'sourcecode.c.h',
+    '.m': 'sourcecode.c.objc',
+    '.plist': 'text.plist.xml',
+    '.entitlements': 'text.plist.entitlements',
+    '.strings': 'text.plist.strings',
+    '.json': 'text.json',
+    '.xcassets': 'folder.assetcatalog',
+    '.xcdatamodeld': 'wrapper.xcdatamodeld',
+    '.storyboard': 'file.storyboard',
+    '.png': 'image.png',
+}
+
+
+class PBXObject:
+    """One entry of the pbxproj `objects` dictionary"""
+
+    __slots__ = ('id', 'comment', 'fields')
+
+    def __init__(self, object_id, fields, comment=None):
+        self.id = object_id
+        self.fields = fields
+        self.comment = comment
+
+    @property
+    def isa(self):
+        return self.fields.get('isa')
+
+    def get(self, key, default=None):
+        return self.fields.get(key, default)
+
+    def __getitem__(self, key):
+        return self.fields[key]
+
+    def __setitem__(self, key, value):
+        self.fields[key] = value
+
+    def __repr__(self):
+        if self.comment:
+            return f'<{self.isa} {self.id} {self.comment}>'
+        return f'<{self.isa} {self.id}>'
+
+
+def file_type(path):
+    """lastKnownFileType Xcode would pick for a path"""
+    return FILE_TYPES.get(PurePosixPath(path).suffix, 'text')
+
+
+def file_reference(object_id, path, last_known_file_type=None, source_tree='<group>'):
+    """PBXFileReference for a file relative to its parent group, or to `source_tree`"""
+    name = PurePosixPath(path).name
+    fields = {
+        'isa': 'PBXFileReference',
+        'lastKnownFileType': last_known_file_type or file_type(path),
+    }
+    if name != path:
+        fields['name'] = name
+    fields['path'] = path
+    fields['sourceTree'] = source_tree
+    return PBXObject(object_id, fields, name)
+
+
+def build_file(object_id, file_ref, phase_name='Sources'):
+    """PBXBuildFile placing a file reference in a build phase"""
+    return PBXObject(object_id, {
+        'isa': 'PBXBuildFile',
+        'fileRef': file_ref.id,
+    }, f'{file_ref.comment} in {phase_name}')
+
+
+def group(object_id, path, children=()):
+    """PBXGroup mapped to a folder relative to its parent group"""
+    return PBXObject(object_id, {
+        'isa': 'PBXGroup',
+        'children': [child.id for child in children],
+        'path': path,
+        'sourceTree': '<group>',
+    }, path)
+
+
+def build_phase(object_id, isa, name, files=()):
+    """Empty-or-populated build phase object"""
+    return PBXObject(object_id, {
+        'isa': isa,
+        'buildActionMask': '2147483647',
+        'files': [f.id for f in files],
+        'runOnlyForDeploymentPostprocessing': '0',
+    }, name)
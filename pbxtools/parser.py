@@ -0,0 +1,159 @@
+"""
+Single-pass tokenizer and parser for Xcode's OpenStep-style project.pbxproj
+"""
+
+import re
+
+from . import trace
+
+_TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>/\*.*?\*/|//[^\n]*)
+  | (?P<quoted>"(?:[^"\\]|\\.)*")
+  | (?P<punct>[{}();=,])
+  | (?P<word>(?:[^\s{}();=,"/]|/(?![/*]))+)
+''', re.VERBOSE | re.DOTALL)
+
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+
+class PBXParseError(ValueError):
+    """Raised when project.pbxproj is not a well-formed OpenStep plist"""
+
+    def __init__(self, message, text, pos):
+        line = text.count('\n', 0, pos) + 1
+        super().__init__(f"{message} (line {line})")
+        self.line = line
+        self.pos = pos
+
+
+def _unquote(token):
+    body = token[1:-1]
+    if '\\' not in body:
+        return body
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+class _Parser:
+    """Recursive-descent parser over a lazily scanned token stream.
+
+    Comments are skipped, but the last comment seen before each token is kept
+    so that `ID /* name */ = {...}` keys keep their display name.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.comment = None
+
+    def next(self):
+        """Return (kind, value, start) of the next significant token"""
+        text = self.text
+        self.comment = None
+        while True:
+            match = _TOKEN_RE.match(text, self.pos)
+            if match is None:
+                if self.pos >= len(text):
+                    return None, None, self.pos
+                raise PBXParseError("Unexpected character", text, self.pos)
+            self.pos = match.end()
+            kind = match.lastgroup
+            if kind == 'ws':
+                continue
+            if kind == 'comment':
+                value = match.group()
+                if value.startswith('/*'):
+                    self.comment = value[2:-2].strip()
+                continue
+            if kind == 'quoted':
+                return 'str', _unquote(match.group()), match.start()
+            if kind == 'word':
+                return 'str', match.group(), match.start()
+            return match.group(), None, match.start()
+
+    def expect(self, punct):
+        kind, _, start = self.next()
+        if kind != punct:
+            raise PBXParseError(f"Expected '{punct}'", self.text, start)
+
+    def value(self, kind=None, value=None, start=None):
+        if kind is None:
+            kind, value, start = self.next()
+        if kind == 'str':
+            return value
+        if kind == '{':
+            return self.dict_body()
+        if kind == '(':
+            return self.array_body()
+        raise PBXParseError("Expected a value", self.text, start)
+
+    def dict_body(self, on_entry=None):
+        """Parse `key = value; ...}` after the opening brace.
+
+        When `on_entry` is given it is called as
+        on_entry(key, comment, value, start, end) instead of storing the entry,
+        which lets the objects dictionary be indexed while it is being read.
+        start/end are the offsets of the key and of the character after `;`.
+        """
+        result = {}
+        while True:
+            kind, key, start = self.next()
+            if kind == '}':
+                return result
+            if kind != 'str':
+                raise PBXParseError("Expected a key", self.text, start)
+            self.expect('=')
+            comment = self.comment
+            value = self.value()
+            self.expect(';')
+            if on_entry is None:
+                result[key] = value
+            else:
+                on_entry(key, comment, value, start, self.pos)
+
+    def array_body(self):
+        result = []
+        while True:
+            kind, value, start = self.next()
+            if kind == ')':
+                return result
+            result.append(self.value(kind, value, start))
+            kind, _, start = self.next()
+            if kind == ')':
+                return result
+            if kind != ',':
+                raise PBXParseError("Expected ',' or ')'", self.text, start)
+
+
+def parse(text, on_object):
+    """Parse project.pbxproj text in a single pass.
+
+    Every entry of the `objects` dictionary is handed to
+    on_object(object_id, comment, fields, start, end) as soon as it is read,
+    where start/end delimit the entry in `text`. Returns the
+    remaining top-level keys (archiveVersion, objectVersion, rootObject, ...)
+    with `objects` omitted.
+    """
+    trace.count('regex_scans')
+    trace.count('chars_scanned', len(text))
+    parser = _Parser(text)
+    parser.expect('{')
+    header = {}
+    while True:
+        kind, key, start = parser.next()
+        if kind == '}':
+            break
+        if kind != 'str':
+            raise PBXParseError("Expected a key", text, start)
+        parser.expect('=')
+        if key == 'objects':
+            parser.expect('{')
+            parser.dict_body(on_object)
+        else:
+            header[key] = parser.value()
+        parser.expect(';')
+    kind, _, start = parser.next()
+    if kind is not None:
+        raise PBXParseError("Trailing data after root dictionary", text, start)
+    return header
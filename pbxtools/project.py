@@ -0,0 +1,318 @@
+"""
+Indexed object graph for an Xcode project.pbxproj
+"""
+
+import os
+from pathlib import Path
+
+from . import cache, trace, validate
+from .ids import IDAllocator
+from .index import STRUCTURAL_ISAS, ProjectIndex, group_component, join
+from .objects import PBXObject, group
+from .parser import parse
+from .writer import Splice, Writer, line_span, scan_sections
+
+
+class PBXProject:
+    """Parsed project.pbxproj keyed by 24-character object ID.
+
+    The file is read and tokenized exactly once. Objects are additionally
+    indexed by isa, so per-edit lookups never rescan the text.
+
+    The original text and each object's line span are kept, so save() only
+    re-renders objects that were added, removed or passed to touch().
+    """
+
+    def __init__(self, header=None, path=None):
+        self.header = header or {}
+        self.path = Path(path) if path else None
+        self.objects = {}
+        self._by_isa = {}
+        self.ids = IDAllocator(self.objects)
+        self._index = None
+        self._source = None
+        self._source_stat = None
+        self._spans = {}
+        self._sections = {}
+        self._dirty = set()
+        self._added = set()
+        self._removed = set()
+
+    @classmethod
+    def parse(cls, text, path=None):
+        project = cls(path=path)
+
+        def on_object(object_id, comment, fields, start, end):
+            project._insert_parsed(PBXObject(object_id, fields, comment), line_span(text, start, end))
+
+        with trace.span('parse', chars=len(text)):
+            project.header = parse(text, on_object)
+            project._source = text
+            project._sections = scan_sections(text)
+            trace.count('objects_parsed', len(project.objects))
+        return project
+
+    @classmethod
+    def load(cls, path, use_cache=None):
+        """Read a project file, reusing the parse cached by an earlier run.
+
+        The cache lives in <name>.xcodeproj/.pbxtools/ and is only used when
+        the file's contents still match; set PBXTOOLS_CACHE=0 or pass
+        use_cache=False to always parse.
+        """
+        if use_cache is None:
+            use_cache = cache.enabled()
+        with trace.span('load', path=str(path)) as span:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+            trace.count('bytes_read', len(data))
+            text = _decode(data)
+
+            cached = cache.load(path, data, st) if use_cache else None
+            span.set(cached=cached is not None)
+            if cached is not None:
+                project = cls._from_cache(text, path, *cached)
+            else:
+                project = cls.parse(text, path)
+                if use_cache:
+                    cache.store(path, data, st, *project._cache_state())
+            if b'\r' not in data:
+                # Offsets into the decoded text are only file offsets when
+                # decoding changed nothing; CRLF files always get a full write
+                project._source_stat = (st.st_size, st.st_mtime_ns)
+        return project
+
+    @classmethod
+    def _from_cache(cls, text, path, header, entries, sections):
+        project = cls(header, path)
+        objects = project.objects
+        by_isa = project._by_isa
+        spans = project._spans
+        for object_id, comment, fields, span in entries:
+            obj = objects[object_id] = PBXObject(object_id, fields, comment)
+            by_isa.setdefault(span[2], {})[object_id] = obj
+            spans[object_id] = span
+        project._source = text
+        project._sections = sections
+        return project
+
+    def _cache_state(self):
+        """(header, entries, sections) as stored by the parse cache"""
+        spans = self._spans
+        entries = [(obj.id, obj.comment, obj.fields, spans[obj.id]) for obj in self.objects.values()]
+        entries.sort(key=lambda entry: entry[3][0])
+        return self.header, entries, self._sections
+
+    def _insert_parsed(self, obj, span):
+        if obj.id in self.objects:
+            raise KeyError(f"Duplicate object ID {obj.id}")
+        self.objects[obj.id] = obj
+        self._by_isa.setdefault(obj.isa, {})[obj.id] = obj
+        self._spans[obj.id] = (span[0], span[1], obj.isa)
+
+    # Object graph
+
+    def __contains__(self, object_id):
+        return object_id in self.objects
+
+    def __getitem__(self, object_id):
+        return self.objects[object_id]
+
+    def get(self, object_id):
+        return self.objects.get(object_id)
+
+    def add(self, obj):
+        """Insert a new object; IDs must be unique"""
+        if obj.isa in STRUCTURAL_ISAS:
+            self._index = None
+        self._insert(obj)
+        return obj
+
+    def _insert(self, obj):
+        if obj.id in self.objects:
+            raise KeyError(f"Duplicate object ID {obj.id}")
+        self.objects[obj.id] = obj
+        self._by_isa.setdefault(obj.isa, {})[obj.id] = obj
+        if obj.id in self._spans:
+            self._removed.discard(obj.id)
+            self._dirty.add(obj.id)
+        else:
+            self._added.add(obj.id)
+
+    def remove(self, object_id):
+        obj = self.objects.pop(object_id)
+        if obj.isa in STRUCTURAL_ISAS:
+            self._index = None
+        del self._by_isa[obj.isa][object_id]
+        self._added.discard(object_id)
+        self._dirty.discard(object_id)
+        if object_id in self._spans:
+            self._removed.add(object_id)
+        return obj
+
+    def touch(self, *objects):
+        """Mark objects whose fields were changed in place so save() rewrites them"""
+        for obj in objects:
+            if obj.id in self._spans:
+                self._dirty.add(obj.id)
+
+    def objects_of(self, isa):
+        """All objects of one isa, in file order"""
+        return list(self._by_isa.get(isa, {}).values())
+
+    @property
+    def root(self):
+        return self.objects[self.header['rootObject']]
+
+    @property
+    def main_group(self):
+        return self.objects[self.root['mainGroup']]
+
+    # Lookups shared by the add_*.py scripts
+
+    @property
+    def index(self):
+        """Target, build phase and group lookup tables, rebuilt after structural changes"""
+        if self._index is None:
+            with trace.span('index'):
+                self._index = ProjectIndex(self)
+        return self._index
+
+    def reindex(self):
+        """Drop the lookup tables after restructuring targets or groups in place"""
+        self._index = None
+
+    def target(self, name):
+        """Target by name, or None"""
+        return self.index.target(name)
+
+    def build_phase(self, target, isa='PBXSourcesBuildPhase'):
+        """First build phase of the given isa on a target, or None"""
+        return self.index.phase(target, isa)
+
+    def group(self, path):
+        """Group at a slash-separated path below the main group, or None"""
+        return self.index.group(path)
+
+    def ensure_group(self, path):
+        """Group at `path`, creating missing groups along the way.
+
+        Returns (group, created) where created counts the new groups.
+        """
+        index = self.index
+        path = path.strip('/')
+        existing = index.group(path)
+        if existing is not None:
+            return existing, 0
+        parent_path, _, component = path.rpartition('/')
+        parent, created = self.ensure_group(parent_path)
+        new_group = group(self.ids.new('PBXGroup', path), component)
+        self._insert(new_group)
+        parent['children'].append(new_group.id)
+        self.touch(parent)
+        index.register_group(join(index.group_paths[parent.id], group_component(new_group)), new_group, parent)
+        return new_group, created + 1
+
+    # Serialization
+
+    def serialize(self):
+        """Render the whole project in Xcode's canonical layout"""
+        with trace.span('serialize', objects=len(self.objects)):
+            return Writer(self.objects).document(self.header)
+
+    def _splice(self):
+        """(text, first changed offset, new spans), or None when a splice is not possible"""
+        if self._source is None:
+            return None
+        if not (self._dirty or self._added or self._removed):
+            return self._source, len(self._source), self._spans
+        splice = Splice(self._source, self._spans, self._sections, self.objects, self._by_isa)
+        patches = splice.patches(self._dirty, self._added, self._removed)
+        if patches is None:
+            return None
+        with trace.span('splice', patches=len(patches)):
+            text, spans = splice.apply(patches)
+        return text, patches[0][0], spans
+
+    def save(self, path=None):
+        """Write the project, patching only changed byte ranges when possible.
+
+        When saving back to the file that was loaded and it has not changed on
+        disk since, only the tail past the first changed offset is rewritten.
+        Otherwise the result goes out in one buffered write.
+
+        The pending changes are validated first (see validate.py) and
+        nothing is written if that raises ValidationError; set
+        PBXTOOLS_VALIDATE=0 to skip it.
+        """
+        path = Path(path) if path else self.path
+        with trace.span('save', path=str(path)) as span:
+            if validate.enabled():
+                # Only what changed since the last load or save needs checking,
+                # as long as the changes are still tracked against the source
+                changes = None if self._source is None else (self._dirty | self._added, self._removed)
+                validate.check(self, changes)
+            trace.count('objects_added', len(self._added))
+            trace.count('objects_removed', len(self._removed))
+            trace.count('objects_rewritten', len(self._dirty))
+            spliced = self._splice()
+            if spliced is None:
+                text, first, spans = self.serialize(), 0, None
+            else:
+                text, first, spans = spliced
+
+            in_place = (spliced is not None and path == self.path
+                        and self._source_stat is not None and _stat(path) == self._source_stat)
+            span.set(spliced=spliced is not None, in_place=in_place)
+            if in_place:
+                if text is not self._source:
+                    offset = len(self._source[:first].encode('utf-8'))
+                    tail = text[first:].encode('utf-8')
+                    with open(path, 'r+b') as f:
+                        f.seek(offset)
+                        f.write(tail)
+                        f.truncate()
+                    trace.count('bytes_written', len(tail))
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                if trace.enabled():
+                    trace.count('bytes_written', os.path.getsize(path))
+
+        if path == self.path:
+            self._source_stat = _stat(path)
+        if spliced is None:
+            self._source, self._spans, self._sections = None, {}, {}
+        else:
+            self._source, self._spans, self._sections = text, spans, scan_sections(text)
+        self._dirty.clear()
+        self._added.clear()
+        self._removed.clear()
+        self._update_cache(path)
+        return path
+
+    def _update_cache(self, path):
+        """Drop the parse cached for the old bytes; the next parse caches the new ones.
+
+        Re-storing here would serialize the whole graph on every save,
+        which costs more than the edit itself on large projects.
+        """
+        if cache.enabled():
+            cache.discard(path)
+
+
+def _decode(data):
+    """Bytes to text with the same newline handling as open(..., 'r')"""
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
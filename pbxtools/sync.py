@@ -0,0 +1,192 @@
+"""
+Filesystem-to-project sync: diff source folders against the pbxproj
+"""
+
+import json
+import os
+from pathlib import Path
+
+from . import trace
+from .edit import ProjectEdit
+from .project import PBXProject
+
+# Source folder -> targets its files are built in
+DEFAULT_ROOTS = {
+    'SmartLockBox': ('SmartLockBox',),
+    'DeviceActivityMonitorExtension': ('DeviceActivityMonitorExtension',),
+    'SmartLockBoxTests': ('SmartLockBoxTests',),
+    'SmartLockBoxUITests': ('SmartLockBoxUITests',),
+}
+
+# Directories Xcode treats as a single file
+BUNDLE_SUFFIXES = frozenset(('.xcassets', '.xcdatamodeld', '.bundle', '.framework', '.xcframework'))
+
+# Localized folders are modelled as PBXVariantGroups, which sync does not manage
+SKIPPED_SUFFIXES = frozenset(('.lproj',))
+
+IGNORED_NAMES = frozenset(('.DS_Store',))
+
+CACHE_VERSION = 1
+
+
+def cache_path(project_path):
+    """Where sync keeps its walk cache: <name>.xcodeproj/.pbxtools/sync-cache.json"""
+    return Path(project_path).parent / '.pbxtools' / 'sync-cache.json'
+
+
+def _stat_key(st):
+    return [st.st_mtime_ns, st.st_ino]
+
+
+class TreeWalker:
+    """Lists files below a folder, reusing listings of unchanged directories.
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed in it, so an unchanged (mtime, inode) pair means the cached
+    listing is still exact and the directory does not need to be scanned.
+    """
+
+    def __init__(self, base, cache=None):
+        self.base = Path(base)
+        self.cache = cache if cache is not None else {}
+        self.seen = {}
+        self.changed = False
+
+    def walk(self, folder):
+        files = []
+        self._walk(folder, files)
+        return files
+
+    def _walk(self, rel, files):
+        try:
+            st = os.stat(self.base / rel)
+        except FileNotFoundError:
+            return
+        key = _stat_key(st)
+        entry = self.cache.get(rel)
+        if entry is None or entry[0] != key:
+            names, dirs = [], []
+            with os.scandir(self.base / rel) as it:
+                for item in it:
+                    name = item.name
+                    if name.startswith('.') or name in IGNORED_NAMES:
+                        continue
+                    suffix = os.path.splitext(name)[1]
+                    if suffix in SKIPPED_SUFFIXES:
+                        continue
+                    if item.is_dir() and suffix not in BUNDLE_SUFFIXES:
+                        dirs.append(name)
+                    else:
+                        names.append(name)
+            entry = [key, sorted(names), sorted(dirs)]
+            self.changed = True
+        self.seen[rel] = entry
+        files.extend(f'{rel}/{name}' for name in entry[1])
+        for name in entry[2]:
+            self._walk(f'{rel}/{name}', files)
+
+
+def project_files(project, folder):
+    """Paths of file references below a top-level folder, as the index resolves them"""
+    prefix = folder + '/'
+    return {path for path in project.index.files if path.startswith(prefix)}
+
+
+def synchronized_folders(project):
+    """Folders Xcode already keeps in sync by itself"""
+    return set(project.index.synchronized)
+
+
+class SyncResult:
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.missing = []
+        self.skipped = []
+        self.warnings = []
+        self.up_to_date = False
+
+
+def sync(project_path, roots=None, dry_run=False, use_cache=True, seed=None, remove=False):
+    """Bring the project's file references in line with the source folders.
+
+    Returns a SyncResult listing what was added and removed. References
+    whose file is not on disk are only listed in `missing` unless `remove`
+    is set; a reference that does not resolve to a path inside a source
+    folder is never touched. A folder none of whose targets exist yet is
+    left out entirely. When neither the project file nor any
+    directory changed since the last clean sync, the project is not even
+    parsed.
+    """
+    project_path = Path(project_path)
+    roots = DEFAULT_ROOTS if roots is None else roots
+    base = project_path.parent.parent
+    result = SyncResult()
+
+    cache_file = cache_path(project_path)
+    cache = {}
+    if use_cache:
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        if cache.get('version') != CACHE_VERSION or cache.get('roots') != _roots_key(roots):
+            cache = {}
+
+    project_key = _stat_key(os.stat(project_path))
+    walker = TreeWalker(base, cache.get('dirs', {}))
+    with trace.span('walk', roots=len(roots)):
+        on_disk = {folder: walker.walk(folder) for folder in roots}
+
+    if not walker.changed and cache.get('project') == project_key and len(walker.seen) == len(walker.cache):
+        result.up_to_date = True
+        return result
+
+    project = PBXProject.load(project_path)
+    synced = synchronized_folders(project)
+    edit = ProjectEdit.open(project_path, seed=seed, project=project)
+    for folder, targets in roots.items():
+        if folder in synced:
+            result.skipped.append(folder)
+            continue
+        present = [target for target in targets if project.target(target) is not None]
+        if targets and not present:
+            # Its files would be orphans that the target's own scaffolding then duplicates
+            if on_disk[folder]:
+                result.warnings.append(f"No target {', '.join(targets)}; {folder}/ left alone until one exists")
+            continue
+        for target in targets:
+            if target not in present and on_disk[folder]:
+                result.warnings.append(f"Target {target} not found; {folder} files get no build files")
+        disk = set(on_disk[folder])
+        known = project_files(project, folder)
+        for path in sorted(disk - known):
+            edit.add_file(path, targets=present)
+            result.added.append(path)
+        for path in sorted(known - disk):
+            if remove:
+                edit.remove_file(path)
+                result.removed.append(path)
+            else:
+                result.missing.append(path)
+
+    if len(edit) and not dry_run:
+        edit.commit()
+        project_key = _stat_key(os.stat(project_path))
+
+    # Unremoved missing files keep the sync from being clean, so they are reported again
+    if use_cache and not dry_run and not result.missing:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CACHE_VERSION,
+                'roots': _roots_key(roots),
+                'project': project_key,
+                'dirs': walker.seen,
+            }, f)
+    return result
+
+
+def _roots_key(roots):
+    return {folder: list(targets) for folder, targets in sorted(roots.items())}
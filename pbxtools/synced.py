@@ -0,0 +1,123 @@
+"""
+Folders Xcode keeps in sync by itself (PBXFileSystemSynchronizedRootGroup)
+
+Every file below a synchronized root group is part of the project without a
+PBXFileReference. Its target membership is the group's default -- member of
+each target listing the group in fileSystemSynchronizedGroups -- flipped for
+the targets whose PBXFileSystemSynchronizedBuildFileExceptionSet names the
+file. So Info.plist in the exception set of the folder's own target is left
+out of it, and a file in the exception set of another target is built by
+that target too.
+"""
+
+from bisect import insort
+from pathlib import PurePosixPath
+
+from .objects import PBXObject
+
+EXCEPTION_SET_ISA = 'PBXFileSystemSynchronizedBuildFileExceptionSet'
+
+
+def exception_set(object_id, folder, target):
+    """Empty membership exception set of a synchronized folder for one target"""
+    return PBXObject(object_id, {
+        'isa': EXCEPTION_SET_ISA,
+        'membershipExceptions': [],
+        'target': target.id,
+    }, f'Exceptions for "{folder}" folder in "{target.get("name")}" target')
+
+
+class SynchronizedFolders:
+    """Synchronized root groups of a project and their membership exceptions.
+
+    Built from the project index; edits go straight into the project's
+    exception set objects and are marked for the next save().
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.roots = project.index.synchronized
+        self.syncing = {}
+        for target in project.index.targets.values():
+            for group_id in target.get('fileSystemSynchronizedGroups', ()):
+                self.syncing.setdefault(group_id, set()).add(target.id)
+
+    def __bool__(self):
+        return bool(self.roots)
+
+    def locate(self, path):
+        """(folder path, root group, path inside it) for a file below a synchronized folder, or None"""
+        if not self.roots:
+            return None
+        parts = PurePosixPath(path).parts
+        for depth in range(len(parts) - 1, 0, -1):
+            folder = '/'.join(parts[:depth])
+            root = self.roots.get(folder)
+            if root is not None:
+                return folder, root, '/'.join(parts[depth:])
+        return None
+
+    def exceptions(self, root, target):
+        """The root's exception set for a target, or None"""
+        for set_id in root.get('exceptions', ()):
+            exceptions = self.project.get(set_id)
+            if exceptions is not None and exceptions.get('target') == target.id:
+                return exceptions
+        return None
+
+    def is_member(self, path, target):
+        """Whether Xcode builds the file at `path` in `target`; None if not synchronized"""
+        found = self.locate(path)
+        if found is None:
+            return None
+        _, root, inner = found
+        default = target.id in self.syncing.get(root.id, ())
+        exceptions = self.exceptions(root, target)
+        flipped = exceptions is not None and inner in exceptions.get('membershipExceptions', ())
+        return default != flipped
+
+    def set_member(self, path, target, member=True):
+        """Make `target` build (or skip) a synchronized file; returns True if an exception set changed"""
+        folder, root, inner = self.locate(path)
+        default = target.id in self.syncing.get(root.id, ())
+        exceptions = self.exceptions(root, target)
+        listed = exceptions is not None and inner in exceptions.get('membershipExceptions', ())
+        if (default != listed) == member:
+            return False
+
+        project = self.project
+        if listed:
+            exceptions['membershipExceptions'].remove(inner)
+            if exceptions['membershipExceptions']:
+                project.touch(exceptions)
+            else:
+                root['exceptions'].remove(exceptions.id)
+                if not root['exceptions']:
+                    del root['exceptions']
+                project.touch(root)
+                project.remove(exceptions.id)
+            return True
+
+        if exceptions is None:
+            exceptions = project.add(exception_set(
+                project.ids.new(EXCEPTION_SET_ISA, folder, target.get('name')), folder, target))
+            root.fields.setdefault('exceptions', []).append(exceptions.id)
+            project.touch(root)
+        else:
+            project.touch(exceptions)
+        insort(exceptions['membershipExceptions'], inner)
+        return True
+
+    def forget(self, path):
+        """Drop a deleted file from every exception set; returns how many sets changed"""
+        found = self.locate(path)
+        if found is None:
+            return 0
+        _, root, inner = found
+        changed = 0
+        for target in self.project.index.targets.values():
+            exceptions = self.exceptions(root, target)
+            if exceptions is not None and inner in exceptions.get('membershipExceptions', ()):
+                self.set_member(path, target, not self.is_member(path, target))
+                changed += 1
+        return changed
@@ -0,0 +1,227 @@
+"""
+Opt-in timing spans and counters for project edits
+
+Set PBXTOOLS_TRACE to turn tracing on for a whole run of any add_*.py script
+or `python3 -m pbxtools` command:
+
+    PBXTOOLS_TRACE=1                print a summary to stderr on exit
+    PBXTOOLS_TRACE=trace.json       write every span and counter as JSON
+    PBXTOOLS_TRACE_FORMAT=chrome    ...or as a Chrome trace (chrome://tracing,
+                                    Perfetto) instead
+
+Spans nest and are timed with time.perf_counter_ns. Counters (regex scans,
+characters scanned and copied, objects added, ...) are global, and each span
+also records how much every counter grew while it was open. With tracing
+off, span() hands back a shared no-op context manager and count() returns
+immediately.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_VAR = 'PBXTOOLS_TRACE'
+FORMAT_VAR = 'PBXTOOLS_TRACE_FORMAT'
+FORMATS = ('json', 'chrome')
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed region; use through Tracer.span() or trace.span()"""
+
+    __slots__ = ('tracer', 'name', 'args', 'depth', 'start', 'end', 'counts', '_before')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.depth = 0
+        self.start = self.end = None
+        self.counts = {}
+
+    def set(self, **args):
+        """Attach more arguments, e.g. results only known at the end"""
+        self.args.update(args)
+
+    def __enter__(self):
+        tracer = self.tracer
+        self.depth = len(tracer.stack)
+        tracer.stack.append(self)
+        self._before = dict(tracer.counters)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter_ns()
+        tracer = self.tracer
+        tracer.stack.pop()
+        before = self._before
+        self.counts = {name: value - before.get(name, 0)
+                       for name, value in tracer.counters.items() if value != before.get(name, 0)}
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        tracer.spans.append(self)
+        return False
+
+    @property
+    def seconds(self):
+        return (self.end - self.start) / 1e9
+
+    def to_dict(self, origin):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'start_us': (self.start - origin) / 1000,
+            'duration_us': (self.end - self.start) / 1000,
+            'args': self.args,
+            'counts': self.counts,
+        }
+
+
+class Tracer:
+    """Collects finished spans and counter totals for one process"""
+
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.spans = []
+        self.stack = []
+        self.counters = {}
+
+    def span(self, name, **args):
+        return Span(self, name, args)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self):
+        spans = sorted(self.spans, key=lambda span: span.start)
+        return {
+            'spans': [span.to_dict(self.origin) for span in spans],
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def chrome_trace(self):
+        """Trace Event Format: one complete ("X") event per span plus the final counters"""
+        pid, tid = os.getpid(), threading.get_ident()
+        events = [
+            {
+                'name': span.name,
+                'cat': 'pbxtools',
+                'ph': 'X',
+                'ts': (span.start - self.origin) / 1000,
+                'dur': (span.end - span.start) / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': {**span.args, **span.counts},
+            }
+            for span in sorted(self.spans, key=lambda span: span.start)
+        ]
+        end = max((span.end for span in self.spans), default=self.origin)
+        events.append({
+            'name': 'counters',
+            'ph': 'C',
+            'ts': (end - self.origin) / 1000,
+            'pid': pid,
+            'tid': tid,
+            'args': dict(sorted(self.counters.items())),
+        })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path, fmt='json'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown trace format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        data = self.chrome_trace() if fmt == 'chrome' else self.to_dict()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+            f.write('\n')
+        return path
+
+    def summary(self):
+        """Lines of total time per span name, slowest first, then the counters"""
+        totals = {}
+        for span in self.spans:
+            calls, seconds = totals.get(span.name, (0, 0.0))
+            totals[span.name] = (calls + 1, seconds + span.seconds)
+        lines = [f"⏱️  {name:<24} {seconds * 1000:>10.1f} ms  ×{calls}"
+                 for name, (calls, seconds) in sorted(totals.items(), key=lambda item: -item[1][1])]
+        lines.extend(f"🔢 {name:<24} {value:>10}" for name, value in sorted(self.counters.items()))
+        return lines
+
+
+_tracer = None
+
+
+def enabled():
+    return _tracer is not None
+
+
+def tracer():
+    """The active Tracer, or None when tracing is off"""
+    return _tracer
+
+
+def start():
+    """Turn tracing on in this process (a no-op if it already is)"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def stop():
+    """Turn tracing off; returns the Tracer that was collecting, if any"""
+    global _tracer
+    current, _tracer = _tracer, None
+    return current
+
+
+def span(name, **args):
+    """Context manager timing a region; free when tracing is off"""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, **args)
+
+
+def count(name, amount=1):
+    if _tracer is not None:
+        _tracer.count(name, amount)
+
+
+def _report(destination, fmt):
+    if _tracer is None or not _tracer.spans:
+        return
+    if destination in ('1', 'true', 'yes', 'stderr'):
+        for line in _tracer.summary():
+            print(line, file=sys.stderr)
+        return
+    try:
+        _tracer.dump(destination, fmt)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not write trace to {destination}: {e}", file=sys.stderr)
+
+
+def _from_environment():
+    destination = os.environ.get(ENV_VAR, '')
+    if destination in ('', '0', 'false', 'no'):
+        return
+    start()
+    atexit.register(_report, destination, os.environ.get(FORMAT_VAR, 'json'))
+
+
+_from_environment()
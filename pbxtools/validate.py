@@ -0,0 +1,475 @@
+"""
+Structural checks on a parsed project, run before every save
+
+One pass over the objects, kind by kind, collects every reference, phase
+membership and group child in bulk; the checks compare aggregate counts and
+only walk objects one by one to name what is wrong. save() only checks what
+its pending changes can break (see validate_changes), so its cost follows
+the size of the edit rather than of the project:
+
+    dangling-reference   an ID field names an object that does not exist
+    build-file-phases    a PBXBuildFile is in no build phase, or in several
+    duplicate-build-file a file is built twice by the same phase
+    duplicate-child      a group lists the same child twice
+    multiple-parents     an object is a child of more than one group
+    duplicate-file-ref   two file references resolve to the same path
+"""
+
+import os
+
+from . import trace
+from .index import GROUP_ISAS, file_component, group_component, join, resolve
+
+# Set PBXTOOLS_VALIDATE=0 to save without checking
+ENV_VAR = 'PBXTOOLS_VALIDATE'
+
+# Fields holding one object ID, and fields holding a list of them
+REFERENCE_KEYS = frozenset((
+    'baseConfigurationReference', 'buildConfigurationList', 'containerPortal', 'fileRef', 'mainGroup',
+    'package', 'productRef', 'productRefGroup', 'productReference', 'target', 'targetProxy',
+))
+REFERENCE_LIST_KEYS = frozenset((
+    'buildConfigurations', 'buildPhases', 'buildRules', 'children', 'dependencies', 'exceptions', 'files',
+    'fileSystemSynchronizedGroups', 'packageProductDependencies', 'packageReferences', 'targets',
+))
+
+_PHASE_SUFFIX = 'BuildPhase'
+
+
+def enabled():
+    return os.environ.get(ENV_VAR, '1') not in ('0', 'false', 'no', '')
+
+
+class Issue:
+    def __init__(self, code, object_id, message):
+        self.code = code
+        self.object_id = object_id
+        self.message = message
+
+    def __str__(self):
+        return f"{self.code}: {self.message}"
+
+    def __repr__(self):
+        return f'<Issue {self.code} {self.object_id}>'
+
+
+class ValidationError(ValueError):
+    """Raised when saving would write a structurally broken project"""
+
+    def __init__(self, issues):
+        self.issues = issues
+        shown = '\n  '.join(str(issue) for issue in issues[:10])
+        more = f"\n  ... and {len(issues) - 10} more" if len(issues) > 10 else ''
+        super().__init__(f"{len(issues)} structural problems:\n  {shown}{more}")
+
+
+def validate(project):
+    """Every Issue in the project, in a stable order; empty when it is sound"""
+    with trace.span('validate', objects=len(project.objects)):
+        return _Checker(project).run()
+
+
+def validate_changes(project, changed, removed):
+    """Issues the given added/modified and removed object IDs introduce.
+
+    Assumes everything else was sound, as it is for a project that was
+    loaded and then edited; references, phase membership, group children
+    and file paths are only checked where the changes reach them.
+    """
+    with trace.span('validate', objects=len(changed) + len(removed), incremental=True):
+        return _Checker(project).run_changes(changed, removed)
+
+
+def check(project, changes=None):
+    """Raise ValidationError if validate() finds anything.
+
+    With changes=(changed IDs, removed IDs), only validate_changes() runs.
+    """
+    if changes is None:
+        issues = validate(project)
+    else:
+        issues = validate_changes(project, *changes)
+    if issues:
+        raise ValidationError(issues)
+
+
+class _Checker:
+    """Aggregate checks first; per-object detail only where an aggregate fails.
+
+    Each kind of object is handled in bulk (set differences, dict.fromkeys)
+    so a sound project costs one visit per object and no messages.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.issues = []
+
+    def issue(self, code, object_id, message):
+        self.issues.append(Issue(code, object_id, message))
+
+    def describe(self, object_id):
+        obj = self.project.objects.get(object_id)
+        if obj is not None and obj.comment:
+            return f'{object_id} ({obj.comment})'
+        return object_id
+
+    def run(self):
+        project = self.project
+        objects = project.objects
+        by_isa = project._by_isa
+        referenced = [project.header.get('rootObject')]
+
+        build_files = by_isa.get('PBXBuildFile', {})
+        file_of = {object_id: build.fields.get('fileRef') for object_id, build in build_files.items()}
+        for object_id in [object_id for object_id, file_ref in file_of.items() if file_ref is None]:
+            file_of[object_id] = build_files[object_id].fields.get('productRef')
+        referenced.extend(file_of.values())
+
+        parent_of = {}
+        phase_of = {}
+        listed_children = listed_files = 0
+        for isa, members in by_isa.items():
+            if isa == 'PBXBuildFile' or isa == 'PBXFileReference':
+                continue
+            if isa in GROUP_ISAS:
+                for group_id, group in members.items():
+                    children = group.fields.get('children', ())
+                    listed_children += len(children)
+                    parent_of.update(dict.fromkeys(children, group_id))
+                    referenced.extend(children)
+            elif isa.endswith(_PHASE_SUFFIX):
+                for phase_id, phase in members.items():
+                    files = phase.fields.get('files', ())
+                    listed_files += len(files)
+                    phase_of.update(dict.fromkeys(files, phase_id))
+                    referenced.extend(files)
+                    if len(set(map(file_of.get, files))) != len(files):
+                        self.duplicate_build_files(phase_id, files, file_of)
+            else:
+                for obj in members.values():
+                    for key, value in obj.fields.items():
+                        if key in REFERENCE_LIST_KEYS:
+                            referenced.extend(value)
+                        elif key in REFERENCE_KEYS:
+                            referenced.append(value)
+
+        if listed_children != len(parent_of):
+            self.group_children(by_isa)
+        if listed_files != len(phase_of):
+            self.phase_membership(by_isa)
+        if len(phase_of) != len(build_files):
+            for object_id in build_files.keys() - phase_of.keys():
+                self.issue('build-file-phases', object_id,
+                           f"build file {self.describe(object_id)} is not in any build phase")
+        missing = set(referenced)
+        missing.difference_update(objects)
+        missing.discard(None)
+        if missing:
+            self.dangling(missing)
+
+        self.duplicate_paths(by_isa.get('PBXFileReference', {}), parent_of)
+        return self.issues
+
+    def run_changes(self, changed, removed):
+        project = self.project
+        objects = project.objects
+        referenced = []
+        groups, phases, file_refs, builds = [], [], [], []
+        for object_id in changed:
+            obj = objects.get(object_id)
+            if obj is None:
+                continue
+            for key, value in obj.fields.items():
+                if key in REFERENCE_LIST_KEYS:
+                    referenced.extend(value)
+                elif key in REFERENCE_KEYS:
+                    referenced.append(value)
+            isa = obj.isa
+            if isa in GROUP_ISAS:
+                groups.append(obj)
+            elif isa.endswith(_PHASE_SUFFIX):
+                phases.append(obj)
+            elif isa == 'PBXFileReference':
+                file_refs.append(obj)
+            elif isa == 'PBXBuildFile':
+                builds.append(obj)
+
+        if phases or builds:
+            self.changed_phases(phases, builds)
+        if groups:
+            self.changed_groups(groups)
+
+        missing = set(referenced)
+        missing.difference_update(objects)
+        missing.discard(None)
+        if removed:
+            missing.update(self.still_referenced(set(removed)))
+        if missing:
+            self.dangling(missing)
+
+        for group in groups:
+            for child_id in group.fields.get('children', ()):
+                child = objects.get(child_id)
+                if child is not None and child.isa == 'PBXFileReference':
+                    file_refs.append(child)
+        if file_refs and not self.changed_paths(file_refs, groups):
+            self.duplicate_paths(project._by_isa.get('PBXFileReference', {}), self.parents())
+        return self.issues
+
+    def changed_phases(self, phases, builds):
+        """Phase membership and per-phase duplicates where phases or build files changed.
+
+        Every build file in exactly one phase makes the listed total equal
+        the number of build files, so the full membership pass only runs
+        when the totals differ. A phase can only have started building a
+        file twice if a changed build file points at a file that is not new
+        or that another changed build file also points at.
+        """
+        by_isa = self.project._by_isa
+        build_files = by_isa.get('PBXBuildFile', {})
+        all_phases = [phase for isa, members in by_isa.items() if isa.endswith(_PHASE_SUFFIX)
+                      for phase in members.values()]
+        if sum(len(phase.fields.get('files', ())) for phase in all_phases) != len(build_files):
+            phase_of = {}
+            for phase in all_phases:
+                phase_of.update(dict.fromkeys(phase.fields.get('files', ()), phase.id))
+            self.phase_membership(by_isa)
+            for object_id in build_files.keys() - phase_of.keys():
+                self.issue('build-file-phases', object_id,
+                           f"build file {self.describe(object_id)} is not in any build phase")
+
+        spans = self.project._spans
+        built = [build.fields.get('fileRef') or build.fields.get('productRef') for build in builds]
+        if len(set(built)) == len(built) and not any(file_ref in spans for file_ref in built):
+            return
+        for phase in phases:
+            files = phase.fields.get('files', ())
+            file_of = {}
+            for build_id in files:
+                build = build_files.get(build_id)
+                if build is not None:
+                    file_of[build_id] = build.fields.get('fileRef') or build.fields.get('productRef')
+            if len(set(file_of.values())) != len(file_of):
+                self.duplicate_build_files(phase.id, files, file_of)
+
+    def changed_groups(self, groups):
+        """Duplicate children and multiple parents where groups changed.
+
+        New objects can only be children of changed groups; a child that
+        existed before is checked against the parent the index recorded for
+        it. Without an index, every group is visited.
+        """
+        project = self.project
+        index = project._index
+        listed = [child for group in groups for child in group.fields.get('children', ())]
+        if index is not None and len(set(listed)) == len(listed):
+            changed = {group.id for group in groups}
+            spans = project._spans
+            for child in listed:
+                if child not in spans:
+                    continue
+                holder = index.parents.get(child)
+                if (holder is not None and holder.id not in changed
+                        and child in holder.fields.get('children', ())):
+                    break
+            else:
+                return
+        self.group_children(project._by_isa)
+
+    def still_referenced(self, removed):
+        """Removed IDs that unchanged objects still point at"""
+        project = self.project
+        spans = project._spans
+        removed_isas = {spans[object_id][2] for object_id in removed if object_id in spans}
+        found = set()
+        for isa, members in project._by_isa.items():
+            if isa == 'PBXFileReference':
+                continue
+            if isa == 'PBXBuildFile':
+                if removed_isas - {'PBXBuildFile'}:
+                    targets = {build.fields.get('fileRef') for build in members.values()}
+                    targets.update(build.fields.get('productRef') for build in members.values())
+                    found.update(removed & targets)
+            elif isa in GROUP_ISAS or isa.endswith(_PHASE_SUFFIX):
+                key = 'children' if isa in GROUP_ISAS else 'files'
+                for obj in members.values():
+                    listed = obj.fields.get(key, ())
+                    if not removed.isdisjoint(listed):
+                        found.update(removed.intersection(listed))
+            else:
+                for obj in members.values():
+                    for key, value in obj.fields.items():
+                        if key in REFERENCE_LIST_KEYS:
+                            if not removed.isdisjoint(value):
+                                found.update(removed.intersection(value))
+                        elif key in REFERENCE_KEYS and value in removed:
+                            found.add(value)
+        return found
+
+    def changed_paths(self, file_refs, groups):
+        """Check changed file references against the index's path table.
+
+        Returns False, having reported nothing, when the index cannot answer
+        exactly (no file table built yet, or a reference outside the source
+        tree); the caller then runs the full duplicate_paths pass.
+        """
+        index = self.project._index
+        if index is None or index._files is None:
+            return False
+        objects = self.project.objects
+        parents = {child_id: group for group in groups for child_id in group.fields.get('children', ())}
+        seen = {}
+        issues = []
+        for ref in {ref.id: ref for ref in file_refs}.values():
+            parent = parents.get(ref.id) or index.parents.get(ref.id)
+            if parent is None or parent.id not in index.group_paths:
+                return False
+            path = resolve(index.group_paths[parent.id], ref, file_component(ref))
+            if path is None:
+                return False
+            others = [seen.setdefault(path, ref.id)]
+            indexed = index.files.get(path)
+            if indexed is not None:
+                others.append(indexed.id)
+            others.extend(index.duplicate_files.get(path, ()))
+            for other in dict.fromkeys(others):
+                if other == ref.id or other not in objects:
+                    continue
+                holder = index.parents.get(other)
+                if holder is None or other not in holder.fields.get('children', ()):
+                    continue
+                issues.append((ref.id, other, path))
+        reported = set()
+        for ref_id, other, path in issues:
+            if (other, ref_id) in reported:
+                continue
+            reported.add((ref_id, other))
+            self.issue('duplicate-file-ref', ref_id,
+                       f"{self.describe(ref_id)} and {self.describe(other)} both point at {path}")
+        return True
+
+    def parents(self):
+        parent_of = {}
+        for isa in GROUP_ISAS:
+            for group_id, group in self.project._by_isa.get(isa, {}).items():
+                parent_of.update(dict.fromkeys(group.fields.get('children', ()), group_id))
+        return parent_of
+
+    # Detail passes, only run when an aggregate check failed
+
+    def duplicate_build_files(self, phase_id, files, file_of):
+        seen = set()
+        for build_id in files:
+            file_ref = file_of.get(build_id)
+            if file_ref is None:
+                continue
+            if file_ref in seen:
+                self.issue('duplicate-build-file', phase_id,
+                           f"phase {self.describe(phase_id)} builds {self.describe(file_ref)} twice")
+            seen.add(file_ref)
+
+    def group_children(self, by_isa):
+        parent_of = {}
+        for isa in GROUP_ISAS:
+            for group_id, group in by_isa.get(isa, {}).items():
+                seen = set()
+                for child in group.fields.get('children', ()):
+                    if child in seen:
+                        self.issue('duplicate-child', group_id,
+                                   f"group {self.describe(group_id)} lists {self.describe(child)} twice")
+                        continue
+                    seen.add(child)
+                    other = parent_of.setdefault(child, group_id)
+                    if other != group_id:
+                        self.issue('multiple-parents', child,
+                                   f"{self.describe(child)} is a child of both {self.describe(other)} "
+                                   f"and {self.describe(group_id)}")
+
+    def phase_membership(self, by_isa):
+        phase_of = {}
+        for isa, members in by_isa.items():
+            if not isa.endswith(_PHASE_SUFFIX):
+                continue
+            for phase_id, phase in members.items():
+                for build_id in phase.fields.get('files', ()):
+                    other = phase_of.setdefault(build_id, phase_id)
+                    if other != phase_id:
+                        self.issue('build-file-phases', build_id,
+                                   f"build file {self.describe(build_id)} is listed in both "
+                                   f"{self.describe(other)} and {self.describe(phase_id)}")
+
+    def dangling(self, missing):
+        project = self.project
+        if project.header.get('rootObject') in missing:
+            self.issue('dangling-reference', None,
+                       f"rootObject refers to missing object {project.header.get('rootObject')}")
+        for object_id, obj in project.objects.items():
+            for key, value in obj.fields.items():
+                if key in REFERENCE_LIST_KEYS:
+                    refs = [ref for ref in value if ref in missing]
+                elif key in REFERENCE_KEYS and value in missing:
+                    refs = [value]
+                else:
+                    continue
+                for ref in refs:
+                    self.issue('dangling-reference', object_id,
+                               f"{self.describe(object_id)} {key} refers to missing object {ref}")
+
+    def duplicate_paths(self, file_refs, parent_of):
+        """File references whose resolved (source tree, path) collide.
+
+        Paths inside the project resolve to ('<group>', path) whether they
+        get there through group folders or SOURCE_ROOT. While no path has a
+        slash in it and nothing is relative to SOURCE_ROOT, (parent folder,
+        path) identifies a group-relative file as well as its full path
+        does, so full paths are only built when that does not hold or
+        something collides.
+        """
+        objects = self.project.objects
+        paths = {}
+
+        def group_path(group_id, depth=0):
+            result = paths.get(group_id)
+            if result is not None:
+                return result
+            group = objects.get(group_id)
+            parent = parent_of.get(group_id)
+            tree = group.get('sourceTree', '<group>')
+            if tree == '<group>' and parent is not None and depth <= 64:
+                base_tree, base = group_path(parent, depth + 1)
+                result = (base_tree, join(base, group_component(group)))
+            elif tree == '<group>' or tree == 'SOURCE_ROOT':
+                result = ('<group>', group_component(group) if parent is not None else '')
+            else:
+                result = (tree, group_component(group))
+            paths[group_id] = result
+            return result
+
+        ref_ids = list(file_refs)
+        trees = [ref.fields.get('sourceTree') for ref in file_refs.values()]
+        names = [ref.fields.get('path') or ref.fields.get('name') or '' for ref in file_refs.values()]
+        if 'SOURCE_ROOT' not in trees and '/' not in '\n'.join(names):
+            folders = {}
+            canonical = {group_id: folders.setdefault(group_path(group_id), group_id)
+                         for group_id in set(parent_of.values())}
+            owners = [canonical.get(parent) if tree == '<group>' else tree
+                      for tree, parent in zip(trees, map(parent_of.get, ref_ids))]
+            keys = [key for key in zip(owners, names) if key[0] is not None]
+            if len(set(keys)) == len(keys):
+                return
+
+        seen = {}
+        for ref_id, tree, name in zip(ref_ids, trees, names):
+            path = name
+            if tree == '<group>':
+                parent = parent_of.get(ref_id)
+                if parent is None:
+                    continue
+                tree, base = group_path(parent)
+                path = join(base, name)
+            elif tree == 'SOURCE_ROOT':
+                tree = '<group>'
+            other = seen.setdefault((tree, path), ref_id)
+            if other != ref_id:
+                self.issue('duplicate-file-ref', ref_id,
+                           f"{self.describe(ref_id)} and {self.describe(other)} both point at {path}")
@@ -0,0 +1,260 @@
+"""
+Serializer that writes an object graph back in Xcode's own pbxproj layout
+"""
+
+import re
+from bisect import bisect_right
+
+from . import trace
+
+HEADER = '// !$*UTF8*$!\n'
+
+# Objects Xcode writes on a single line
+_INLINE_ISAS = frozenset(('PBXBuildFile', 'PBXFileReference'))
+
+# Keys whose ID values Xcode writes without a /* comment */
+_UNCOMMENTED_KEYS = frozenset(('remoteGlobalIDString', 'TestTargetID'))
+
+_BARE_RE = re.compile(r'^[A-Za-z0-9_$/:.]+$')
+
+
+def quote(value):
+    """Quote a string the way Xcode does"""
+    if value and _BARE_RE.match(value) and '//' not in value and '___' not in value:
+        return value
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"')
+               .replace('\n', '\\n').replace('\t', '\\t'))
+    return f'"{escaped}"'
+
+
+class Writer:
+    """Formats values of one project, annotating object references"""
+
+    def __init__(self, objects):
+        self.objects = objects
+
+    def scalar(self, value, key=None):
+        text = quote(value)
+        if key not in _UNCOMMENTED_KEYS:
+            obj = self.objects.get(value)
+            if obj is not None and obj.comment:
+                text += f' /* {obj.comment} */'
+        return text
+
+    def value(self, value, depth, key=None):
+        if isinstance(value, str):
+            return self.scalar(value, key)
+        indent = '\t' * depth
+        if isinstance(value, dict):
+            lines = ['{\n']
+            for k, v in _sorted_items(value):
+                lines.append(f'{indent}\t{quote(k)} = {self.value(v, depth + 1, k)};\n')
+            lines.append(f'{indent}}}')
+            return ''.join(lines)
+        lines = ['(\n']
+        for item in value:
+            lines.append(f'{indent}\t{self.value(item, depth + 1, key)},\n')
+        lines.append(f'{indent})')
+        return ''.join(lines)
+
+    def inline(self, value, key=None):
+        if isinstance(value, str):
+            return self.scalar(value, key)
+        if isinstance(value, dict):
+            body = ''.join(f'{quote(k)} = {self.inline(v, k)}; ' for k, v in _sorted_items(value))
+            return '{' + body + '}'
+        return '(' + ''.join(f'{self.inline(item, key)}, ' for item in value) + ')'
+
+    def object(self, obj):
+        """Format one `ID /* comment */ = {...};` entry of the objects dictionary"""
+        key = f'{obj.id} /* {obj.comment} */' if obj.comment else obj.id
+        if obj.isa in _INLINE_ISAS:
+            return f'\t\t{key} = {self.inline(obj.fields)};\n'
+        return f'\t\t{key} = {self.value(obj.fields, 2)};\n'
+
+    def sections(self):
+        """Format the body of the objects dictionary, one section per isa"""
+        by_isa = {}
+        for obj in self.objects.values():
+            by_isa.setdefault(obj.isa, []).append(obj)
+        parts = []
+        for isa in sorted(by_isa):
+            parts.append(f'\n/* Begin {isa} section */\n')
+            for obj in sorted(by_isa[isa], key=lambda o: o.id):
+                parts.append(self.object(obj))
+            parts.append(f'/* End {isa} section */\n')
+        return ''.join(parts)
+
+    def document(self, header):
+        """Format the whole file"""
+        parts = [HEADER, '{\n']
+        items = dict(header)
+        items['objects'] = None
+        for key in sorted(items):
+            if key == 'objects':
+                parts.append(f'\tobjects = {{\n{self.sections()}\t}};\n')
+            else:
+                parts.append(f'\t{quote(key)} = {self.value(items[key], 1, key)};\n')
+        parts.append('}\n')
+        return ''.join(parts)
+
+
+def _sorted_items(fields):
+    """isa first, then the remaining keys in Xcode's alphabetical order"""
+    if 'isa' in fields:
+        yield 'isa', fields['isa']
+    for key in sorted(fields):
+        if key != 'isa':
+            yield key, fields[key]
+
+
+_SECTION_RE = re.compile(r'^/\* (Begin|End) (\w+) section \*/\n', re.MULTILINE)
+
+
+def line_span(text, start, end):
+    """Widen an object's key..`;` range to whole lines"""
+    start = text.rfind('\n', 0, start) + 1
+    if text.startswith('\n', end):
+        end += 1
+    return start, end
+
+
+def scan_sections(text):
+    """Map isa -> (block_start, end_marker_start, block_end) for every section.
+
+    A block runs from the blank line before `/* Begin ... */` through the
+    newline after `/* End ... */`, matching what Writer.sections() emits.
+    """
+    trace.count('regex_scans')
+    trace.count('chars_scanned', len(text))
+    sections = {}
+    begins = {}
+    for match in _SECTION_RE.finditer(text):
+        kind, isa = match.groups()
+        if kind == 'Begin':
+            begins[isa] = match.start() - 1 if text.startswith('\n', match.start() - 1) else match.start()
+        elif isa in begins:
+            sections[isa] = (begins.pop(isa), match.start(), match.end())
+    return sections
+
+
+class Splice:
+    """Offset-preserving rewrite of a previously parsed project.pbxproj.
+
+    Only changed objects are re-rendered; everything else is copied from the
+    original text, so the cost and the resulting diff are proportional to the
+    number of changes rather than the size of the file.
+    """
+
+    def __init__(self, source, spans, sections, objects, by_isa):
+        self.source = source
+        self.spans = spans
+        self.sections = sections
+        self.objects = objects
+        self.by_isa = by_isa
+        self.writer = Writer(objects)
+
+    def patches(self, dirty, added, removed):
+        """Sorted, non-overlapping (start, end, [(object_id, text), ...]) edits.
+
+        Returns None when the change cannot be expressed as a splice (for
+        example when the file has no section markers to anchor insertions).
+        """
+        patches = []
+        emptied = set()
+        for isa in {self.spans[object_id][2] for object_id in removed}:
+            if not self.by_isa.get(isa):
+                if isa not in self.sections:
+                    return None
+                block_start, _, block_end = self.sections[isa]
+                patches.append((block_start, block_end, []))
+                emptied.add(isa)
+
+        for object_id in removed:
+            start, end, isa = self.spans[object_id]
+            if isa not in emptied:
+                patches.append((start, end, []))
+
+        for object_id in dirty:
+            start, end, _ = self.spans[object_id]
+            obj = self.objects[object_id]
+            patches.append((start, end, [(object_id, self.writer.object(obj))]))
+
+        new_by_isa = {}
+        for object_id in added:
+            new_by_isa.setdefault(self.objects[object_id].isa, []).append(object_id)
+        for isa, ids in new_by_isa.items():
+            ids.sort()
+            if isa in self.sections:
+                patches.extend(self._insert_into_section(isa, ids))
+            else:
+                patch = self._new_section(isa, ids)
+                if patch is None:
+                    return None
+                patches.append(patch)
+
+        patches.sort(key=lambda p: (p[0], p[1]))
+        return patches
+
+    def _insert_into_section(self, isa, ids):
+        spans = self.spans
+        existing = sorted(
+            (object_id, spans[object_id][0]) for object_id in self.by_isa[isa] if object_id in spans
+        )
+        existing_ids = [object_id for object_id, _ in existing]
+        end_marker = self.sections[isa][1]
+        points = {}
+        for object_id in ids:
+            i = bisect_right(existing_ids, object_id)
+            point = existing[i][1] if i < len(existing) else end_marker
+            points.setdefault(point, []).append(object_id)
+        return [
+            (point, point, [(object_id, self.writer.object(self.objects[object_id])) for object_id in group])
+            for point, group in points.items()
+        ]
+
+    def _new_section(self, isa, ids):
+        if not self.sections:
+            return None
+        later = [name for name in self.sections if name > isa]
+        if later:
+            point = self.sections[min(later)][0]
+        else:
+            point = self.sections[max(self.sections)][2]
+        pieces = [(None, f'\n/* Begin {isa} section */\n')]
+        pieces.extend((object_id, self.writer.object(self.objects[object_id])) for object_id in ids)
+        pieces.append((None, f'/* End {isa} section */\n'))
+        return point, point, pieces
+
+    def apply(self, patches):
+        """Build the new text and the object spans within it"""
+        source = self.source
+        out = []
+        out_len = 0
+        cursor = 0
+        new_spans = {}
+        shifts = []
+        for start, end, pieces in patches:
+            out.append(source[cursor:start])
+            out_len += start - cursor
+            for object_id, text in pieces:
+                if object_id is not None:
+                    new_spans[object_id] = (out_len, out_len + len(text), self.objects[object_id].isa)
+                out.append(text)
+                out_len += len(text)
+            cursor = end
+            shifts.append((end, out_len - end))
+        out.append(source[cursor:])
+        text = ''.join(out)
+        if trace.enabled():
+            trace.count('chars_copied', len(source) - sum(end - start for start, end, _ in patches))
+            trace.count('chars_rendered', sum(len(piece) for _, _, pieces in patches for _, piece in pieces))
+
+        ends = [end for end, _ in shifts]
+        for object_id, (start, end, isa) in self.spans.items():
+            if object_id in new_spans or object_id not in self.objects:
+                continue
+            i = bisect_right(ends, start)
+            delta = shifts[i - 1][1] if i else 0
+            new_spans[object_id] = (start + delta, end + delta, isa)
+        return text, new_spans
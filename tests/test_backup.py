@@ -0,0 +1,49 @@
+"""
+Snapshot, restore and latest-ordering of the project backup store
+"""
+
+from pathlib import Path
+
+import pytest
+
+from pbxtools.backup import BackupStore
+
+PROJECT = Path(__file__).resolve().parent.parent / 'SmartLockBox.xcodeproj' / 'project.pbxproj'
+
+
+def test_latest_follows_the_last_snapshot_call(tmp_path):
+    project = tmp_path / 'project.pbxproj'
+    store = BackupStore(tmp_path / 'backups')
+    project.write_bytes(b'A\n' * 2000)
+    first = store.snapshot(project)
+    project.write_bytes(b'B\n' * 2000)
+    store.snapshot(project)
+    project.write_bytes(b'A\n' * 2000)
+    again = store.snapshot(project)
+    project.write_bytes(b'broken')
+
+    restored = BackupStore(tmp_path / 'backups').restore('latest', project)
+
+    assert again is first and restored.digest == first.digest
+    assert project.read_bytes() == b'A\n' * 2000
+
+
+def test_restore_round_trips_each_snapshot_and_rejects_corruption(tmp_path):
+    project = tmp_path / 'project.pbxproj'
+    store = BackupStore(tmp_path / 'backups')
+    original = PROJECT.read_bytes()
+    project.write_bytes(original)
+    first = store.snapshot(project)
+    edited = original.replace(b'SmartLockBoxTests', b'SmartLockBoxSpecs')
+    project.write_bytes(edited)
+    second = store.snapshot(project)
+
+    store.restore(first.id, project)
+    assert project.read_bytes() == original
+    store.restore(second.id, project)
+    assert project.read_bytes() == edited
+
+    store._chunk_path(first.chunks[0]).write_bytes(b'garbage')
+    with pytest.raises(ValueError):
+        store.restore(first.id, project)
+    assert project.read_bytes() == edited
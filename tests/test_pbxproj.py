@@ -0,0 +1,394 @@
+"""
+Parsing, editing, syncing and saving project.pbxproj, plus the bench and tracing hooks
+"""
+
+import difflib
+import shutil
+from pathlib import Path
+
+import pytest
+
+from pbxtools import (
+    ExtensionSpec,
+    IDAllocator,
+    PBXObject,
+    PBXProject,
+    ProjectEdit,
+    SynchronizedFolders,
+    add_extension,
+    bench,
+    build_file,
+    cache,
+    file_reference,
+    group,
+    trace,
+    validate,
+)
+from pbxtools.edit import HEADERS, phase_for
+from pbxtools.sync import sync
+
+PROJECT = Path(__file__).resolve().parent.parent / 'SmartLockBox.xcodeproj' / 'project.pbxproj'
+
+
+@pytest.fixture
+def project_file(tmp_path):
+    path = tmp_path / 'SmartLockBox.xcodeproj' / 'project.pbxproj'
+    path.parent.mkdir()
+    shutil.copy(PROJECT, path)
+    return path
+
+
+@pytest.mark.parametrize('source', ['SmartLockBox', 'synthetic'])
+def test_parse_and_serialize_round_trip(source):
+    text = PROJECT.read_text(encoding='utf-8') if source == 'SmartLockBox' else bench.synthetic_project(300)
+    project = PBXProject.parse(text)
+
+    assert project.serialize() == text
+    assert PBXProject.parse(project.serialize()).serialize() == text
+
+
+def test_edited_project_reloads_to_the_same_text(project_file):
+    with ProjectEdit.open(project_file, seed='reload') as edit:
+        edit.add_file('Scripts/Tool.swift', targets=['SmartLockBoxTests'])
+        edit.add_file('Scripts/Notes.json', group='Docs')
+    saved = project_file.read_text(encoding='utf-8')
+
+    assert PBXProject.load(project_file, use_cache=False).serialize() == saved
+
+
+def test_save_patches_only_the_changed_object(project_file):
+    before = project_file.read_text(encoding='utf-8')
+    project = PBXProject.load(project_file, use_cache=False)
+    target = project.target('SmartLockBoxUITests')
+    target['productName'] = 'UITests'
+    project.touch(target)
+    project.save()
+    saved = project_file.read_text(encoding='utf-8')
+
+    changed = [line for line in difflib.ndiff(before.splitlines(), saved.splitlines()) if line[:1] in '+-']
+    assert changed == ['- \t\t\tproductName = SmartLockBoxUITests;', '+ \t\t\tproductName = UITests;']
+    assert saved == project.serialize()
+
+    project.save()
+    assert project_file.read_text(encoding='utf-8') == saved
+
+
+def test_crlf_project_saves_in_place_without_corruption(project_file):
+    text = project_file.read_bytes().replace(b'\n', b'\r\n')
+    project_file.write_bytes(text)
+
+    with ProjectEdit.open(project_file, seed='crlf') as edit:
+        edit.add_file('Scripts/Tool.swift')
+    reloaded = PBXProject.load(project_file, use_cache=False)
+
+    assert any(obj.get('path') == 'Tool.swift' for obj in reloaded.objects_of('PBXFileReference'))
+    assert b'\r' not in project_file.read_bytes()
+    assert project_file.read_text(encoding='utf-8') == reloaded.serialize()
+
+
+def test_seeded_ids_are_reproducible_and_skip_taken_ones():
+    first = IDAllocator(seed='ids').new('PBXFileReference', 'A.swift')
+    again = IDAllocator(seed='ids')
+
+    assert again.new('PBXFileReference', 'A.swift') == first
+    assert len(first) == 24 and first == first.upper()
+    assert IDAllocator({first}, seed='ids').new('PBXFileReference', 'A.swift') != first
+    assert again.new('PBXFileReference', 'A.swift') != first
+    assert len(set(IDAllocator().bulk(1000))) == 1000
+
+
+def test_seeded_edits_write_identical_files(project_file, tmp_path):
+    other = tmp_path / 'Other.pbxproj'
+    shutil.copy(project_file, other)
+    for path in (project_file, other):
+        with ProjectEdit.open(path, seed='same') as edit:
+            edit.add_files(['Scripts/A.swift', 'Scripts/B.swift'], targets=['SmartLockBoxTests'])
+
+    assert project_file.read_bytes() == other.read_bytes()
+
+
+def test_file_listed_under_another_group_resolves_to_its_path(project_file):
+    with ProjectEdit.open(project_file, seed='group') as edit:
+        edit.add_file('Scripts/Tool.swift', group='Tools')
+    project = PBXProject.load(project_file, use_cache=False)
+
+    ref = project.index.file('Scripts/Tool.swift')
+    assert ref is not None and ref['sourceTree'] == 'SOURCE_ROOT'
+    assert ref.id in project.group('Tools')['children']
+
+
+def test_missing_phase_fails_before_changing_the_project(project_file):
+    project = PBXProject.load(project_file, use_cache=False)
+    before = project.serialize()
+    edit = ProjectEdit(project_file, seed='phase', project=project)
+    edit.add_file('Scripts/Tool.swift', targets=['SmartLockBox'])
+    edit.add_to_phase('Scripts/Tool.swift', 'SmartLockBoxTests', 'PBXHeadersBuildPhase')
+
+    with pytest.raises(KeyError):
+        edit.apply()
+    assert project.serialize() == before
+
+
+def test_headers_are_only_built_by_frameworks(project_file):
+    with ProjectEdit.open(project_file, seed='headers') as edit:
+        edit.add_file('Scripts/Bridge.h', targets=['SmartLockBoxTests'])
+    project = PBXProject.load(project_file, use_cache=False)
+
+    ref = project.index.file('Scripts/Bridge.h')
+    assert ref is not None
+    assert all(build.get('fileRef') != ref.id for build in project.objects_of('PBXBuildFile'))
+    assert phase_for('Bridge.h', 'com.apple.product-type.framework') == HEADERS
+
+
+def test_synchronized_folders_only_get_membership_exceptions(project_file):
+    before = project_file.read_text(encoding='utf-8')
+    path = 'SmartLockBox/Views/Shared.swift'
+
+    with ProjectEdit.open(project_file, seed='synced') as edit:
+        edit.add_file(path, targets=['SmartLockBox'])
+    assert project_file.read_text(encoding='utf-8') == before
+
+    with ProjectEdit.open(project_file, seed='synced') as edit:
+        edit.add_file(path, targets=['SmartLockBox', 'SmartLockBoxTests'])
+    project = PBXProject.load(project_file, use_cache=False)
+    synced, tests = SynchronizedFolders(project), project.target('SmartLockBoxTests')
+    exceptions = synced.exceptions(project.index.synchronized['SmartLockBox'], tests)
+
+    assert project.index.file(path) is None and synced.is_member(path, tests)
+    assert exceptions['membershipExceptions'] == ['Views/Shared.swift']
+
+    with ProjectEdit.open(project_file, seed='synced') as edit:
+        edit.remove_file(path)
+    assert project_file.read_text(encoding='utf-8') == before
+
+
+def _virtual_group_project(project_file):
+    """Ext/ folder group holding a name-only Logic group with A.swift"""
+    project = PBXProject.load(project_file, use_cache=False)
+    ids = project.ids
+    ext = project.add(group(ids.new(), 'Ext'))
+    logic = project.add(PBXObject(ids.new(), {'isa': 'PBXGroup', 'children': [], 'name': 'Logic',
+                                              'sourceTree': '<group>'}, 'Logic'))
+    ref = project.add(file_reference(ids.new(), 'A.swift'))
+    logic['children'].append(ref.id)
+    ext['children'].append(logic.id)
+    project.main_group['children'].append(ext.id)
+    project.touch(project.main_group)
+    project.reindex()
+    return project, ext, ref
+
+
+def test_name_only_groups_add_no_folder(project_file):
+    project, ext, ref = _virtual_group_project(project_file)
+
+    assert project.index.file('Ext/A.swift') is ref
+    assert project.group('Ext') is ext
+    assert project.group('Ext/Logic') is None
+
+
+def test_sdk_files_are_outside_the_source_tree(project_file):
+    project = PBXProject.load(project_file, use_cache=False)
+    sdk = project.add(PBXObject(project.ids.new(), {
+        'isa': 'PBXFileReference', 'name': 'WidgetKit.framework',
+        'path': 'System/Library/Frameworks/WidgetKit.framework', 'sourceTree': 'SDKROOT',
+    }, 'WidgetKit.framework'))
+    project.main_group['children'].append(sdk.id)
+    project.reindex()
+
+    assert sdk not in project.index.files.values()
+
+
+def test_duplicate_through_virtual_group_is_reported(project_file):
+    project, ext, _ = _virtual_group_project(project_file)
+    twin = project.add(file_reference(project.ids.new(), 'A.swift'))
+    ext['children'].append(twin.id)
+
+    assert [issue.code for issue in validate.validate(project)] == ['duplicate-file-ref']
+
+
+def test_sync_keeps_files_in_virtual_groups(project_file):
+    project, _, _ = _virtual_group_project(project_file)
+    project.save()
+    (project_file.parent.parent / 'Ext').mkdir()
+    (project_file.parent.parent / 'Ext' / 'A.swift').write_text('')
+
+    result = sync(project_file, roots={'Ext': ()}, use_cache=False)
+
+    assert (result.added, result.removed, result.missing) == ([], [], [])
+
+
+def test_sync_only_removes_missing_files_when_asked(project_file):
+    project, _, ref = _virtual_group_project(project_file)
+    project.save()
+    (project_file.parent.parent / 'Ext').mkdir()
+
+    kept = sync(project_file, roots={'Ext': ()}, use_cache=False)
+    assert (kept.removed, kept.missing) == ([], ['Ext/A.swift'])
+    assert ref.id in PBXProject.load(project_file, use_cache=False)
+
+    removed = sync(project_file, roots={'Ext': ()}, use_cache=False, remove=True)
+    assert removed.removed == ['Ext/A.swift']
+    assert ref.id not in PBXProject.load(project_file, use_cache=False)
+
+
+def test_sync_leaves_folders_of_missing_targets_alone(project_file):
+    before = project_file.read_text(encoding='utf-8')
+    folder = project_file.parent.parent / 'DeviceActivityMonitorExtension'
+    folder.mkdir()
+    (folder / 'DeviceActivityMonitor.swift').write_text('')
+
+    result = sync(project_file, roots={'DeviceActivityMonitorExtension': ('DeviceActivityMonitorExtension',)},
+                  use_cache=False)
+
+    assert result.added == [] and len(result.warnings) == 1
+    assert project_file.read_text(encoding='utf-8') == before
+
+
+def test_extension_reuses_references_sync_already_added(project_file):
+    folder = project_file.parent.parent / 'DeviceActivityMonitorExtension'
+    folder.mkdir()
+    for name in ('DeviceActivityMonitor.swift', 'Info.plist', 'DeviceActivityMonitorExtension.entitlements'):
+        (folder / name).write_text('')
+    synced = sync(project_file, roots={'DeviceActivityMonitorExtension': ()}, use_cache=False)
+    project = PBXProject.load(project_file, use_cache=False)
+    known = {path: project.index.file(path).id for path in synced.added}
+
+    spec = ExtensionSpec('DeviceActivityMonitorExtension', 'device-activity-monitor', host='SmartLockBox',
+                         sources=['DeviceActivityMonitor.swift'])
+    extension = add_extension(project, spec)
+    project.save()
+
+    assert len(known) == 3
+    assert {ref.id for ref in extension.files} == set(known.values())
+    assert validate.validate(PBXProject.load(project_file, use_cache=False)) == []
+
+
+def test_cache_is_plain_json_and_round_trips(project_file):
+    parsed = PBXProject.load(project_file, use_cache=True)
+    cache_file = cache.cache_file(project_file)
+    cached = PBXProject.load(project_file, use_cache=True)
+
+    assert cache_file.read_text(encoding='utf-8').count('\n') == 2
+    assert cached.serialize() == parsed.serialize() == project_file.read_text(encoding='utf-8')
+
+    with ProjectEdit.open(project_file, seed='cache', project=cached) as edit:
+        edit.add_file('Scripts/Tool.swift')
+    assert not cache_file.exists()
+    assert PBXProject.load(project_file, use_cache=True).serialize() == project_file.read_text(encoding='utf-8')
+
+
+@pytest.fixture
+def synthetic_file(tmp_path):
+    path = tmp_path / 'Bench.xcodeproj' / 'project.pbxproj'
+    path.parent.mkdir()
+    path.write_text(bench.synthetic_project(300), encoding='utf-8')
+    return path
+
+
+def _save_issues(project):
+    with pytest.raises(validate.ValidationError) as raised:
+        project.save()
+    return sorted(issue.code for issue in raised.value.issues)
+
+
+def test_save_checks_removed_objects_still_referenced(synthetic_file):
+    project = PBXProject.load(synthetic_file, use_cache=False)
+    build = project.objects_of('PBXBuildFile')[0]
+    project.remove(build['fileRef'])
+
+    # Both the build file and the group still point at it
+    assert _save_issues(project) == ['dangling-reference', 'dangling-reference']
+
+
+def test_save_checks_new_build_files_and_paths(synthetic_file):
+    project = PBXProject.load(synthetic_file, use_cache=False)
+    ref = project.objects_of('PBXFileReference')[-1]
+    parent = project.index.parents[ref.id]
+    project.index.files
+    twin = project.add(file_reference(project.ids.new(), ref['path']))
+    parent['children'].append(twin.id)
+    project.touch(parent)
+    project.add(build_file(project.ids.new(), twin))
+
+    assert _save_issues(project) == ['build-file-phases', 'duplicate-file-ref']
+
+
+def test_save_accepts_sound_edits(synthetic_file):
+    with ProjectEdit.open(synthetic_file, seed='sound') as edit:
+        edit.add_file('SmartLockBox/Added/New.swift', targets=['SmartLockBox'])
+        edit.remove_file(next(path for path in PBXProject.load(synthetic_file).index.files
+                              if path.endswith('.swift')))
+
+    assert validate.validate(PBXProject.load(synthetic_file, use_cache=False)) == []
+
+
+def test_batch_edit_is_written_once_on_commit(project_file):
+    before = project_file.read_text(encoding='utf-8')
+    edit = ProjectEdit.open(project_file, seed='batch')
+    edit.add_files(['Scripts/A.swift', 'Scripts/B.swift', 'Scripts/C.json'], targets=['SmartLockBoxTests'])
+
+    assert len(edit) == 6 and project_file.read_text(encoding='utf-8') == before
+    summary = edit.commit()
+
+    assert (summary['groups'], summary['files'], summary['build_files']) == (1, 3, 3)
+    assert len(edit) == 0
+    project = PBXProject.load(project_file, use_cache=False)
+    assert all(project.index.file(f'Scripts/{name}') for name in ('A.swift', 'B.swift', 'C.json'))
+
+
+def test_targets_and_phases_are_looked_up_from_the_index(synthetic_file):
+    project = PBXProject.load(synthetic_file, use_cache=False)
+    targets = project.objects_of('PBXNativeTarget')
+
+    assert len(targets) > 1 and project.target('Missing') is None
+    for target in targets:
+        assert project.target(target['name']) is target
+        for isa in ('PBXSourcesBuildPhase', 'PBXResourcesBuildPhase'):
+            phase = project.build_phase(target, isa)
+            assert phase['isa'] == isa and phase.id in target['buildPhases']
+
+
+def test_bench_times_every_stage_and_compares_runs(tmp_path):
+    results = bench.bench_size(300, tmp_path, targets=2, add=20, lookups=10, repeat=1)
+    document = {'results': results}
+
+    assert [result['stage'] for result in results] == [
+        'parse', 'load', 'load_cold_cache', 'load_warm_cache', 'lookup', 'add_files', 'validate',
+        'validate_changes', 'serialize']
+    assert all(result['best'] > 0 and result['peak_bytes'] > 0 for result in results)
+    assert len(bench.compare(document, document)) == len(results)
+    assert bench.synthetic_project(300, 2) == bench.synthetic_project(300, 2)
+
+
+def test_tracing_records_nested_spans_and_counters(project_file, monkeypatch):
+    monkeypatch.setattr(trace, '_tracer', None)
+    assert trace.span('off') is trace.span('also off')
+
+    tracer = trace.start()
+    with ProjectEdit.open(project_file, seed='trace') as edit:
+        edit.add_file('Scripts/Tool.swift', targets=['SmartLockBoxTests'])
+    assert trace.stop() is tracer
+
+    spans = {span.name: span for span in tracer.spans}
+    assert {'load', 'commit', 'apply', 'save'} <= set(spans)
+    assert spans['apply'].depth == spans['save'].depth == spans['commit'].depth + 1
+    assert spans['save'].counts['objects_added'] == tracer.counters['objects_added'] == 3
+    assert spans['commit'].args['files'] == 1
+    events = tracer.chrome_trace()['traceEvents']
+    assert [event['ph'] for event in events].count('X') == len(tracer.spans)
+
+
+def test_shared_files_fan_out_to_every_target_once(synthetic_file):
+    names = [target['name'] for target in PBXProject.load(synthetic_file).objects_of('PBXNativeTarget')]
+    shared = ['Shared/Model.swift', 'Shared/Strings.json']
+
+    first = ProjectEdit.open(synthetic_file, seed='fan-out').add_files(shared, targets=names).commit()
+    again = ProjectEdit.open(synthetic_file, seed='fan-out').add_files(shared, targets=names).commit()
+    project = PBXProject.load(synthetic_file, use_cache=False)
+
+    assert (first['files'], first['build_files']) == (2, 2 * len(names))
+    assert (again['files'], again['build_files']) == (0, 0)
+    for path in shared:
+        ref = project.index.file(path)
+        builds = [build for build in project.objects_of('PBXBuildFile') if build.get('fileRef') == ref.id]
+        assert len(builds) == len(names) > 1
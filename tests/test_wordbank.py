@@ -0,0 +1,279 @@
+"""
+Word-bank generation: dedup, ordering and IDs, every output format, builds and the bench
+"""
+
+import io
+import json
+
+import pytest
+
+import generate_words
+from wordbank import (
+    BinaryBankReader,
+    BinaryBankWriter,
+    IndexPermutation,
+    LocaleJob,
+    SearchIndex,
+    StableOrder,
+    WordBankFormatError,
+    WordTable,
+    bench,
+    build,
+    dedup,
+    difficulty,
+    ids,
+    iter_stable_words,
+    iter_words,
+    pairs,
+    sample_pairs,
+    score_difficulty,
+    update_bank,
+    write_bank,
+    write_words_json,
+)
+
+
+def _columns():
+    return WordTable(dedup(generate_words.words_data)[0]).columns()
+
+
+def test_dedup_drops_repeats_and_reports_conflicts():
+    words_data = {
+        'nouns': [('물', 'water'), (' 물', 'Water '), ('눈', 'eye'), ('눈', 'snow')],
+        'adjectives': [('\u1106\u116e\u11af', 'water'), ('차가운', 'cold'), ('추운', 'cold')],
+    }
+
+    clean, report = dedup(words_data)
+
+    assert clean == {'nouns': [('물', 'water'), ('눈', 'eye'), ('눈', 'snow')],
+                     'adjectives': [('차가운', 'cold'), ('추운', 'cold')]}
+    assert report.duplicates == [('nouns', '물', 'Water'), ('adjectives', '물', 'water')]
+    assert report.korean_conflicts == {'눈': ['eye', 'snow']}
+    assert report.english_conflicts == {'cold': ['차가운', '추운']}
+
+
+def test_adding_words_keeps_existing_difficulties():
+    korean, english = _columns()
+    before = score_difficulty(korean, english)
+    extra_korean = ['초신성', '양자역학', '광합성'] * 50
+    extra_english = ['supernova', 'quantum mechanics', 'photosynthesis'] * 50
+
+    after = score_difficulty(korean + extra_korean, english + extra_english)
+
+    assert after[:len(before)] == before
+
+
+def test_pure_python_scoring_matches_numpy(monkeypatch):
+    korean, english = _columns()
+    expected = score_difficulty(korean, english)
+    monkeypatch.setattr(difficulty, 'np', None)
+
+    assert score_difficulty(korean, english) == expected
+
+
+def test_ids_and_order_survive_regeneration():
+    clean = dedup(generate_words.words_data)[0]
+    grown = {**clean, 'nouns': clean['nouns'] + [('초신성', 'supernova')]}
+
+    def bank(words_data, seed):
+        return [(word['id'], word['english']) for word in iter_stable_words(WordTable(words_data), seed=seed)]
+
+    before = bank(clean, 'seed')
+    after = bank(grown, 'seed')
+    reseeded = bank(clean, 'other')
+
+    assert bank(clean, 'seed') == before
+    assert [word for word in after if word[1] != 'supernova'] == before
+    assert sorted(reseeded) == sorted(before) and reseeded != before
+
+
+def test_colliding_ids_are_settled_by_content_alone(monkeypatch):
+    monkeypatch.setattr(ids, '_ID_MASK', 0x3F)
+    rows = [(f'단어{i}', f'word{i}') for i in range(40)]
+
+    def assigned(rows, seed):
+        table = WordTable({'nouns': rows})
+        return {word['english']: word['id'] for word in iter_stable_words(table, seed=seed)}
+
+    first = assigned(rows, 'a')
+
+    assert len(set(first.values())) == len(rows)
+    assert assigned(rows[::-1], 'b') == first
+
+
+@pytest.mark.parametrize('n', [1, 2, 7, 1000, 1025])
+def test_index_permutation_is_a_seeded_bijection(n):
+    order = list(IndexPermutation(n, seed='perm'))
+
+    assert sorted(order) == list(range(n))
+    assert list(IndexPermutation(n, seed='perm')) == order
+
+
+def test_streamed_words_json_holds_the_first_target_count_words():
+    table = generate_words.clean_table()[0]
+    out = io.StringIO()
+
+    count = write_words_json(out, iter_words(table, 300, seed='stream'), {"version": "2.0"})
+    bank = json.loads(out.getvalue())
+
+    assert count == 300 and [word['id'] for word in bank['words']] == list(range(1, 301))
+    assert bank['metadata'] == {"total_count": 300, "version": "2.0"}
+    assert len({(word['korean'], word['english']) for word in bank['words']}) == 300
+
+
+def test_binary_bank_round_trips_the_json_records(tmp_path):
+    table = generate_words.clean_table()[0]
+    json_path, binary_path = tmp_path / 'Words.json', tmp_path / 'Words.bin'
+
+    write_bank(json_path, table, {}, 500, 'round-trip', binary_path)
+    bank = json.loads(json_path.read_text(encoding='utf-8'))
+
+    with BinaryBankReader(binary_path) as reader:
+        assert list(reader) == bank['words']
+
+
+def test_default_build_writes_the_indexes_into_words_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_words, 'RESOURCES', str(tmp_path))
+    generate_words.main(['--pairs', '0'])
+    bank = json.loads((tmp_path / 'Words.json').read_text(encoding='utf-8'))
+
+    indexes = bank['indexes']
+    by_category = {word['category']: [] for word in bank['words']}
+    for word in bank['words']:
+        by_category[word['category']].append(word['id'])
+    assert indexes['by_category'] == {c: sorted(ids) for c, ids in sorted(by_category.items())}
+    assert sum(map(len, indexes['by_difficulty'].values())) == len(bank['words'])
+
+
+def test_binary_bank_reads_records_at_random_and_rejects_other_files(tmp_path):
+    path = tmp_path / 'Words.bin'
+    words = [word for word in StableOrder(WordTable({'nouns': [('물', 'water'), ('꽃잎', 'petal')],
+                                                     'adjectives': [('푸른', 'blue')]}), seed='bin')]
+    with BinaryBankWriter(path) as bank:
+        for word in words:
+            bank.add(word)
+
+    with BinaryBankReader(path) as reader:
+        assert len(reader) == len(words)
+        assert [reader[i] for i in reversed(range(len(words)))] == words[::-1]
+
+    (tmp_path / 'Other.bin').write_bytes(b'WPRS' + path.read_bytes()[4:])
+    (tmp_path / 'Short.bin').write_bytes(path.read_bytes()[:8])
+    for name in ('Other.bin', 'Short.bin'):
+        with pytest.raises(WordBankFormatError):
+            BinaryBankReader(tmp_path / name)
+
+
+def test_parallel_locale_builds_match_sequential_ones(tmp_path):
+    source = tmp_path / 'extra.tsv'
+    source.write_text('# category, korean, english\nnouns\t초신성\tsupernova\n\nnouns\t물\twater\n',
+                      encoding='utf-8')
+    jobs = [LocaleJob('ko', [generate_words.words_data], seed='build'),
+            LocaleJob('en', [{'nouns': [('물', 'water')]}, source], seed='build')]
+
+    sequential = build(jobs, tmp_path / 'one', {"version": "2.0"}, workers=1)
+    parallel = build(jobs, tmp_path / 'two', {"version": "2.0"}, workers=2)
+
+    assert [result.locale for result in parallel] == ['ko', 'en']
+    assert (parallel[1].total, parallel[1].duplicates) == (2, 1)
+    for one, two in zip(sequential, parallel):
+        assert one.counts == two.counts
+        for name in ('Words.json', 'Words.bin'):
+            assert (one.output_path.parent / name).read_bytes() == (two.output_path.parent / name).read_bytes()
+    assert json.loads(parallel[1].output_path.read_text(encoding='utf-8'))['metadata']['locale'] == 'en'
+
+
+def test_incremental_delta_touches_only_the_new_words(tmp_path):
+    clean = dedup(generate_words.words_data)[0]
+    extra = [('초신성', 'supernova'), ('광합성', 'photosynthesis')]
+    grown = {**clean, 'nouns': clean['nouns'] + extra}
+    bank, state = tmp_path / 'Words.json', tmp_path / 'state'
+
+    def update(words_data):
+        return update_bank(bank, WordTable(words_data).score(), {}, seed='delta', state_dir=state)
+
+    def records():
+        return {word['id']: word for word in json.loads(bank.read_text(encoding='utf-8'))['words']}
+
+    assert update(clean)[1] is None
+    before = records()
+    counts, delta = update(clean)
+    assert counts is None and not delta
+
+    _, added = update(grown)
+    after = records()
+
+    assert sorted((word['korean'], word['english']) for word in added.added) == sorted(extra)
+    assert (added.changed, added.removed) == ([], [])
+    assert {**before, **{word['id']: word for word in added.added}} == after
+
+    _, removed = update(clean)
+    assert (removed.added, removed.changed) == ([], [])
+    assert sorted(removed.removed) == sorted(word['id'] for word in added.added)
+    assert records() == before
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_pairs_never_share_a_gloss(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(pairs, 'np', None)
+    elif pairs.np is None:
+        pytest.skip('numpy is not installed')
+    # Korean words 2j and 2j+1 share the gloss "common<j>" besides their own
+    korean = [chr(0xAC00 + 28 * i) * 2 for i in range(40)]
+    own = [chr(97 + i % 26) + chr(97 + i // 26) + 'own' for i in range(40)]
+    rows = [(korean[i], own[i]) for i in range(40)] + [(korean[i], f'common{i // 2}') for i in range(40)]
+    clean, report = dedup({'nouns': rows})
+    glosses = report.glosses()
+    words = {word['id']: word for word in StableOrder(WordTable(clean), seed='pairs')}
+
+    synonyms = [{korean[i], korean[i + 1]} for i in range(0, 40, 2)]
+
+    sampled, _ = sample_pairs(words.values(), 300, 'pairs', glosses)
+
+    assert sampled
+    for low, high in sampled:
+        assert {words[low]['korean'], words[high]['korean']} not in synonyms
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_words_sharing_only_a_prefix_can_be_paired(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(pairs, 'np', None)
+    elif pairs.np is None:
+        pytest.skip('numpy is not installed')
+    words = [
+        {'id': 1, 'korean': '컴퓨터', 'english': 'computer', 'category': '명사', 'difficulty': 'easy'},
+        {'id': 2, 'korean': '컴퍼스', 'english': 'compass', 'category': '명사', 'difficulty': 'easy'},
+    ]
+
+    assert sample_pairs(words, 1, 'prefix') == ([(1, 2)], 0)
+
+
+def test_search_index_finds_prefixes_and_substrings(tmp_path):
+    words = [
+        {'id': 1, 'korean': '사과', 'english': 'Apple'},
+        {'id': 2, 'korean': '사랑', 'english': 'love'},
+        {'id': 3, 'korean': '파인애플', 'english': 'pineapple'},
+    ]
+    path = tmp_path / 'Search.json'
+    SearchIndex.build(words, with_trigrams=True).save(path)
+    index = SearchIndex.load(path)
+
+    assert index.prefix('app') == [1]
+    assert index.prefix('사') == [1, 2]
+    # A syllable still being typed matches by its jamo
+    assert index.prefix('삭') == [1]
+    assert index.substring('apple') == [1, 3]
+    assert index.substring('애플') == [3]
+    assert index.substring('xyz') == [] and index.prefix(' ') == []
+
+
+def test_bench_pipeline_writes_what_the_build_writes(tmp_path):
+    words_data = bench.synthetic_bank(500)
+    timer = bench.run_pipeline(words_data, tmp_path / 'stages')
+    bench.run_build(words_data, tmp_path / 'build')
+
+    assert list(timer.seconds) == list(bench.STAGES)
+    for staged, built in zip(bench.outputs(tmp_path / 'stages'), bench.outputs(tmp_path / 'build')):
+        assert staged.read_bytes() == built.read_bytes(), staged.name
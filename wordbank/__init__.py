@@ -0,0 +1,89 @@
+"""
+Word-bank generation shared by generate_words.py
+"""
+
+from .binary import BinaryBankReader, BinaryBankWriter, WordBankFormatError
+from .build import (
+    LocaleJob,
+    LocaleResult,
+    bank_order,
+    build,
+    build_locale,
+    read_table,
+    update_bank,
+    write_bank,
+    write_pair_table,
+    write_search_index,
+)
+from .dedup import DedupReport, dedup, normalize
+from .delta import Delta, Fingerprints, fingerprint
+from .difficulty import CALIBRATION, DEFAULT_CUTOFFS, Calibration, calibrate, parse_cutoffs, score_difficulty
+from .ids import order_key, stable_id
+from .indexes import IndexBuilder
+from .jsonstream import JSONStreamWriter
+from .pairs import read_pairs, sample_pairs, write_pairs
+from .pipeline import (
+    CATEGORY_LABELS,
+    DIFFICULTIES,
+    IndexPermutation,
+    ShuffledOrder,
+    StableOrder,
+    WordTable,
+    assign_ids,
+    iter_stable_words,
+    iter_words,
+    positional_difficulty,
+    stable_order,
+    write_words_json,
+)
+from .search import SearchIndex, jamo, search_key
+
+__all__ = [
+    'BinaryBankReader',
+    'BinaryBankWriter',
+    'CALIBRATION',
+    'CATEGORY_LABELS',
+    'Calibration',
+    'DEFAULT_CUTOFFS',
+    'DIFFICULTIES',
+    'DedupReport',
+    'Delta',
+    'Fingerprints',
+    'IndexBuilder',
+    'IndexPermutation',
+    'JSONStreamWriter',
+    'LocaleJob',
+    'LocaleResult',
+    'SearchIndex',
+    'ShuffledOrder',
+    'StableOrder',
+    'WordBankFormatError',
+    'WordTable',
+    'assign_ids',
+    'bank_order',
+    'build',
+    'build_locale',
+    'calibrate',
+    'dedup',
+    'fingerprint',
+    'iter_stable_words',
+    'iter_words',
+    'jamo',
+    'normalize',
+    'order_key',
+    'parse_cutoffs',
+    'positional_difficulty',
+    'read_pairs',
+    'read_table',
+    'sample_pairs',
+    'search_key',
+    'score_difficulty',
+    'stable_id',
+    'stable_order',
+    'update_bank',
+    'write_bank',
+    'write_pair_table',
+    'write_pairs',
+    'write_search_index',
+    'write_words_json',
+]
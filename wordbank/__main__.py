@@ -0,0 +1,112 @@
+"""
+Command line entry point: python3 -m wordbank build|bench ...
+"""
+
+import argparse
+import datetime
+import sys
+import time
+
+from . import bench
+from .build import LocaleJob, build
+from .difficulty import parse_cutoffs
+
+DEFAULT_RESOURCES = 'SmartLockBox/Resources'
+
+# Committed, like generate_words.py's, so every checkout builds the same bytes;
+# bump it (or pass --last-updated) when the source tables change
+METADATA = {
+    "last_updated": "2025-11-03",
+    "version": "2.0",
+}
+
+
+def _date(text):
+    """'2025-11-03' checked to be a real date"""
+    return datetime.date.fromisoformat(text).isoformat()
+
+
+def _jobs(args):
+    sources = {}
+    for spec in args.source:
+        locale, sep, path = spec.partition('=')
+        if not sep or not locale or not path:
+            raise SystemExit(f"❌ Expected <locale>=<table.tsv>, got {spec!r}")
+        sources.setdefault(locale, []).append(path)
+    return [LocaleJob(locale, paths, args.count, args.seed, binary=not args.no_binary, cutoffs=args.cutoffs,
+                      stable_ids=not args.sequential_ids)
+            for locale, paths in sources.items()]
+
+
+def cmd_build(args):
+    jobs = _jobs(args)
+    started = time.perf_counter()
+    try:
+        metadata = {**METADATA, "last_updated": args.last_updated or METADATA["last_updated"]}
+        results = build(jobs, args.resources, metadata, args.jobs)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    for result in results:
+        print(f"✅ {result.locale}: {result.total} words → {result.output_path}")
+        if result.duplicates:
+            print(f"   🧹 {result.duplicates} duplicate pairs dropped")
+        if result.korean_conflicts or result.english_conflicts:
+            print(f"   ⚠️  {result.korean_conflicts} Korean and "
+                  f"{result.english_conflicts} English words with several translations")
+    print(f"⏱️  {len(jobs)} locales in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+def cmd_bench(args):
+    sizes = [int(size) for size in args.sizes.split(',')]
+    try:
+        results = bench.run(sizes, args.repeat, args.seed, args.profile, args.profile_dir,
+                            log=lambda result: print(bench.format_result(result)))
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    bench.save(results, args.output)
+    print(f"✅ Wrote {len(results['results'])} results to {args.output}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m wordbank')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_cmd = commands.add_parser('build', help='build per-locale banks from TSV source tables')
+    build_cmd.add_argument('--source', action='append', required=True, metavar='LOCALE=TABLE',
+                           help='category<TAB>korean<TAB>english table for a locale (repeatable)')
+    build_cmd.add_argument('--resources', default=DEFAULT_RESOURCES,
+                           help='folder holding the <locale>.lproj directories')
+    build_cmd.add_argument('--count', type=int, help='cap on words per bank')
+    build_cmd.add_argument('--seed', help='shuffle seed')
+    build_cmd.add_argument('--jobs', type=int, help='worker processes (default: one per locale, up to CPU count)')
+    build_cmd.add_argument('--cutoffs', type=parse_cutoffs,
+                           help='split each bank at these easy/medium and medium/hard score quantiles '
+                                'instead of the frozen calibration (e.g. 0.3,0.7)')
+    build_cmd.add_argument('--last-updated', type=_date, metavar='YYYY-MM-DD',
+                           help=f"metadata date (default: {METADATA['last_updated']})")
+    build_cmd.add_argument('--no-binary', action='store_true', help='skip Words.bin')
+    build_cmd.add_argument('--sequential-ids', action='store_true',
+                           help='number words 1..n in a constant-memory shuffle instead of stable content-hash IDs')
+    build_cmd.set_defaults(func=cmd_build)
+
+    bench_cmd = commands.add_parser('bench', help='time each generation stage on synthetic banks')
+    bench_cmd.add_argument('--sizes', default=','.join(map(str, bench.DEFAULT_SIZES)),
+                           help='comma-separated bank sizes')
+    bench_cmd.add_argument('--repeat', type=int, default=3, help='timed runs per size')
+    bench_cmd.add_argument('--seed', default='bench', help='shuffle seed')
+    bench_cmd.add_argument('--output', default='bench_wordbank.json', help='results file')
+    bench_cmd.add_argument('--profile', choices=bench.PROFILERS,
+                           help='also dump a cProfile (.prof) or pyinstrument (.html) profile per size')
+    bench_cmd.add_argument('--profile-dir', default='.', help='where profiles are written')
+    bench_cmd.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Per-stage timing and memory profile of bank generation on synthetic banks
+
+Runs the steps of build_locale one stage at a time:
+
+    dedup       normalize and drop duplicate pairs
+    difficulty  score every row (WordTable.score)
+    shuffle     sort the seeded content-keyed order (stable_order)
+    ids         settle ID collisions and build the records (assign_ids)
+    encode      encode the records and indexes into Words.json text
+    write       write that text to disk
+    binary      write the records to Words.bin
+    pairs       sample and write Pairs.bin
+    search      build and write Search.json
+
+The real build streams the records through the encoding and file stages
+in one pass; here each stage consumes the previous one's output in full
+so it can be timed on its own. The "build" row then times build_locale
+itself on the same bank, end to end, so the split can be checked against
+the real entry point.
+Timed runs go without tracemalloc; one extra traced run records the peak
+allocation of every stage, including what earlier stages still hold.
+"""
+
+import cProfile
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from array import array
+
+from .binary import BinaryBankWriter
+from .build import BANK_NAME, PAIRS_NAME, SEARCH_NAME, LocaleJob, build_locale
+from .dedup import dedup
+from .indexes import IndexBuilder
+from .pairs import sample_pairs, write_pairs
+from .pipeline import WordTable, assign_ids, settle_collisions, stable_order, write_words_json
+from .search import SearchIndex
+
+DEFAULT_SIZES = (2000, 100000, 1000000)
+STAGES = ('dedup', 'difficulty', 'shuffle', 'ids', 'encode', 'write', 'binary', 'pairs', 'search')
+PROFILERS = ('cprofile', 'pyinstrument')
+
+# Pre-sampled challenge pairs, as generate_words.py writes by default
+PAIR_COUNT = 10000
+_LOCALE = 'bench'
+
+# Share of nouns, matching the 1290/710 split of words_data
+_NOUN_SHARE = 0.645
+_METADATA = {"version": "bench"}
+
+
+def _hangul(rng, syllables):
+    return ''.join(chr(0xAC00 + rng.randrange(11172)) for _ in range(syllables))
+
+
+def _latin(rng, letters):
+    return ''.join(chr(97 + rng.randrange(26)) for _ in range(letters))
+
+
+def synthetic_bank(count, seed=0):
+    """words_data-style {"nouns": [...], "adjectives": [...]} with `count` distinct pairs.
+
+    Korean words are 1-4 random syllables and English words 3-12 random
+    letters; the same count and seed always give the same bank.
+    """
+    rng = random.Random(seed)
+    nouns = round(count * _NOUN_SHARE)
+    seen_korean, seen_english = set(), set()
+    rows = []
+    while len(rows) < count:
+        korean = _hangul(rng, rng.randint(1, 4))
+        english = _latin(rng, rng.randint(3, 12))
+        if korean in seen_korean or english in seen_english:
+            continue
+        seen_korean.add(korean)
+        seen_english.add(english)
+        rows.append((korean, english))
+    return {"nouns": rows[:nouns], "adjectives": rows[nouns:]}
+
+
+class StageTimer:
+    """Wall time, and under tracemalloc the peak allocation, of named stages"""
+
+    def __init__(self, traced=False):
+        self.traced = traced
+        self.seconds = {}
+        self.peaks = {}
+
+    def run(self, name, func, *args):
+        if self.traced:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func(*args)
+        self.seconds[name] = time.perf_counter() - start
+        if self.traced:
+            self.peaks[name] = tracemalloc.get_traced_memory()[1]
+        return result
+
+
+def outputs(workdir):
+    """Paths of everything one build writes under workdir"""
+    output_dir = LocaleJob(_LOCALE, []).output_dir(workdir)
+    return [output_dir / f'{BANK_NAME}.json', output_dir / f'{BANK_NAME}.bin',
+            output_dir / f'{PAIRS_NAME}.bin', output_dir / f'{SEARCH_NAME}.json']
+
+
+def run_pipeline(words_data, workdir, target_count=None, seed='bench', cutoffs=None, timer=None):
+    """Build one bank stage by stage; returns the StageTimer"""
+    timer = timer or StageTimer()
+    bank_path, binary_path, pairs_path, search_path = outputs(workdir)
+    bank_path.parent.mkdir(parents=True, exist_ok=True)
+    clean, report = timer.run('dedup', dedup, words_data)
+    table = timer.run('difficulty', WordTable(clean).score, cutoffs)
+    keys = timer.run('shuffle', lambda: array('Q', stable_order(table, target_count, seed)))
+    words = timer.run('ids', lambda: list(assign_ids(table, keys, settle_collisions(table, keys))))
+
+    def encode():
+        buffer = io.StringIO()
+        write_words_json(buffer, words, {**_METADATA, "locale": _LOCALE}, IndexBuilder())
+        return buffer.getvalue()
+
+    text = timer.run('encode', encode)
+
+    def write():
+        with open(bank_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    timer.run('write', write)
+
+    def binary():
+        with BinaryBankWriter(binary_path) as bank:
+            for word in words:
+                bank.add(word)
+
+    timer.run('binary', binary)
+    timer.run('pairs', lambda: write_pairs(pairs_path, sample_pairs(words, PAIR_COUNT, seed, report.glosses())[0]))
+    timer.run('search', lambda: SearchIndex.build(words).save(search_path))
+    return timer
+
+
+def run_build(words_data, workdir, target_count=None, seed='bench', cutoffs=None, timer=None):
+    """Time build_locale end to end on the same bank; returns the StageTimer"""
+    timer = timer or StageTimer()
+    job = LocaleJob(_LOCALE, [words_data], target_count, seed, cutoffs=cutoffs, pairs=PAIR_COUNT, search=True)
+    timer.run('build', build_locale, job, workdir, _METADATA)
+    return timer
+
+
+def profile(words_data, workdir, profile_path, profiler='cprofile', **options):
+    """Run the build once under cProfile (.prof stats) or pyinstrument (.html)"""
+    if profiler == 'cprofile':
+        profiler_obj = cProfile.Profile()
+        profiler_obj.runcall(run_build, words_data, workdir, **options)
+        profiler_obj.dump_stats(profile_path)
+        return profile_path
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed (pip install pyinstrument)") from None
+        profiler_obj = Profiler()
+        profiler_obj.start()
+        try:
+            run_build(words_data, workdir, **options)
+        finally:
+            profiler_obj.stop()
+        with open(profile_path, 'w', encoding='utf-8') as f:
+            f.write(profiler_obj.output_html())
+        return profile_path
+    raise ValueError(f"Unknown profiler {profiler!r}; expected one of {', '.join(PROFILERS)}")
+
+
+def bench_size(count, workdir, repeat=3, seed='bench', profiler=None, profile_dir='.', log=None):
+    """Per-stage results for one synthetic bank size"""
+    words_data = synthetic_bank(count)
+    runs = [run_pipeline(words_data, workdir, seed=seed).seconds for _ in range(repeat)]
+    builds = [run_build(words_data, workdir, seed=seed).seconds['build'] for _ in range(repeat)]
+
+    tracemalloc.start()
+    try:
+        traced = run_pipeline(words_data, workdir, seed=seed, timer=StageTimer(traced=True))
+        traced_build = run_build(words_data, workdir, seed=seed, timer=StageTimer(traced=True))
+    finally:
+        tracemalloc.stop()
+
+    results = []
+    for stage in STAGES:
+        times = [seconds[stage] for seconds in runs]
+        results.append({
+            'words': count,
+            'stage': stage,
+            'runs': repeat,
+            'best': min(times),
+            'mean': sum(times) / len(times),
+            'peak_bytes': traced.peaks[stage],
+        })
+    results.append({
+        'words': count,
+        'stage': 'build',
+        'runs': repeat,
+        'best': min(builds),
+        'mean': sum(builds) / repeat,
+        'peak_bytes': traced_build.peaks['build'],
+        'output_bytes': sum(os.path.getsize(path) for path in outputs(workdir)),
+    })
+    if log is not None:
+        for result in results:
+            log(result)
+
+    if profiler is not None:
+        suffix = '.prof' if profiler == 'cprofile' else '.html'
+        path = os.path.join(profile_dir, f'bench_wordbank_{count}{suffix}')
+        profile(words_data, workdir, path, profiler, seed=seed)
+        if log is not None:
+            log({'words': count, 'profile': path})
+    return results
+
+
+def run(sizes=DEFAULT_SIZES, repeat=3, seed='bench', profiler=None, profile_dir='.', log=None):
+    """Benchmark every size in a scratch directory; returns the results document"""
+    workdir = tempfile.mkdtemp(prefix='wordbank-bench-')
+    try:
+        results = []
+        for size in sizes:
+            results.extend(bench_size(size, workdir, repeat, seed, profiler, profile_dir, log))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'benchmark': 'wordbank',
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'numpy': _numpy_version(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'config': {'sizes': list(sizes), 'repeat': repeat, 'seed': seed, 'pairs': PAIR_COUNT},
+        'results': results,
+    }
+
+
+def _numpy_version():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy.__version__
+
+
+def save(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+
+
+def format_result(result):
+    if 'profile' in result:
+        return f"{result['words']:>8} words  profile → {result['profile']}"
+    return (f"{result['words']:>8} words  {result['stage']:<11} {result['best'] * 1000:>10.1f} ms  "
+            f"peak {result['peak_bytes'] / 1e6:>8.1f} MB")
@@ -0,0 +1,169 @@
+"""
+Compact, memory-mappable binary word bank (Words.bin)
+
+Layout, all integers little-endian:
+
+    header    32 bytes   HEADER below
+    records   record_count * RECORD.size bytes, in bank order
+    pool      UTF-8 strings referenced by (offset, length) from the pool start
+    labels    label_count * LABEL.size bytes: category label strings
+
+A record stores its category as an index into the label table and its
+difficulty as an index into DIFFICULTIES, so every record has the same
+width and record i lives at records_offset + i * record_size.
+"""
+
+import mmap
+import shutil
+import struct
+import tempfile
+
+from .pipeline import DIFFICULTIES
+
+MAGIC = b'WRDB'
+SCHEMA_VERSION = 1
+
+# magic, version, record_size, record_count, records_offset,
+# pool_offset, pool_size, labels_offset, label_count
+HEADER = struct.Struct('<4sHHIIIIII')
+
+# id, korean_offset, english_offset, korean_length, english_length,
+# category, difficulty, padding
+RECORD = struct.Struct('<IIIHHBBxx')
+
+# offset, length into the pool
+LABEL = struct.Struct('<II')
+
+_DIFFICULTY_CODES = {name: code for code, name in enumerate(DIFFICULTIES)}
+
+
+class WordBankFormatError(ValueError):
+    pass
+
+
+class BinaryBankWriter:
+    """Streams records into a Words.bin file.
+
+    Records go straight to the output; strings are collected in a temporary
+    spool file and appended once the record count is known, so memory use
+    does not depend on the bank size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._labels = {}
+        self._out = None
+        self._pool = None
+        self._pool_size = 0
+
+    def __enter__(self):
+        self._out = open(self.path, 'wb')
+        self._out.write(b'\0' * HEADER.size)
+        self._pool = tempfile.TemporaryFile()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._finish()
+        finally:
+            self._pool.close()
+            self._out.close()
+
+    def _string(self, text):
+        data = text.encode('utf-8')
+        offset = self._pool_size
+        self._pool.write(data)
+        self._pool_size += len(data)
+        return offset, len(data)
+
+    def add(self, word):
+        category = self._labels.get(word["category"])
+        if category is None:
+            if len(self._labels) > 0xFF:
+                raise WordBankFormatError("More than 256 categories")
+            category = self._labels[word["category"]] = len(self._labels)
+        korean_offset, korean_length = self._string(word["korean"])
+        english_offset, english_length = self._string(word["english"])
+        self._out.write(RECORD.pack(
+            word["id"], korean_offset, english_offset, korean_length, english_length,
+            category, _DIFFICULTY_CODES[word["difficulty"]],
+        ))
+        self.count += 1
+
+    def _finish(self):
+        labels = [self._string(label) for label in self._labels]
+        records_offset = HEADER.size
+        pool_offset = records_offset + self.count * RECORD.size
+        labels_offset = pool_offset + self._pool_size
+
+        self._pool.seek(0)
+        shutil.copyfileobj(self._pool, self._out)
+        for offset, length in labels:
+            self._out.write(LABEL.pack(offset, length))
+        self._out.seek(0)
+        self._out.write(HEADER.pack(
+            MAGIC, SCHEMA_VERSION, RECORD.size, self.count, records_offset,
+            pool_offset, self._pool_size, labels_offset, len(labels),
+        ))
+
+
+class BinaryBankReader:
+    """Random access to a Words.bin file through mmap.
+
+    Records decode lazily into the same dictionaries Words.json holds.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise WordBankFormatError(f"{path}: truncated header")
+        (magic, version, record_size, self.count, self._records,
+         self._pool, pool_size, labels_offset, label_count) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise WordBankFormatError(f"{path}: not a word bank")
+        if version != SCHEMA_VERSION or record_size != RECORD.size:
+            self.close()
+            raise WordBankFormatError(f"{path}: unsupported schema version {version}")
+        self.version = version
+        self.categories = [
+            self._text(*LABEL.unpack_from(self._map, labels_offset + i * LABEL.size))
+            for i in range(label_count)
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def __len__(self):
+        return self.count
+
+    def _text(self, offset, length):
+        start = self._pool + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        (word_id, korean_offset, english_offset, korean_length, english_length,
+         category, difficulty) = RECORD.unpack_from(self._map, self._records + index * RECORD.size)
+        return {
+            "id": word_id,
+            "korean": self._text(korean_offset, korean_length),
+            "english": self._text(english_offset, english_length),
+            "category": self.categories[category],
+            "difficulty": DIFFICULTIES[difficulty],
+        }
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
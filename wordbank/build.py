@@ -0,0 +1,236 @@
+"""
+Per-locale word-bank builds, run in parallel across a process pool
+"""
+
+import csv
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .binary import BinaryBankWriter
+from .dedup import dedup
+from .delta import Fingerprints, diff
+from .indexes import IndexBuilder
+from .pairs import sample_pairs, write_pairs
+from .search import SearchIndex
+from .pipeline import ShuffledOrder, StableOrder, WordTable, write_words_json
+
+BANK_NAME = 'Words'
+PAIRS_NAME = 'Pairs'
+SEARCH_NAME = 'Search'
+
+# Fingerprints and deltas of incremental builds; kept out of the app bundle
+STATE_DIR = '.wordbank'
+
+
+def read_table(path):
+    """Load a `category<TAB>korean<TAB>english` source table.
+
+    Blank lines and lines starting with # are skipped. Returns the same
+    category -> [(korean, english), ...] mapping as words_data.
+    """
+    table = {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for line_no, row in enumerate(csv.reader(f, delimiter='\t'), 1):
+            if not row or not row[0].strip() or row[0].startswith('#'):
+                continue
+            if len(row) != 3:
+                raise ValueError(f"{path}:{line_no}: expected 3 tab-separated columns, got {len(row)}")
+            category, korean, english = row
+            table.setdefault(category.strip(), []).append((korean, english))
+    return table
+
+
+def merge_tables(tables):
+    """Concatenate category lists of several tables, keeping first-seen order"""
+    merged = {}
+    for table in tables:
+        for category, rows in table.items():
+            merged.setdefault(category, []).extend(rows)
+    return merged
+
+
+def bank_order(table, target_count=None, seed=None, stable_ids=True):
+    """The order every output of one build shares; compute it once per bank.
+
+    stable_ids=False numbers words 1..n in a constant-memory shuffle instead
+    of using content-hash IDs in content-keyed order.
+    """
+    if stable_ids:
+        return StableOrder(table, target_count, seed)
+    return ShuffledOrder(table, target_count, seed)
+
+
+def write_bank(output_path, table, metadata, target_count=None, seed=None, binary_path=None,
+               stable_ids=True, order=None):
+    """Stream one bank to Words.json (and optionally Words.bin); returns words per category.
+
+    `order` is a bank_order() to reuse; otherwise one is computed.
+    """
+    counts = Counter()
+    if order is None:
+        order = bank_order(table, target_count, seed, stable_ids)
+    words = iter(order)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        if binary_path is None:
+            write_words_json(f, _counted(words, counts), metadata, IndexBuilder())
+        else:
+            with BinaryBankWriter(binary_path) as bank:
+                write_words_json(f, _counted(words, counts, bank.add), metadata, IndexBuilder())
+    return counts
+
+
+def write_pair_table(path, table, count, target_count=None, seed=None, order=None, glosses=None):
+    """Sample `count` challenge pairs from the bank's words into Pairs.bin.
+
+    `glosses` is the DedupReport.glosses() of the bank's sources, so words
+    sharing an English gloss are never paired. Returns (pairs written,
+    shortfall).
+    """
+    if order is None:
+        order = bank_order(table, target_count, seed)
+    pairs, shortfall = sample_pairs(order, count, seed, glosses)
+    write_pairs(path, pairs)
+    return len(pairs), shortfall
+
+
+def write_search_index(path, table, target_count=None, seed=None, with_trigrams=False, order=None):
+    """Build the bank's search index into Search.json; returns the SearchIndex"""
+    if order is None:
+        order = bank_order(table, target_count, seed)
+    index = SearchIndex.build(order, with_trigrams)
+    index.save(path)
+    return index
+
+
+def state_path(output_path, suffix, state_dir=STATE_DIR):
+    """<state_dir>/<output path with separators flattened><suffix>"""
+    flat = str(Path(output_path)).strip(os.sep).replace(os.sep, '_')
+    return Path(state_dir) / f'{flat}{suffix}'
+
+
+def update_bank(output_path, table, metadata, target_count=None, seed=None, binary_path=None,
+                state_dir=STATE_DIR, delta_path=None, order=None):
+    """Regenerate a bank only where its entries changed.
+
+    Compares per-entry fingerprints of the previous output (saved by the
+    last run, or recomputed from the existing Words.json) with the current
+    records. An unchanged bank is left untouched; otherwise the bank is
+    rewritten and a delta of added, changed and removed entries is written
+    to delta_path (default: next to the fingerprints in state_dir).
+
+    Returns (counts, delta); counts is None when nothing was rewritten and
+    delta is None on the first build. `order` is a StableOrder to reuse.
+    """
+    if order is None:
+        order = StableOrder(table, target_count, seed)
+    fingerprints_path = state_path(output_path, '.fingerprints', state_dir)
+    previous = None
+    if os.path.exists(output_path):
+        previous = Fingerprints.load(fingerprints_path, os.stat(output_path))
+        if previous is None:
+            previous = Fingerprints.of_bank(output_path)
+
+    delta, current = diff(previous or Fingerprints(), iter(order))
+    if previous is not None and not delta:
+        current.save(fingerprints_path, os.stat(output_path))
+        return None, delta
+
+    counts = write_bank(output_path, table, metadata, target_count, seed, binary_path, order=order)
+    current.save(fingerprints_path, os.stat(output_path))
+    if previous is None:
+        return counts, None
+    if delta_path is None:
+        delta_path = state_path(output_path, '.delta.json', state_dir)
+    with open(delta_path, 'w', encoding='utf-8') as f:
+        json.dump(delta.to_dict(), f, ensure_ascii=False, indent=2)
+    return counts, delta
+
+
+def _counted(words, counts, sink=None):
+    for word in words:
+        counts[word["category"]] += 1
+        if sink is not None:
+            sink(word)
+        yield word
+
+
+class LocaleJob:
+    """One locale's bank: its source tables and where the result goes.
+
+    Sources are paths to TSV tables or words_data-style dictionaries; they
+    are loaded inside the worker process.
+    """
+
+    def __init__(self, locale, sources, target_count=None, seed=None, binary=True,
+                 cutoffs=None, pairs=0, search=False, trigrams=False, stable_ids=True):
+        self.locale = locale
+        self.sources = list(sources)
+        self.target_count = target_count
+        self.seed = seed
+        self.binary = binary
+        self.cutoffs = cutoffs
+        self.pairs = pairs
+        self.search = search
+        self.trigrams = trigrams
+        self.stable_ids = stable_ids
+
+    def output_dir(self, resources):
+        """<resources>/<locale>.lproj, next to Localizable.strings"""
+        return Path(resources) / f'{self.locale}.lproj'
+
+
+class LocaleResult:
+    def __init__(self, locale, output_path, counts, duplicates, korean_conflicts, english_conflicts):
+        self.locale = locale
+        self.output_path = output_path
+        self.counts = counts
+        self.duplicates = duplicates
+        self.korean_conflicts = korean_conflicts
+        self.english_conflicts = english_conflicts
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+def build_locale(job, resources, metadata):
+    """Normalize, dedup, score and write one locale's bank"""
+    tables = [read_table(source) if isinstance(source, (str, Path)) else source for source in job.sources]
+    clean, report = dedup(merge_tables(tables))
+
+    output_dir = job.output_dir(resources)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f'{BANK_NAME}.json'
+    binary_path = output_dir / f'{BANK_NAME}.bin' if job.binary else None
+    table = WordTable(clean).score(job.cutoffs)
+    order = bank_order(table, job.target_count, job.seed, job.stable_ids)
+    counts = write_bank(output_path, table, {**metadata, "locale": job.locale},
+                        job.target_count, job.seed, binary_path, order=order)
+    if job.pairs:
+        write_pair_table(output_dir / f'{PAIRS_NAME}.bin', table, job.pairs, job.target_count, job.seed,
+                         order=order, glosses=report.glosses())
+    if job.search:
+        write_search_index(output_dir / f'{SEARCH_NAME}.json', table, job.target_count, job.seed, job.trigrams,
+                           order=order)
+    return LocaleResult(job.locale, output_path, counts, len(report.duplicates),
+                        len(report.korean_conflicts), len(report.english_conflicts))
+
+
+def build(jobs, resources, metadata, workers=None):
+    """Build every locale, one process per job up to `workers` at a time.
+
+    Results come back in the order of `jobs`. With a single job or
+    workers=1 everything runs in this process.
+    """
+    jobs = list(jobs)
+    if workers is None:
+        workers = min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1:
+        return [build_locale(job, resources, metadata) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(build_locale, job, resources, metadata) for job in jobs]
+        return [future.result() for future in futures]
@@ -0,0 +1,82 @@
+"""
+Normalization and duplicate/conflict detection for the source word tables
+"""
+
+import unicodedata
+
+
+def normalize(text):
+    """NFC form without surrounding whitespace, as stored in the bank"""
+    return unicodedata.normalize('NFC', text).strip()
+
+
+def english_key(text):
+    """Hash key for an English word: case-insensitive"""
+    return text.casefold()
+
+
+class DedupReport:
+    """What the dedup stage collapsed and which translations disagree.
+
+    duplicates:        (category, korean, english) rows dropped because the
+                       same pair appeared earlier, possibly in another category
+    korean_conflicts:  korean -> every distinct English word it maps to
+    english_conflicts: english -> every distinct Korean word it maps to
+    """
+
+    def __init__(self):
+        self.duplicates = []
+        self.korean_conflicts = {}
+        self.english_conflicts = {}
+
+    def __bool__(self):
+        return bool(self.duplicates or self.korean_conflicts or self.english_conflicts)
+
+    def glosses(self):
+        """korean -> english_key() of every gloss, for Korean words with several.
+
+        Two words whose glosses meet mean the same thing in at least one
+        sense (명석한 "brilliant" and 날카로운 "shrill" are both "sharp"),
+        even when their own English words differ.
+        """
+        return {korean: frozenset(map(english_key, english)) for korean, english in self.korean_conflicts.items()}
+
+    def to_dict(self):
+        return {
+            "duplicates": [list(row) for row in self.duplicates],
+            "korean_conflicts": self.korean_conflicts,
+            "english_conflicts": self.english_conflicts,
+        }
+
+
+def dedup(words_data):
+    """Normalize every pair and drop repeated ones in one pass.
+
+    Returns (clean_data, report) where clean_data has the same categories
+    as words_data, in the same order, holding the first occurrence of each
+    (korean, english) pair. Runs in time linear in the number of rows.
+    """
+    report = DedupReport()
+    seen = set()
+    english_of = {}
+    korean_of = {}
+    clean = {}
+    for category, rows in words_data.items():
+        kept = clean[category] = []
+        for korean, english in rows:
+            korean, english = normalize(korean), normalize(english)
+            e_key = english_key(english)
+            key = (korean, e_key)
+            if key in seen:
+                report.duplicates.append((category, korean, english))
+                continue
+            seen.add(key)
+            kept.append((korean, english))
+            # Each (korean, english key) pair gets here once, so these lists
+            # never need a membership check
+            english_of.setdefault(korean, []).append(english)
+            korean_of.setdefault(e_key, []).append(korean)
+
+    report.korean_conflicts = {k: v for k, v in english_of.items() if len(v) > 1}
+    report.english_conflicts = {e: v for e, v in korean_of.items() if len(v) > 1}
+    return clean, report
@@ -0,0 +1,135 @@
+"""
+Per-entry fingerprints of a generated bank and the delta between two banks
+"""
+
+import hashlib
+import json
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+MAGIC = b'WFPR'
+VERSION = 1
+
+# magic, version, entry count, bank file size, bank file mtime_ns
+_HEADER = struct.Struct('<4sHxxIQQ')
+
+_RECORD_KEYS = ("id", "korean", "english", "category", "difficulty")
+
+
+def fingerprint(word):
+    """64-bit hash of everything the app stores for a word"""
+    digest = hashlib.blake2b(digest_size=8, person=b'wordbank-fp')
+    for key in _RECORD_KEYS:
+        digest.update(str(word[key]).encode('utf-8'))
+        digest.update(b'\0')
+    return int.from_bytes(digest.digest(), 'little')
+
+
+class Fingerprints:
+    """Sorted (id, fingerprint) pairs held in two compact arrays"""
+
+    def __init__(self, ids=None, values=None):
+        self.ids = ids if ids is not None else array('I')
+        self.values = values if values is not None else array('Q')
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def collect(cls, pairs):
+        pairs = sorted(pairs)
+        return cls(array('I', (i for i, _ in pairs)), array('Q', (v for _, v in pairs)))
+
+    @classmethod
+    def of_bank(cls, json_path):
+        """Fingerprints recomputed from a Words.json"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            words = json.load(f)["words"]
+        return cls.collect((word["id"], fingerprint(word)) for word in words)
+
+    def get(self, word_id):
+        i = bisect_left(self.ids, word_id)
+        if i < len(self.ids) and self.ids[i] == word_id:
+            return self.values[i]
+        return None
+
+    def digest(self):
+        """Identifies the bank as a whole, for checking a delta's base"""
+        digest = hashlib.blake2b(digest_size=16, person=b'wordbank-bank')
+        digest.update(self.ids.tobytes())
+        digest.update(self.values.tobytes())
+        return digest.hexdigest()
+
+    def save(self, path, bank_stat):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(self.ids), bank_stat.st_size, bank_stat.st_mtime_ns))
+            self.ids.tofile(f)
+            self.values.tofile(f)
+
+    @classmethod
+    def load(cls, path, bank_stat):
+        """Saved fingerprints, or None when missing or saved for another file state"""
+        try:
+            with open(path, 'rb') as f:
+                magic, version, count, size, mtime_ns = _HEADER.unpack(f.read(_HEADER.size))
+                if (magic, version) != (MAGIC, VERSION):
+                    return None
+                if (size, mtime_ns) != (bank_stat.st_size, bank_stat.st_mtime_ns):
+                    return None
+                ids, values = array('I'), array('Q')
+                ids.fromfile(f, count)
+                values.fromfile(f, count)
+        except (OSError, EOFError, struct.error):
+            return None
+        return cls(ids, values)
+
+
+class Delta:
+    """What changed between two generations of a bank.
+
+    added/changed hold full records, so a client holding the base bank can
+    apply the delta without the new file; removed holds IDs only.
+    """
+
+    def __init__(self, base, target):
+        self.base = base
+        self.target = target
+        self.added = []
+        self.changed = []
+        self.removed = []
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def to_dict(self):
+        return {
+            "base": self.base,
+            "target": self.target,
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+        }
+
+
+def diff(previous, words):
+    """(Delta, new Fingerprints) for a stream of records against old fingerprints"""
+    pairs = []
+    added, changed = [], []
+    for word in words:
+        value = fingerprint(word)
+        pairs.append((word["id"], value))
+        old = previous.get(word["id"])
+        if old is None:
+            added.append(word)
+        elif old != value:
+            changed.append(word)
+    current = Fingerprints.collect(pairs)
+
+    delta = Delta(previous.digest(), current.digest())
+    delta.added = sorted(added, key=lambda word: word["id"])
+    delta.changed = sorted(changed, key=lambda word: word["id"])
+    delta.removed = [word_id for word_id in previous.ids if current.get(word_id) is None]
+    return delta, current
@@ -0,0 +1,258 @@
+"""
+Content-based difficulty scoring for a whole bank in one vectorized batch
+
+Each word gets four features:
+
+    syllables   Hangul syllables in the Korean word
+    length      letters in the English word
+    bigrams     mean rarity (-log p) of the English letter bigrams
+    frequency   log rank of the English word in data/english_frequency.txt;
+                words missing from the table rank just past its end
+
+Features are standardized, combined with WEIGHTS, and the scores are split
+into easy/medium/hard. The bigram rarities, the feature means and standard
+deviations and the two score boundaries come from a Calibration fitted once
+on a reference bank and frozen in data/difficulty_calibration.json, so
+adding words never moves an existing word to another level. Fitting on the
+bank being scored (passing `cutoffs`) splits it at those quantiles instead.
+
+NumPy is used when it is installed; otherwise the same formulas run in pure
+Python, which agrees up to floating-point rounding but is much slower on
+large banks.
+"""
+
+import json
+import math
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FREQUENCY_TABLE = Path(__file__).parent / 'data' / 'english_frequency.txt'
+CALIBRATION = Path(__file__).parent / 'data' / 'difficulty_calibration.json'
+
+# Share of words at or below which a word stops being easy / medium
+DEFAULT_CUTOFFS = (0.3, 0.7)
+
+WEIGHTS = {
+    'syllables': 1.0,
+    'length': 1.0,
+    'bigrams': 1.0,
+    'frequency': 1.5,
+}
+
+_HANGUL_FIRST, _HANGUL_LAST = 0xAC00, 0xD7A3
+_A = ord('a')
+
+
+@lru_cache(maxsize=None)
+def frequency_ranks(path=FREQUENCY_TABLE):
+    """English word -> 1-based rank; lines starting with # are comments"""
+    ranks = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            word = line.strip().lower()
+            if word and not word.startswith('#'):
+                ranks.setdefault(word, len(ranks) + 1)
+    return ranks
+
+
+def parse_cutoffs(text):
+    """'0.3,0.7' -> (0.3, 0.7), checked to be increasing and inside (0, 1)"""
+    cutoffs = tuple(float(part) for part in text.split(','))
+    if len(cutoffs) != 2 or not 0 < cutoffs[0] < cutoffs[1] < 1:
+        raise ValueError(f"Expected two increasing quantiles between 0 and 1, got {text!r}")
+    return cutoffs
+
+
+class Calibration:
+    """The bank-wide statistics scoring depends on, fitted once and then reused.
+
+    stats maps each feature to its (mean, standard deviation), rarity holds
+    the -log p of all 26 x 26 letter bigrams, and edges are the easy/medium
+    and medium/hard score boundaries (the `cutoffs` quantiles of the bank
+    the calibration was fitted on).
+    """
+
+    def __init__(self, stats, rarity, edges, cutoffs=DEFAULT_CUTOFFS):
+        self.stats = {name: tuple(stats[name]) for name in WEIGHTS}
+        self.rarity = list(rarity)
+        self.edges = tuple(edges)
+        self.cutoffs = tuple(cutoffs)
+
+    def to_dict(self):
+        return {
+            "cutoffs": list(self.cutoffs),
+            "edges": list(self.edges),
+            "stats": {name: list(stat) for name, stat in self.stats.items()},
+            "rarity": self.rarity,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["stats"], data["rarity"], data["edges"], data["cutoffs"])
+
+    def save(self, path=CALIBRATION):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=1)
+            f.write('\n')
+
+    @classmethod
+    def load(cls, path=CALIBRATION):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+@lru_cache(maxsize=None)
+def default_calibration():
+    """The frozen calibration shipped in data/difficulty_calibration.json"""
+    return Calibration.load()
+
+
+def calibrate(korean, english, cutoffs=DEFAULT_CUTOFFS, ranks=None):
+    """Fit a Calibration on a bank, splitting its scores at the `cutoffs` quantiles"""
+    ranks = frequency_ranks() if ranks is None else ranks
+    if not korean:
+        raise ValueError("Cannot calibrate difficulty on an empty bank")
+    if np is not None:
+        return _calibrate_numpy(korean, english, cutoffs, ranks)
+    return _calibrate_python(korean, english, cutoffs, ranks)
+
+
+def score_difficulty(korean, english, cutoffs=None, ranks=None, calibration=None):
+    """Difficulty codes (0 easy, 1 medium, 2 hard) for parallel word lists.
+
+    Scores against `calibration` (default: the frozen one), or, with
+    `cutoffs`, against a calibration fitted on these words.
+    """
+    ranks = frequency_ranks() if ranks is None else ranks
+    if not korean:
+        return []
+    if cutoffs is not None:
+        calibration = calibrate(korean, english, cutoffs, ranks)
+    elif calibration is None:
+        calibration = default_calibration()
+    if np is not None:
+        return _score_numpy(korean, english, calibration, ranks).tolist()
+    return _score_python(korean, english, calibration, ranks)
+
+
+# NumPy implementation
+
+def _codes(words):
+    """(rows, max_len) uint32 matrix of code points, zero-padded"""
+    return np.array(words, dtype=str).reshape(len(words), 1).view(np.uint32)
+
+
+def _features_numpy(korean, english, ranks, rarity=None):
+    """Raw feature columns, plus the bigram rarities (fitted here when not given)"""
+    hangul = _codes(korean)
+    syllables = ((hangul >= _HANGUL_FIRST) & (hangul <= _HANGUL_LAST)).sum(axis=1).astype(np.float64)
+
+    lowered = [word.lower() for word in english]
+    letters = _codes(lowered).astype(np.int64) - _A
+    is_letter = (letters >= 0) & (letters < 26)
+    length = is_letter.sum(axis=1).astype(np.float64)
+
+    pair_mask = is_letter[:, :-1] & is_letter[:, 1:]
+    pairs = np.where(pair_mask, letters[:, :-1] * 26 + letters[:, 1:], 0)
+    if rarity is None:
+        counts = np.bincount(pairs[pair_mask], minlength=26 * 26).astype(np.float64)
+        rarity = -np.log((counts + 1) / (counts.sum() + 26 * 26))
+    pair_count = pair_mask.sum(axis=1)
+    bigrams = np.where(pair_mask, rarity[pairs], 0).sum(axis=1) / np.maximum(pair_count, 1)
+
+    missing = len(ranks) + 1
+    frequency = np.log(np.fromiter((ranks.get(word, missing) for word in lowered),
+                                   dtype=np.float64, count=len(lowered)))
+    features = {'syllables': syllables, 'length': length, 'bigrams': bigrams, 'frequency': frequency}
+    return features, rarity
+
+
+def _combine_numpy(features, stats):
+    score = 0
+    for name, weight in WEIGHTS.items():
+        mean, std = stats[name]
+        values = features[name]
+        score = score + weight * ((values - mean) / std if std > 0 else np.zeros_like(values))
+    return score
+
+
+def _calibrate_numpy(korean, english, cutoffs, ranks):
+    features, rarity = _features_numpy(korean, english, ranks)
+    stats = {name: (float(values.mean()), float(values.std())) for name, values in features.items()}
+    edges = np.quantile(_combine_numpy(features, stats), cutoffs)
+    return Calibration(stats, rarity.tolist(), edges.tolist(), cutoffs)
+
+
+def _score_numpy(korean, english, calibration, ranks):
+    features, _ = _features_numpy(korean, english, ranks, np.array(calibration.rarity))
+    score = _combine_numpy(features, calibration.stats)
+    return np.searchsorted(np.array(calibration.edges), score, side='right').astype(np.uint8)
+
+
+# Pure Python implementation of the same formulas
+
+def _mean_std(values):
+    n = len(values)
+    mean = math.fsum(values) / n
+    return mean, math.sqrt(math.fsum((v - mean) ** 2 for v in values) / n)
+
+
+def _quantile(ordered, q):
+    position = (len(ordered) - 1) * q
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _letter_pairs(word):
+    codes = [ord(c) - _A for c in word]
+    return [a * 26 + b for a, b in zip(codes, codes[1:]) if 0 <= a < 26 and 0 <= b < 26]
+
+
+def _features_python(korean, english, ranks, rarity=None):
+    syllables = [float(sum(_HANGUL_FIRST <= ord(c) <= _HANGUL_LAST for c in word)) for word in korean]
+    lowered = [word.lower() for word in english]
+    length = [float(sum(0 <= ord(c) - _A < 26 for c in word)) for word in lowered]
+
+    word_pairs = [_letter_pairs(word) for word in lowered]
+    if rarity is None:
+        counts = [0] * (26 * 26)
+        for pairs in word_pairs:
+            for pair in pairs:
+                counts[pair] += 1
+        total = sum(counts) + 26 * 26
+        rarity = [-math.log((count + 1) / total) for count in counts]
+    bigrams = [math.fsum(rarity[p] for p in pairs) / max(len(pairs), 1) for pairs in word_pairs]
+
+    missing = len(ranks) + 1
+    frequency = [math.log(ranks.get(word, missing)) for word in lowered]
+    features = {'syllables': syllables, 'length': length, 'bigrams': bigrams, 'frequency': frequency}
+    return features, rarity
+
+
+def _combine_python(features, stats):
+    columns = []
+    for name, weight in WEIGHTS.items():
+        mean, std = stats[name]
+        values = features[name]
+        columns.append((weight, [(v - mean) / std for v in values] if std > 0 else [0.0] * len(values)))
+    return [sum(weight * column[i] for weight, column in columns) for i in range(len(columns[0][1]))]
+
+
+def _calibrate_python(korean, english, cutoffs, ranks):
+    features, rarity = _features_python(korean, english, ranks)
+    stats = {name: _mean_std(values) for name, values in features.items()}
+    ordered = sorted(_combine_python(features, stats))
+    return Calibration(stats, rarity, [_quantile(ordered, q) for q in cutoffs], cutoffs)
+
+
+def _score_python(korean, english, calibration, ranks):
+    features, _ = _features_python(korean, english, ranks, calibration.rarity)
+    easy, medium = calibration.edges
+    return [0 if s < easy else 1 if s < medium else 2
+            for s in _combine_python(features, calibration.stats)]
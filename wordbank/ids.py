@@ -0,0 +1,41 @@
+"""
+Content-derived word IDs and shuffle keys that survive regeneration
+"""
+
+import hashlib
+
+# Keep IDs positive in a signed 32-bit integer so every consumer can hold them
+ID_BITS = 31
+_ID_MASK = (1 << ID_BITS) - 1
+
+
+def _digest(parts, size, person):
+    digest = hashlib.blake2b(digest_size=size, person=person)
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return int.from_bytes(digest.digest(), 'big')
+
+
+def stable_id(category, korean, english, attempt=0):
+    """ID of a word, a pure function of its content.
+
+    `attempt` is bumped only when two different words hash to the same ID
+    (see pipeline.assign_ids for which of them keeps it).
+    """
+    parts = (category, korean, english, attempt) if attempt else (category, korean, english)
+    return (_digest(parts, 4, b'wordbank-id') & _ID_MASK) or 1
+
+
+def collision_rank(category, korean, english):
+    """64-bit tie-breaker among words whose IDs collide; lowest keeps the ID"""
+    return _digest((category, korean, english), 8, b'wordbank-rank')
+
+
+def order_key(seed, category, korean, english):
+    """32-bit sort key placing a word in the seeded shuffle order.
+
+    Each word's position depends only on the seed and its own content, so
+    adding or removing words leaves the relative order of the rest intact.
+    """
+    return _digest(('' if seed is None else seed, category, korean, english), 4, b'wordbank-order')
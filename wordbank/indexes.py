@@ -0,0 +1,62 @@
+"""
+Precomputed ID lists so the app can sample by category/difficulty in O(k)
+"""
+
+from array import array
+
+from .pipeline import DIFFICULTIES
+
+
+class IndexBuilder:
+    """Collects word IDs per category, difficulty and category x difficulty.
+
+    Fed one record at a time while the bank is streamed out. IDs are kept
+    in compact unsigned-int arrays and written in ascending order.
+
+    `unique` holds the first ID of every distinct Korean word, which is what
+    WordService compares when it de-duplicates a random selection.
+    """
+
+    def __init__(self):
+        self.by_category = {}
+        self.by_difficulty = {}
+        self.by_category_difficulty = {}
+        self.unique = array('I')
+        self._seen = set()
+
+    def add(self, word):
+        word_id = word["id"]
+        category = word["category"]
+        difficulty = word["difficulty"]
+        self._bucket(self.by_category, category).append(word_id)
+        self._bucket(self.by_difficulty, difficulty).append(word_id)
+        cell = self.by_category_difficulty.get(category)
+        if cell is None:
+            cell = self.by_category_difficulty[category] = {}
+        self._bucket(cell, difficulty).append(word_id)
+        if word["korean"] not in self._seen:
+            self._seen.add(word["korean"])
+            self.unique.append(word_id)
+
+    @staticmethod
+    def _bucket(table, key):
+        ids = table.get(key)
+        if ids is None:
+            ids = table[key] = array('I')
+        return ids
+
+    def tables(self):
+        """The index section as plain JSON-ready dictionaries"""
+        categories = sorted(self.by_category)
+        return {
+            "by_category": {c: sorted(self.by_category[c]) for c in categories},
+            "by_difficulty": _by_difficulty(self.by_difficulty),
+            "by_category_difficulty": {
+                c: _by_difficulty(self.by_category_difficulty[c]) for c in categories
+            },
+            "unique": sorted(self.unique),
+        }
+
+
+def _by_difficulty(table):
+    return {d: sorted(table[d]) for d in DIFFICULTIES if d in table}
@@ -0,0 +1,78 @@
+"""
+Incremental JSON writer producing the same text as json.dump(..., indent=2)
+"""
+
+import json
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+class JSONStreamWriter:
+    """Writes one top-level JSON object field by field.
+
+    Arrays are consumed from an iterator and encoded one element at a time,
+    so only the element being written is ever held in memory. The output is
+    identical to json.dump(obj, fp, ensure_ascii=False, indent=2) of the
+    equivalent dictionary.
+    """
+
+    def __init__(self, fp, indent=2):
+        self.fp = fp
+        self.indent = indent
+        self._pad = ' ' * indent
+        self._fields = 0
+        self._scalar = json.JSONEncoder(ensure_ascii=False).encode
+
+    def __enter__(self):
+        self.fp.write('{')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.fp.write('\n}' if self._fields else '}')
+
+    def _encode(self, value, depth):
+        if type(value) is dict and all(type(v) in _SCALARS for v in value.values()):
+            return self._encode_flat(value, depth)
+        text = json.dumps(value, ensure_ascii=False, indent=self.indent)
+        return text.replace('\n', '\n' + self._pad * depth)
+
+    def _encode_flat(self, record, depth):
+        """Fast path for dictionaries of scalars such as word records"""
+        if not record:
+            return '{}'
+        pad = self._pad * (depth + 1)
+        encode = self._scalar
+        body = (',\n' + pad).join(f'{encode(k)}: {encode(v)}' for k, v in record.items())
+        return f'{{\n{pad}{body}\n{self._pad * depth}}}'
+
+    def _key(self, key):
+        self.fp.write(',\n' if self._fields else '\n')
+        self.fp.write(f'{self._pad}{json.dumps(key, ensure_ascii=False)}: ')
+        self._fields += 1
+
+    def field(self, key, value, compact=False):
+        """Write `"key": value` with value encoded in one piece.
+
+        compact=True puts the whole value on one line without spaces, which
+        keeps long ID lists from taking a line per number.
+        """
+        self._key(key)
+        if compact:
+            self.fp.write(json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+        else:
+            self.fp.write(self._encode(value, 1))
+
+    def array(self, key, items):
+        """Stream `"key": [...]` from an iterable; returns the element count"""
+        self._key(key)
+        write = self.fp.write
+        prefix = '[\n' + self._pad * 2
+        separator = ',\n' + self._pad * 2
+        count = 0
+        for item in items:
+            write(prefix if not count else separator)
+            write(self._encode(item, 2))
+            count += 1
+        write(f'\n{self._pad}]' if count else '[]')
+        return count
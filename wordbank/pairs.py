@@ -0,0 +1,209 @@
+"""
+Pre-sampled word pairs for the unlock challenge (Pairs.bin)
+
+A pair table lets the app draw a challenge with one random index instead of
+shuffling the bank. Pairs are sampled in strata -- every unordered category
+combination crossed with every difficulty band gets an equal share -- and
+pairs of words sharing an English gloss (the same word included) are
+rejected.
+
+File layout, little-endian: a PAIRS_HEADER, then count pairs of uint32 word
+IDs, the smaller ID first.
+"""
+
+import hashlib
+import random
+import struct
+import sys
+from array import array
+
+from .dedup import english_key
+from .pipeline import DIFFICULTIES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'WPRS'
+SCHEMA_VERSION = 1
+
+# magic, version, bytes per pair, pair count
+PAIRS_HEADER = struct.Struct('<4sHHI')
+
+# How many sampling rounds a stratum gets to fill its quota
+_ROUNDS = 8
+
+
+def seed_int(seed):
+    digest = hashlib.blake2b(str('' if seed is None else seed).encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little')
+
+
+def word_glosses(word, glosses=None):
+    """english_key() of every gloss of the word's Korean (see DedupReport.glosses).
+
+    Two words whose glosses meet are too close to pair: the same word,
+    two Korean words for one English word, or words linked through
+    another sense of either.
+    """
+    if glosses:
+        found = glosses.get(word["korean"])
+        if found:
+            return found
+    return frozenset((english_key(word["english"]),))
+
+
+class _Columns:
+    """The few fields sampling needs, read from the words in one pass"""
+
+    def __init__(self, words, glosses=None):
+        self.ids, self.categories, self.difficulties = [], [], []
+        self.glosses = []
+        for word in words:
+            self.ids.append(word["id"])
+            self.categories.append(word["category"])
+            self.difficulties.append(word["difficulty"])
+            self.glosses.append(word_glosses(word, glosses))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def strata(columns):
+    """(category a, category b, difficulty) for every combination present"""
+    categories = sorted(set(columns.categories))
+    present = set(columns.difficulties)
+    difficulties = [d for d in DIFFICULTIES if d in present]
+    return [(a, b, d) for i, a in enumerate(categories) for b in categories[i:] for d in difficulties]
+
+
+def sample_pairs(words, count, seed=None, glosses=None):
+    """Up to `count` distinct (low ID, high ID) pairs balanced across strata.
+
+    `words` is any iterable of records; it is read once. `glosses` is the
+    DedupReport.glosses() of the bank's source tables; without it only a
+    word's own English word counts as its gloss. Returns (pairs, shortfall)
+    where shortfall counts quota that small strata could not fill with
+    valid pairs.
+    """
+    columns = _Columns(words, glosses)
+    groups = strata(columns)
+    if not groups or count <= 0:
+        return [], 0
+    quotas = [count // len(groups) + (i < count % len(groups)) for i in range(len(groups))]
+    if np is not None:
+        return _sample_numpy(columns, groups, quotas, seed)
+    return _sample_python(columns, groups, quotas, seed)
+
+
+# NumPy implementation
+
+def _encode_sets(sets):
+    """(n, widest set) codes of every set's members, padded with -1"""
+    codes = {}
+    table = np.full((len(sets), max(map(len, sets), default=1)), -1, dtype=np.int64)
+    for row, members in enumerate(sets):
+        for column, value in enumerate(members):
+            table[row, column] = codes.setdefault(value, len(codes))
+    return table
+
+
+def _share_gloss(gloss, x, y):
+    """Whether each x/y row pair has a gloss code in common"""
+    gx, gy = gloss[x], gloss[y]
+    shared = np.zeros(len(x), dtype=bool)
+    for i in range(gloss.shape[1]):
+        shared |= ((gx[:, i:i + 1] == gy) & (gx[:, i:i + 1] >= 0)).any(axis=1)
+    return shared
+
+
+def _sample_numpy(columns, groups, quotas, seed):
+    rng = np.random.default_rng(seed_int(seed))
+    ids = np.array(columns.ids, dtype=np.uint64)
+    category = np.array(columns.categories)
+    difficulty = np.array(columns.difficulties)
+    gloss = _encode_sets(columns.glosses)
+
+    chosen = []
+    shortfall = 0
+    for (cat_a, cat_b, band), quota in zip(groups, quotas):
+        in_band = difficulty == band
+        left = np.flatnonzero(in_band & (category == cat_a))
+        right = np.flatnonzero(in_band & (category == cat_b))
+        packed = np.empty(0, dtype=np.uint64)
+        if len(left) and len(right):
+            for _ in range(_ROUNDS):
+                need = quota - len(packed)
+                if need <= 0:
+                    break
+                x = left[rng.integers(len(left), size=need * 2)]
+                y = right[rng.integers(len(right), size=need * 2)]
+                valid = ~_share_gloss(gloss, x, y)
+                low = np.minimum(ids[x], ids[y])[valid]
+                high = np.maximum(ids[x], ids[y])[valid]
+                packed = np.unique(np.concatenate((packed, low << np.uint64(32) | high)))
+        if len(packed) > quota:
+            packed = rng.choice(packed, quota, replace=False)
+        shortfall += quota - len(packed)
+        chosen.append(packed)
+
+    table = np.concatenate(chosen)
+    rng.shuffle(table)
+    pairs = np.column_stack((table >> np.uint64(32), table & np.uint64(0xFFFFFFFF)))
+    return [tuple(pair) for pair in pairs.astype(np.uint32).tolist()], shortfall
+
+
+# Pure Python implementation
+
+def _sample_python(columns, groups, quotas, seed):
+    rng = random.Random(seed_int(seed))
+    ids = columns.ids
+    glosses = columns.glosses
+    rows = list(zip(columns.difficulties, columns.categories))
+    chosen = []
+    shortfall = 0
+    for (cat_a, cat_b, band), quota in zip(groups, quotas):
+        left = [i for i, row in enumerate(rows) if row == (band, cat_a)]
+        right = [i for i, row in enumerate(rows) if row == (band, cat_b)]
+        picked = set()
+        if left and right:
+            for _ in range(_ROUNDS):
+                need = quota - len(picked)
+                if need <= 0:
+                    break
+                for _ in range(need * 2):
+                    x, y = rng.choice(left), rng.choice(right)
+                    if not glosses[x].isdisjoint(glosses[y]):
+                        continue
+                    a, b = ids[x], ids[y]
+                    picked.add((min(a, b), max(a, b)))
+        picked = sorted(picked)
+        if len(picked) > quota:
+            picked = rng.sample(picked, quota)
+        shortfall += quota - len(picked)
+        chosen.extend(picked)
+    rng.shuffle(chosen)
+    return chosen, shortfall
+
+
+def write_pairs(path, pairs):
+    flat = array('I', (word_id for pair in pairs for word_id in pair))
+    if sys.byteorder == 'big':
+        flat.byteswap()
+    with open(path, 'wb') as f:
+        f.write(PAIRS_HEADER.pack(MAGIC, SCHEMA_VERSION, 8, len(pairs)))
+        flat.tofile(f)
+
+
+def read_pairs(path):
+    """Pairs written by write_pairs, as a list of (low ID, high ID)"""
+    with open(path, 'rb') as f:
+        magic, version, pair_size, count = PAIRS_HEADER.unpack(f.read(PAIRS_HEADER.size))
+        if magic != MAGIC or version != SCHEMA_VERSION or pair_size != 8:
+            raise ValueError(f"{path}: not a version {SCHEMA_VERSION} pair table")
+        flat = array('I')
+        flat.fromfile(f, count * 2)
+    if sys.byteorder == 'big':
+        flat.byteswap()
+    return list(zip(flat[::2], flat[1::2]))
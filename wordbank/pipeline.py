@@ -0,0 +1,294 @@
+"""
+Streaming word-bank generation: source rows -> difficulty -> shuffle -> records
+"""
+
+import random
+from array import array
+from bisect import bisect_right
+
+from .difficulty import score_difficulty
+from .ids import collision_rank, order_key, stable_id
+from .jsonstream import JSONStreamWriter
+
+# words_data key -> category label stored in the bank
+CATEGORY_LABELS = {
+    "nouns": "명사",
+    "adjectives": "형용사",
+}
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+_MASK64 = (1 << 64) - 1
+
+
+def positional_difficulty(position, count):
+    """First 30% of a category are easy, the next 40% medium, the rest hard"""
+    if position < count * 0.3:
+        return "easy"
+    if position < count * 0.7:
+        return "medium"
+    return "hard"
+
+
+class WordTable:
+    """The (korean, english) rows of every category behind one global index.
+
+    Rows are any sequences supporting len() and indexing, so large tables
+    can be backed by something other than in-memory lists.
+    """
+
+    def __init__(self, words_data, labels=None):
+        labels = CATEGORY_LABELS if labels is None else labels
+        self.categories = [(labels.get(name, name), rows) for name, rows in words_data.items()]
+        self.offsets = []
+        total = 0
+        for _, rows in self.categories:
+            self.offsets.append(total)
+            total += len(rows)
+        self.total = total
+        self.difficulties = None
+
+    def score(self, cutoffs=None, calibration=None):
+        """Replace positional difficulty with content scores for every row.
+
+        Scores the whole table in one batch (see wordbank.difficulty) and
+        keeps one difficulty code per row. Rows are scored against the
+        frozen calibration unless `cutoffs` asks for one fitted on this table.
+        """
+        korean, english = self.columns()
+        self.difficulties = bytes(score_difficulty(korean, english, cutoffs, calibration=calibration))
+        return self
+
+    def columns(self):
+        """(korean words, english words) of every row, in global index order"""
+        korean, english = [], []
+        for _, rows in self.categories:
+            for k, e in rows:
+                korean.append(k)
+                english.append(e)
+        return korean, english
+
+    def __len__(self):
+        return self.total
+
+    def entry(self, index):
+        """(korean, english, category, difficulty) of the row at a global index"""
+        slot = bisect_right(self.offsets, index) - 1
+        category, rows = self.categories[slot]
+        position = index - self.offsets[slot]
+        korean, english = rows[position]
+        if self.difficulties is not None:
+            return korean, english, category, DIFFICULTIES[self.difficulties[index]]
+        return korean, english, category, positional_difficulty(position, len(rows))
+
+    def __iter__(self):
+        """Rows in source order, one category after another"""
+        index = 0
+        for category, rows in self.categories:
+            count = len(rows)
+            for position, (korean, english) in enumerate(rows):
+                if self.difficulties is not None:
+                    difficulty = DIFFICULTIES[self.difficulties[index]]
+                else:
+                    difficulty = positional_difficulty(position, count)
+                yield korean, english, category, difficulty
+                index += 1
+
+
+class IndexPermutation:
+    """Pseudo-random bijection on range(n) in constant memory.
+
+    A balanced Feistel network over the smallest even-width bit domain
+    covering n, with cycle walking to stay inside range(n). Iterating it
+    yields a shuffled order of all indices without materialising a list.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, n, seed=None):
+        self.n = n
+        bits = max(2, (n - 1).bit_length())
+        bits += bits & 1
+        self.half = bits // 2
+        self.mask = (1 << self.half) - 1
+        rng = random.Random(seed if seed is not None else random.getrandbits(64))
+        self.keys = [rng.getrandbits(64) for _ in range(self.ROUNDS)]
+
+    def __len__(self):
+        return self.n
+
+    def _encrypt(self, index):
+        half, mask = self.half, self.mask
+        left, right = index >> half, index & mask
+        for key in self.keys:
+            x = ((right + key) * 0xBF58476D1CE4E5B9) & _MASK64
+            x ^= x >> 31
+            left, right = right, left ^ ((x * 0x94D049BB133111EB) >> 32 & mask)
+        return (left << half) | right
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.n:
+            raise IndexError(index)
+        value = self._encrypt(index)
+        while value >= self.n:
+            value = self._encrypt(value)
+        return value
+
+    def __iter__(self):
+        for index in range(self.n):
+            yield self[index]
+
+
+class ShuffledOrder:
+    """Words numbered 1..n in a seeded Feistel shuffle, in constant memory.
+
+    IDs are positions, so they change whenever the source tables do. The
+    permutation is fixed when the order is created, so every pass over it
+    (bank, pairs, search index) sees the same words with the same IDs.
+    """
+
+    def __init__(self, table, target_count=None, seed=None):
+        self.table = table
+        self.permutation = IndexPermutation(len(table), seed)
+        self.limit = len(table) if target_count is None else min(target_count, len(table))
+
+    def __len__(self):
+        return self.limit
+
+    def __iter__(self):
+        entry = self.table.entry
+        order = self.permutation
+        for word_id in range(1, self.limit + 1):
+            korean, english, category, difficulty = entry(order[word_id - 1])
+            yield {
+                "id": word_id,
+                "korean": korean,
+                "english": english,
+                "category": category,
+                "difficulty": difficulty,
+            }
+
+
+class StableOrder:
+    """Words in a seeded, content-keyed order with content-hash IDs.
+
+    Unlike ShuffledOrder, a word keeps both its ID and its place relative
+    to the other words when the source tables change, so regenerating after
+    an edit only touches the affected records. Sorting needs every word's
+    key, so one 64-bit key per word (and the IDs moved by collisions) is
+    kept; records are rebuilt from the table on every pass instead, so the
+    order can be computed once and shared by every output of a build.
+    """
+
+    def __init__(self, table, target_count=None, seed=None):
+        self.table = table
+        self.keys = array('Q', stable_order(table, target_count, seed))
+        self.moved = settle_collisions(table, self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return assign_ids(self.table, self.keys, self.moved)
+
+
+def iter_words(table, target_count=None, seed=None):
+    """Yield shuffled word records numbered from 1, at most target_count of them"""
+    return iter(ShuffledOrder(table, target_count, seed))
+
+
+def iter_stable_words(table, target_count=None, seed=None):
+    """Yield records in StableOrder; build the order once to make several passes"""
+    return iter(StableOrder(table, target_count, seed))
+
+
+def stable_order(table, target_count=None, seed=None):
+    """Sorted `order_key << 32 | row index` keys of the first target_count words"""
+    keys = sorted(
+        order_key(seed, category, korean, english) << 32 | index
+        for index, (korean, english, category, _) in enumerate(table)
+    )
+    if target_count is not None:
+        del keys[target_count:]
+    return keys
+
+
+def settle_collisions(table, keys):
+    """Position -> ID for the words that lose a content-hash ID collision.
+
+    When several words hash to the same ID, the one with the lowest
+    collision_rank keeps it and the others, in rank order, take the first
+    attempt that no word in the bank holds. Only the words' content decides
+    the outcome, never the seed or the order they come in.
+    """
+    entry = table.entry
+    issued = set()
+    clashes = set()
+    for key in keys:
+        korean, english, category, _ = entry(key & 0xFFFFFFFF)
+        word_id = stable_id(category, korean, english)
+        if word_id in issued:
+            clashes.add(word_id)
+        issued.add(word_id)
+    if not clashes:
+        return {}
+
+    colliding = {}
+    for position, key in enumerate(keys):
+        korean, english, category, _ = entry(key & 0xFFFFFFFF)
+        word_id = stable_id(category, korean, english)
+        if word_id in clashes:
+            colliding.setdefault(word_id, []).append(
+                (collision_rank(category, korean, english), position, category, korean, english))
+    moved = {}
+    for word_id in sorted(colliding):
+        for _, position, category, korean, english in sorted(colliding[word_id])[1:]:
+            attempt = 1
+            new_id = stable_id(category, korean, english, attempt)
+            while new_id in issued:
+                attempt += 1
+                new_id = stable_id(category, korean, english, attempt)
+            issued.add(new_id)
+            moved[position] = new_id
+    return moved
+
+
+def assign_ids(table, keys, moved=None):
+    """Yield a record with a content-hash ID for each key from stable_order.
+
+    `moved` is settle_collisions() of the same keys, computed here if not given.
+    """
+    if moved is None:
+        moved = settle_collisions(table, keys)
+    entry = table.entry
+    for position, key in enumerate(keys):
+        korean, english, category, difficulty = entry(key & 0xFFFFFFFF)
+        yield {
+            "id": moved.get(position) or stable_id(category, korean, english),
+            "korean": korean,
+            "english": english,
+            "category": category,
+            "difficulty": difficulty,
+        }
+
+
+def write_words_json(fp, words, metadata, indexes=None):
+    """Stream records into the Words.json layout; returns the record count.
+
+    With an IndexBuilder, every record is also fed to it and its tables are
+    written as an "indexes" section between the words and the metadata.
+    """
+    if indexes is not None:
+        words = _indexed(words, indexes)
+    with JSONStreamWriter(fp) as out:
+        count = out.array("words", words)
+        if indexes is not None:
+            out.field("indexes", indexes.tables(), compact=True)
+        out.field("metadata", {"total_count": count, **metadata})
+    return count
+
+
+def _indexed(words, indexes):
+    for word in words:
+        indexes.add(word)
+        yield word
@@ -0,0 +1,147 @@
+"""
+Prefix and trigram search index for the bank (Search.json)
+
+English words are indexed lowercased; Korean words are indexed as jamo
+sequences, with compound vowels and final consonants split into the keys a
+user types, so a query ending in a half-typed syllable (사ㄹ, 닭 -> 달ㄱ)
+still matches by prefix. Both kinds of key sit in sorted arrays, so a prefix
+lookup is two binary searches plus the matches themselves.
+
+The optional trigram posting lists answer substring queries of three or
+more keys by intersecting the postings of the query's trigrams.
+"""
+
+import json
+from bisect import bisect_left
+
+SCHEMA_VERSION = 1
+
+_SYLLABLE_FIRST, _SYLLABLE_LAST = 0xAC00, 0xD7A3
+
+_LEADS = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_VOWELS = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+_TAILS = ('', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ',
+          'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+
+# Compound jamo -> the keystrokes that form them
+_SPLIT = {
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+}
+
+
+def jamo(text):
+    """Hangul text as a keystroke-level compatibility jamo string"""
+    out = []
+    for char in text:
+        code = ord(char)
+        if _SYLLABLE_FIRST <= code <= _SYLLABLE_LAST:
+            offset = code - _SYLLABLE_FIRST
+            lead, rest = divmod(offset, 21 * 28)
+            vowel, tail = divmod(rest, 28)
+            for part in (_LEADS[lead], _VOWELS[vowel], _TAILS[tail]):
+                out.append(_SPLIT.get(part, part))
+        else:
+            out.append(_SPLIT.get(char, char))
+    return ''.join(out)
+
+
+def search_key(text):
+    """The indexed form of a word or query: lowercased, Hangul split into jamo"""
+    return jamo(text.strip().lower())
+
+
+def trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class SearchIndex:
+    """Sorted (key, id) arrays for both fields plus optional trigram postings"""
+
+    def __init__(self, english=(), korean=(), postings=None):
+        self.english = sorted(english)
+        self.korean = sorted(korean)
+        self.postings = postings
+        self._english_keys = [key for key, _ in self.english]
+        self._korean_keys = [key for key, _ in self.korean]
+        self._keys_of = {}
+        for pairs in (self.english, self.korean):
+            for key, word_id in pairs:
+                self._keys_of.setdefault(word_id, []).append(key)
+
+    @classmethod
+    def build(cls, words, with_trigrams=False):
+        english, korean = [], []
+        postings = {} if with_trigrams else None
+        for word in words:
+            word_id = word["id"]
+            keys = (search_key(word["english"]), search_key(word["korean"]))
+            english.append((keys[0], word_id))
+            korean.append((keys[1], word_id))
+            if postings is not None:
+                for gram in trigrams(keys[0]) | trigrams(keys[1]):
+                    postings.setdefault(gram, []).append(word_id)
+        if postings is not None:
+            postings = {gram: sorted(set(ids)) for gram, ids in sorted(postings.items())}
+        return cls(english, korean, postings)
+
+    @staticmethod
+    def _prefix(keys, pairs, key):
+        start = bisect_left(keys, key)
+        end = bisect_left(keys, key + '\U0010FFFF', start)
+        return [word_id for _, word_id in pairs[start:end]]
+
+    def prefix(self, query):
+        """IDs of words whose English or Korean side starts with query"""
+        key = search_key(query)
+        if not key:
+            return []
+        found = self._prefix(self._english_keys, self.english, key)
+        found += self._prefix(self._korean_keys, self.korean, key)
+        return sorted(set(found))
+
+    def substring(self, query):
+        """IDs of words containing query; needs trigram postings for 3+ keys.
+
+        Shorter queries fall back to prefix matching. Candidates from the
+        postings are checked against the full keys, so there are no false
+        positives.
+        """
+        key = search_key(query)
+        if len(key) < 3 or self.postings is None:
+            return self.prefix(query)
+        grams = sorted(trigrams(key), key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(self.postings.get(gram, ()))
+        return sorted(word_id for word_id in candidates
+                      if any(key in k for k in self._keys_of.get(word_id, ())))
+
+    def to_dict(self):
+        data = {
+            "version": SCHEMA_VERSION,
+            "english": [[key, word_id] for key, word_id in self.english],
+            "korean": [[key, word_id] for key, word_id in self.korean],
+        }
+        if self.postings is not None:
+            data["trigrams"] = self.postings
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported search index version {data.get('version')}")
+        return cls((tuple(p) for p in data["english"]), (tuple(p) for p in data["korean"]),
+                   data.get("trigrams"))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))